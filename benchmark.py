@@ -0,0 +1,704 @@
+'''
+	Benchmarks for the programs hot paths. Quote fetching is measured against a
+	local stub of the NASDAQ quote pages and the database benchmarks get their
+	quotes from a fixture provider, so results don't depend on the network
+
+	Benchmarks can be run by typing "python benchmark.py" in the current directory
+
+	@author Johnathan McNutt
+'''
+import os
+import sys
+import time
+import random
+import sqlite3
+import tempfile
+import threading
+import tracemalloc
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from lxml import etree, html
+
+import database_manager
+import http_session
+import portfolio_history
+import price_alerts
+import quote_provider
+import quote_page
+import report_format
+import stock_model
+import trend_stats
+
+#simulated round trip time of a single quote request in seconds
+STUB_LATENCY = 0.02
+
+#page served by the stub server, mimics the fields read from the NASDAQ site
+STUB_PAGE = '''<html><body>
+<div id="qwidget_lastsale">$123.45</div>
+<span id="qwidget_markettime">Jan. 1, 2000</span>
+</body></html>'''
+
+'''
+	threaded http server with a listen backlog large enough for the concurrent
+	quote fetches
+'''
+class StubQuoteServer(ThreadingHTTPServer):
+	daemon_threads = True
+	request_queue_size = 128
+
+'''
+	request handler for the stub NASDAQ server, answers every request with the
+	same quote page after waiting the simulated latency
+'''
+class StubQuoteHandler(BaseHTTPRequestHandler):
+	#allows clients to keep the connection alive between requests
+	protocol_version = 'HTTP/1.1'
+	#headers and body are written separately, without this kept alive
+	#connections stall on delayed acknowledgements
+	disable_nagle_algorithm = True
+
+	def do_GET(self):
+		time.sleep(STUB_LATENCY)
+
+		body = STUB_PAGE.encode()
+
+		self.send_response(200)
+		self.send_header('Content-Type', 'text/html')
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	#keeps request logging from cluttering benchmark output
+	def log_message(self, format, *args):
+		pass
+
+'''
+	starts the stub NASDAQ server on a free local port in a background thread
+	and points the stock model at it
+
+	@return ThreadingHTTPServer - the running server, shut down by the caller
+'''
+def startStubServer():
+	server = StubQuoteServer(('127.0.0.1', 0), StubQuoteHandler)
+
+	thread = threading.Thread(target=server.serve_forever, daemon=True)
+	thread.start()
+
+	quote_provider.NASDAQ_URL = 'http://127.0.0.1:' + str(server.server_port) + '/symbol/'
+
+	return server
+
+'''
+	times a function call
+
+	@param function - the function to time
+	@param args - arguments passed to the function
+
+	@return float - elapsed wall clock time in seconds
+'''
+def timeCall(function, *args):
+	start = time.perf_counter()
+	function(*args)
+	return time.perf_counter() - start
+
+'''
+	compares fetching a portfolios quotes one at a time against the
+	concurrent batch fetch
+
+	@param count - number of symbols in the simulated portfolio
+'''
+def benchmarkQuoteFetching(count):
+	symbols = ['SYM' + str(i) for i in range(0, count)]
+
+	#the quote cache is skipped so both runs go to the server for every symbol
+	sequential = timeCall(lambda: [stock_model.getCurrentPrice(symbol, False) for symbol in symbols])
+	batched = timeCall(stock_model.getCurrentPrices, symbols, False)
+
+	print("Quote fetching, " + str(count) + " symbols")
+	print("  sequential:\t" + '{:>8.3f}'.format(sequential) + " s")
+	print("  batched:\t" + '{:>8.3f}'.format(batched) + " s")
+	print("  speedup:\t" + '{:>8.1f}'.format(sequential / batched) + "x")
+
+'''
+	compares the per quote latency of opening a new connection for every
+	request against reusing the pooled keep alive session
+
+	@param count - number of quotes fetched one after another
+'''
+def benchmarkHttpSession(count):
+	global STUB_LATENCY
+
+	url = quote_provider.NASDAQ_URL + 'sym'
+
+	#removes the simulated latency so only connection overhead is measured
+	latency = STUB_LATENCY
+	STUB_LATENCY = 0
+
+	try:
+		fresh = timeCall(lambda: [requests.get(url).close() for i in range(0, count)])
+		pooled = timeCall(lambda: [http_session.get(url).close() for i in range(0, count)])
+	finally:
+		STUB_LATENCY = latency
+
+	print("HTTP request latency, " + str(count) + " requests")
+	print("  new connection:\t" + '{:>8.3f}'.format(fresh * 1000 / count) + " ms")
+	print("  pooled session:\t" + '{:>8.3f}'.format(pooled * 1000 / count) + " ms")
+
+'''
+	builds a quote page the size of a real NASDAQ page, with scripts, menus and a
+	large table around the quote fields
+
+	@param rowCount - number of rows in the table
+	@param fieldsLast - when true the quote fields come after the table, the
+		worst case for a parser that stops early
+
+	@return bytes - the page
+'''
+def buildQuotePage(rowCount, fieldsLast=False):
+	script = '<script>' + 'var settings = {"a": [1, 2, 3], "b": "text"};\n' * 300 + '</script>'
+	menu = '<ul>' + ''.join('<li><a href="#">Menu ' + str(i) + '</a></li>' for i in range(0, 200)) + '</ul>'
+	fields = '<div class="quote"><div id="qwidget_lastsale">$123.45</div><span id="qwidget_markettime">Jan. 1, 2000</span></div>'
+	rows = ''.join('<tr><td><a href="/symbol/s' + str(i) + '">Item ' + str(i) + '</a></td><td>' + str(i) + '.00</td></tr>\n' for i in range(0, rowCount))
+	table = '<table>' + rows + '</table>'
+
+	if(fieldsLast):
+		body = menu + table + fields
+	else:
+		body = menu + fields + table
+
+	return ('<!DOCTYPE html><html><head><title>Quote</title>' + script + '</head><body>' + body + '</body></html>').encode()
+
+'''
+	times reading the last sale and market time from quote pages by building
+	the whole tree and searching it, as the scraper used to, with precompiled
+	XPath, and with the pull parser that stops once the fields are found.
+	Allocations are the peak Python memory used while reading one page,
+	memory libxml2 allocates for itself isn't traced
+
+	@param count - number of times each page is read
+	@param pages - list of (name, page content) tuples
+'''
+def benchmarkQuoteParsing(count, pages):
+	lastSale = etree.XPath('//div[@id="qwidget_lastsale"]/text()')
+	marketTime = etree.XPath('//span[@id="qwidget_markettime"]/text()')
+
+	def fullTree(content):
+		tree = html.fromstring(content)
+		return tree.xpath('//div[@id="qwidget_lastsale"]/text()')[0], tree.xpath('//span[@id="qwidget_markettime"]/text()')[0]
+
+	def precompiled(content):
+		tree = html.fromstring(content)
+		return lastSale(tree)[0], marketTime(tree)[0]
+
+	def pullParser(content):
+		fields = quote_page.extractFields(content, ['last_sale', 'market_time'])
+		return fields['last_sale'], fields['market_time']
+
+	print("Quote page parsing, " + str(count) + " reads of each page")
+
+	for name, content in pages:
+		print("  " + name + ", " + str(len(content) // 1024) + " KB")
+
+		for method, extract in (('full tree', fullTree), ('precompiled', precompiled), ('pull parser', pullParser)):
+			elapsed = timeCall(lambda: [extract(content) for i in range(0, count)])
+
+			tracemalloc.start()
+			extract(content)
+			peak = tracemalloc.get_traced_memory()[1]
+			tracemalloc.stop()
+
+			print("    " + method + ":\t" + '{:>8.3f}'.format(elapsed * 1000 / count) + " ms  " +
+					'{:>8}'.format(peak) + " bytes allocated per quote")
+
+'''
+	records buys the way stock_model.buyStock does against a fresh database
+
+	@param count - number of buys to record
+	@param reconnect - when true every database call opens its own connection,
+		as the database manager did before connections were kept open
+
+	@return float - elapsed wall clock time in seconds
+'''
+def timeBuys(count, reconnect):
+	with tempfile.TemporaryDirectory() as directory:
+		database_manager.DATABASE = os.path.join(directory, 'bench.db')
+		database_manager.createDatabase()
+
+		today = date.today()
+
+		start = time.perf_counter()
+
+		for i in range(0, count):
+			symbol = 'SYM' + str(i % 100)
+
+			database_manager.addStockToPortfolio(symbol, 1)
+			if(reconnect):
+				database_manager.closeConnections()
+
+			database_manager.addTransaction(symbol, 'buy', 1, 12345, today)
+			if(reconnect):
+				database_manager.closeConnections()
+
+			database_manager.addTrend(symbol, 12345, today)
+			if(reconnect):
+				database_manager.closeConnections()
+
+		elapsed = time.perf_counter() - start
+
+		database_manager.closeConnections()
+
+	return elapsed
+
+'''
+	records buys through the single transaction trade api against a fresh database
+
+	@param count - number of buys to record
+
+	@return float - elapsed wall clock time in seconds
+'''
+def timeTrades(count):
+	with tempfile.TemporaryDirectory() as directory:
+		database_manager.DATABASE = os.path.join(directory, 'bench.db')
+		database_manager.createDatabase()
+
+		today = date.today()
+
+		start = time.perf_counter()
+
+		for i in range(0, count):
+			database_manager.executeTrade('SYM' + str(i % 100), 'buy', 1, 12345, today)
+
+		elapsed = time.perf_counter() - start
+
+		database_manager.closeConnections()
+
+	return elapsed
+
+'''
+	compares recording buys with a connection per call, with the kept open
+	connection and with one transaction per trade
+
+	@param count - number of buys to record
+'''
+def benchmarkBuys(count):
+	reconnecting = timeBuys(count, True)
+	kept = timeBuys(count, False)
+	single = timeTrades(count)
+
+	print("Recording buys, " + str(count) + " buys")
+	print("  connection per call:\t" + '{:>8.3f}'.format(reconnecting) + " s")
+	print("  kept connection:\t" + '{:>8.3f}'.format(kept) + " s")
+	print("  single transaction:\t" + '{:>8.3f}'.format(single) + " s")
+
+'''
+	records and reads back daily prices for many symbols, once with the trends
+	table and once with the columnar trend store
+
+	@param symbolCount - number of symbols with recorded prices
+	@param dayCount - number of days recorded for every symbol
+'''
+def benchmarkTrendStore(symbolCount, dayCount):
+	symbols = ['SYM' + str(i) for i in range(0, symbolCount)]
+	startDay = date(2000, 1, 1)
+
+	#one batch for each day, as a portfolio refresh records them
+	batches = []
+	for i in range(0, dayCount):
+		marketDate = (startDay + timedelta(days=i)).isoformat()
+		batches.append([(symbol, 10000 + i, marketDate) for symbol in symbols])
+
+	print("Trend history, " + str(symbolCount) + " symbols, " + str(dayCount) + " days")
+
+	for name, store in (('trends table', False), ('trend store', True)):
+		with tempfile.TemporaryDirectory() as directory:
+			database_manager.DATABASE = os.path.join(directory, 'bench.db')
+			database_manager.createDatabase()
+
+			database_manager.USE_TREND_STORE = store
+
+			try:
+				start = time.perf_counter()
+				for batch in batches:
+					database_manager.addTrends(batch)
+				writing = time.perf_counter() - start
+
+				start = time.perf_counter()
+				for symbol in symbols:
+					trend_stats.getPriceSeries(symbol)
+				reading = time.perf_counter() - start
+
+				start = time.perf_counter()
+				for symbol in symbols:
+					trend_stats.getSummary(symbol, '2001-01-01', '2002-01-01')
+				summarizing = time.perf_counter() - start
+			finally:
+				database_manager.USE_TREND_STORE = False
+				database_manager.closeConnections()
+
+		print("  " + name)
+		print("    record:\t\t" + '{:>8.3f}'.format(writing) + " s")
+		print("    read series:\t" + '{:>8.3f}'.format(reading * 1000 / symbolCount) + " ms per symbol")
+		print("    year summary:\t" + '{:>8.3f}'.format(summarizing * 1000 / symbolCount) + " ms per symbol")
+
+'''
+	rebuilds the daily value history of a large portfolio and measures its
+	returns, with prices read from the trends table and from the trend store
+
+	@param symbolCount - number of symbols held
+	@param years - length of the history in years
+	@param tradeCount - number of trades after the opening buys
+'''
+def benchmarkPortfolioHistory(symbolCount, years, tradeCount):
+	symbols = ['SYM' + str(i) for i in range(0, symbolCount)]
+	startDay = date(2000, 1, 3)
+	generator = random.Random(1)
+
+	#weekday prices for every symbol
+	days = [startDay + timedelta(days=i) for i in range(0, years * 365)]
+	marketDates = [day.isoformat() for day in days if day.weekday() < 5]
+
+	trendList = [(symbol, generator.randint(5000, 20000), marketDate) for symbol in symbols for marketDate in marketDates]
+
+	#every symbol is bought on the first day, then traded at random
+	transactionList = [(symbol, 'buy', 100, 10000, marketDates[0]) for symbol in symbols]
+	for i in range(0, tradeCount):
+		transactionList.append((generator.choice(symbols), generator.choice(['buy', 'sell']),
+								generator.randint(1, 10), generator.randint(5000, 20000), generator.choice(marketDates)))
+
+	print("Portfolio history, " + str(symbolCount) + " symbols, " + str(years) + " years, " + str(len(trendList)) + " prices")
+
+	with tempfile.TemporaryDirectory() as directory:
+		database = os.path.join(directory, 'bench.db')
+		database_manager.createDatabase(database)
+		database_manager.addTransactions(transactionList, database)
+		database_manager.addTrends(trendList, database)
+
+		for name, store in (('trends table', False), ('trend store', True)):
+			database_manager.USE_TREND_STORE = store
+
+			try:
+				if(store):
+					#the first use copies the trends table into the store
+					loading = timeCall(database_manager.getTrendStore, database)
+					print("  load trend store:\t" + '{:>8.3f}'.format(loading) + " s")
+
+				elapsed = timeCall(portfolio_history.getReturns, None, marketDates[-1], database)
+			finally:
+				database_manager.USE_TREND_STORE = False
+
+			print("  " + name + ":\t" + '{:>8.3f}'.format(elapsed) + " s")
+
+		database_manager.closeConnections()
+
+'''
+	compares formatting the transaction log row by row, the way the reports did
+	before report_format, with the precomputed layouts and memoized money
+	columns, then times the whole log read from the database, both joined into
+	one string and streamed to a file
+
+	@param rowCount - number of transactions in the log
+'''
+def benchmarkReportRendering(rowCount):
+	generator = random.Random(1)
+	symbols = ['SYM' + str(i) for i in range(0, 100)]
+	startDay = date(2000, 1, 3)
+
+	transactionList = [(generator.choice(symbols), generator.choice(['buy', 'sell']), generator.randint(1, 1000),
+						generator.randint(1000, 50000), (startDay + timedelta(days=i * 3650 // rowCount)).isoformat())
+						for i in range(0, rowCount)]
+
+	#money formatting by slicing and joining, as it was done before report_format
+	def slicedDollars(cents):
+		sign = ''
+		if(cents < 0):
+			sign = '-'
+			cents = -cents
+
+		if(cents < 10):
+			return sign + "$0.0" + str(cents)
+
+		if(cents < 100):
+			return sign + "$0." + str(cents)
+
+		dollars = str(cents)[:-2]
+		segments = []
+		while(len(dollars) > 3):
+			segments.append(dollars[-3:])
+			dollars = dollars[:-3]
+		segments.append(dollars)
+
+		message = sign + '$'
+		for segment in reversed(segments):
+			message += segment + ','
+
+		return message[:-1] + '.' + str(cents)[-2:]
+
+	def rowByRow(transactions):
+		lines = []
+
+		for symbol, type, quantity, price, marketDate in transactions:
+			lines.append(symbol + '\t\t' + type + '\t\t' + '{:>8}'.format(str(quantity)) + '\t' +
+						'{:>12}'.format(slicedDollars(price)) + '\t' + marketDate + '\n')
+
+		return ''.join(lines)
+
+	print("Report rendering, " + str(rowCount) + " row transaction log")
+
+	elapsed = timeCall(rowByRow, transactionList)
+	print("  row by row:\t\t" + '{:>8.3f}'.format(elapsed) + " s")
+
+	#starts from empty memos so the cost of filling them is counted
+	report_format.PRICE_COLUMN.memo.clear()
+	elapsed = timeCall(report_format.formatTransactionRows, transactionList)
+	print("  layouts and memo:\t" + '{:>8.3f}'.format(elapsed) + " s")
+
+	elapsed = timeCall(lambda: [report_format.formatDollars(price) for symbol, type, quantity, price, marketDate in transactionList])
+	print("  formatDollars only:\t" + '{:>8.3f}'.format(elapsed) + " s, against " +
+			'{:.3f}'.format(timeCall(lambda: [slicedDollars(price) for symbol, type, quantity, price, marketDate in transactionList])) +
+			" s sliced")
+
+	with tempfile.TemporaryDirectory() as directory:
+		database = os.path.join(directory, 'bench.db')
+		database_manager.createDatabase(database)
+		database_manager.addTransactions(transactionList, database)
+
+		elapsed = timeCall(stock_model.getTransactionString, database)
+		print("  whole log joined:\t" + '{:>8.3f}'.format(elapsed) + " s")
+
+		with open(os.devnull, 'w') as devnull:
+			elapsed = timeCall(lambda: report_format.writeReport(stock_model.iterTransactionString(database=database), devnull))
+		print("  whole log streamed:\t" + '{:>8.3f}'.format(elapsed) + " s")
+
+		database_manager.closeConnections()
+
+'''
+	times recording prices while many price alert rules are watching them,
+	against recording the same prices with no rules
+
+	@param ruleCount - number of alert rules, spread over the symbols
+	@param symbolCount - number of watched symbols
+	@param dayCount - number of days of prices, each day is three batches of
+		every symbols price
+'''
+def benchmarkAlerts(ruleCount, symbolCount, dayCount):
+	generator = random.Random(1)
+	symbols = ['SYM' + str(i) for i in range(0, symbolCount)]
+	startDay = date(2000, 1, 3)
+
+	#a random walk for each symbol, starting at $100
+	prices = dict.fromkeys(symbols, 10000)
+	batches = []
+
+	for day in range(0, dayCount):
+		marketDate = (startDay + timedelta(days=day)).isoformat()
+
+		for poll in range(0, 3):
+			batch = []
+
+			for symbol in symbols:
+				prices[symbol] = max(100, prices[symbol] + generator.randint(-300, 300))
+				batch.append((symbol, prices[symbol], marketDate))
+
+			batches.append(batch)
+
+	priceCount = sum(len(batch) for batch in batches)
+
+	print("Price alerts, " + str(ruleCount) + " rules on " + str(symbolCount) + " symbols, " + str(priceCount) + " prices")
+
+	with tempfile.TemporaryDirectory() as directory:
+		for name, rules in (('no rules', 0), ('with rules', ruleCount)):
+			database = os.path.join(directory, name.replace(' ', '_') + '.db')
+			database_manager.createDatabase(database)
+
+			for i in range(0, rules):
+				kind = price_alerts.KINDS[i % len(price_alerts.KINDS)]
+
+				if(kind in price_alerts.AVERAGE_KINDS):
+					value = generator.choice([5, 20, 50])
+				elif(kind == 'move'):
+					value = generator.randint(100, 1000)
+				else:
+					value = generator.randint(5000, 15000)
+
+				database_manager.addAlertRule(symbols[i % symbolCount], kind, value, database)
+
+			elapsed = timeCall(lambda: [database_manager.addTrends(batch, database) for batch in batches])
+
+			fired = len(database_manager.getAlertEvents(priceCount * ruleCount + 1, database))
+
+			print("  " + name + ":\t" + '{:>8.3f}'.format(elapsed) + " s, " + '{:>6.1f}'.format(elapsed * 1000000 / priceCount) +
+					" us per price, " + str(fired) + " alerts fired")
+
+		#every rule and state read back, as after another connection changed the database
+		price_alerts.invalidate(database)
+		elapsed = timeCall(lambda: database_manager.addTrends(batches[-1], database))
+		print("  reload and check:\t" + '{:>8.3f}'.format(elapsed) + " s")
+
+		database_manager.closeConnections()
+
+'''
+	runs many users buying, selling and viewing their portfolios at the same
+	time, with several users sharing each database, then checks every database
+	against its transaction history
+
+	@param userCount - number of simultaneous users, each on its own thread
+	@param databaseCount - number of databases the users are spread over
+	@param operationCount - number of buys, sells or views made by each user
+	@param useWriteQueue - whether writes go through the write queues, otherwise
+		each thread writes on its own connection and waits for the database lock
+
+	@return dictionary - counts of buys, sells, views, rejected operations and
+		locked errors, elapsed seconds, and the databases whose portfolio, cost
+		basis or lots don't match their transaction history
+'''
+def runConcurrentUsers(userCount, databaseCount, operationCount, useWriteQueue=True):
+	symbols = ['SYM' + str(i) for i in range(0, 20)]
+
+	#serves every quote from memory so only the database is exercised
+	fixture = quote_provider.FixtureProvider(dict.fromkeys(symbols, 12345))
+
+	counts = {'buy': 0, 'sell': 0, 'view': 0, 'rejected': 0, 'locked': 0}
+	countsLock = threading.Lock()
+
+	def count(name):
+		with countsLock:
+			counts[name] += 1
+
+	def user(database, seed):
+		generator = random.Random(seed)
+		today = date.today()
+
+		for i in range(0, operationCount):
+			action = generator.random()
+			symbol = generator.choice(symbols)
+
+			try:
+				if(action < 0.4):
+					database_manager.executeTrade(symbol, 'buy', generator.randint(1, 10), generator.randint(10000, 15000), today, database)
+					count('buy')
+				elif(action < 0.7):
+					database_manager.executeTrade(symbol, 'sell', generator.randint(1, 5), generator.randint(10000, 15000), today, database)
+					count('sell')
+				else:
+					stock_model.getPortfolioString(database)
+					count('view')
+			except sqlite3.OperationalError:
+				count('locked')
+			#selling more stock than is owned, or viewing an empty portfolio
+			except Exception:
+				count('rejected')
+
+		database_manager.closeConnections()
+
+	with tempfile.TemporaryDirectory() as directory:
+		databases = [os.path.join(directory, 'user' + str(i) + '.db') for i in range(0, databaseCount)]
+
+		for database in databases:
+			database_manager.createDatabase(database)
+
+		database_manager.USE_WRITE_QUEUE = useWriteQueue
+
+		threads = [threading.Thread(target=user, args=(databases[i % databaseCount], i)) for i in range(0, userCount)]
+
+		scraper = quote_provider.PROVIDER
+		quote_provider.PROVIDER = fixture
+
+		start = time.perf_counter()
+
+		try:
+			for thread in threads:
+				thread.start()
+
+			for thread in threads:
+				thread.join()
+		finally:
+			quote_provider.PROVIDER = scraper
+			database_manager.USE_WRITE_QUEUE = False
+			database_manager.stopWriters()
+
+		elapsed = time.perf_counter() - start
+
+		#every database must still agree with its own transaction history
+		inconsistent = []
+		for database in databases:
+			conn = database_manager.getConnection(database)
+
+			ledger = conn.execute('''SELECT symbol, SUM(CASE WHEN type="buy" THEN quantity ELSE -quantity END) AS owned
+									FROM transactions GROUP BY symbol HAVING owned > 0 ORDER BY symbol''').fetchall()
+			portfolio = conn.execute('SELECT * FROM portfolio ORDER BY symbol').fetchall()
+
+			if(ledger != portfolio or database_manager.checkCostBasis(database) or database_manager.checkLots(database)):
+				inconsistent.append(os.path.basename(database))
+
+		database_manager.closeConnections()
+
+	return dict(counts, seconds=elapsed, inconsistent=inconsistent)
+
+'''
+	stress tests many users buying, selling and viewing their portfolios at the
+	same time, with and without the write queues
+
+	@param userCount - number of simultaneous users, each on its own thread
+	@param databaseCount - number of databases the users are spread over
+	@param operationCount - number of buys, sells or views made by each user
+'''
+def benchmarkConcurrentUsers(userCount, databaseCount, operationCount):
+	operations = userCount * operationCount
+
+	print("Concurrent users, " + str(userCount) + " users on " + str(databaseCount) + " databases")
+
+	for name, useWriteQueue in (('write queue', True), ('connection per thread', False)):
+		report = runConcurrentUsers(userCount, databaseCount, operationCount, useWriteQueue)
+
+		print("  " + name)
+		print("    operations:\t" + '{:>8}'.format(operations) + " (" + str(report['buy']) + " buys, " + str(report['sell']) +
+				" sells, " + str(report['view']) + " views, " + str(report['rejected']) + " rejected)")
+		print("    throughput:\t" + '{:>8.0f}'.format(operations / report['seconds']) + " operations/s")
+		print("    locked errors:\t" + '{:>8}'.format(report['locked']))
+		print("    consistent:\t" + '{:>8}'.format(str(not report['inconsistent'])))
+
+'''
+	runs the benchmarks, an optional first argument sets the number of symbols
+	and any further arguments are saved quote pages to time parsing on, built
+	pages are used when none are given
+'''
+def main():
+	count = 200
+	if(len(sys.argv) > 1):
+		count = int(sys.argv[1])
+
+	pages = []
+	for path in sys.argv[2:]:
+		with open(path, 'rb') as pageFile:
+			pages.append((os.path.basename(path), pageFile.read()))
+
+	if(not pages):
+		pages = [('fields near the top', buildQuotePage(1500)), ('fields at the end', buildQuotePage(1500, True))]
+
+	server = startStubServer()
+
+	try:
+		benchmarkQuoteFetching(count)
+		print()
+		benchmarkHttpSession(count)
+		print()
+		benchmarkQuoteParsing(count, pages)
+		print()
+		benchmarkBuys(10000)
+		print()
+		benchmarkTrendStore(50, 2520)
+		print()
+		benchmarkPortfolioHistory(500, 10, 20000)
+		print()
+		benchmarkReportRendering(1000000)
+		print()
+		benchmarkAlerts(5000, 500, 60)
+		print()
+		benchmarkConcurrentUsers(32, 4, 200)
+	finally:
+		server.shutdown()
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,286 @@
+'''
+	Benchmark suite for the database and report hot paths. A synthetic user
+	database of a chosen size is generated, each benchmark is timed several
+	times, and the results can be saved as JSON and compared against the
+	results of an earlier run to catch regressions between commits. Quotes come
+	from a fixture provider, so no network is used
+
+	The suite can be run by typing "python benchmark_suite.py", options set the
+	size of the database, "--output results.json" saves the results and
+	"--compare results.json" shows the change from saved results
+
+	@author Johnathan McNutt
+'''
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import date, timedelta
+
+import database_manager
+import quote_cache
+import quote_provider
+import stock_model
+
+#a result this much slower than the compared result is flagged, 0.10 being 10%
+REGRESSION_THRESHOLD = 0.10
+
+'''
+	fills a new user database with random holdings, transaction history and
+	recorded prices, writing in bulk the way trade imports do
+
+	@param database - path of the database file to create
+	@param holdingCount - number of symbols held
+	@param ledgerCount - number of transactions in the history
+	@param trendCount - number of recorded prices for each symbol, one per weekday
+	@param seed - seed of the random generator, the same seed gives the same database
+
+	@return list - the symbols held
+'''
+def generateDatabase(database, holdingCount, ledgerCount, trendCount, seed=1):
+	generator = random.Random(seed)
+
+	symbols = ['SYM' + str(i) for i in range(0, holdingCount)]
+
+	#weekdays ending yesterday, one for each recorded price
+	marketDates = []
+	day = date.today()
+	while(len(marketDates) < max(trendCount, 1)):
+		day -= timedelta(days=1)
+		if(day.weekday() < 5):
+			marketDates.append(day.isoformat())
+	marketDates.reverse()
+
+	#every symbol is bought once, the rest of the history is random trades that never sell more than is held
+	held = dict.fromkeys(symbols, 0)
+	transactionList = []
+
+	for i in range(0, ledgerCount):
+		symbol = symbols[i] if i < holdingCount else generator.choice(symbols)
+		marketDate = marketDates[len(marketDates) * i // max(ledgerCount, 1)]
+		price = generator.randint(1000, 50000)
+
+		if(i >= holdingCount and held[symbol] > 1 and generator.random() < 0.4):
+			quantity = generator.randint(1, held[symbol] // 2)
+			held[symbol] -= quantity
+			transactionList.append((symbol, 'sell', quantity, price, marketDate))
+		else:
+			quantity = generator.randint(1, 100)
+			held[symbol] += quantity
+			transactionList.append((symbol, 'buy', quantity, price, marketDate))
+
+	database_manager.createDatabase(database)
+	database_manager.addTransactions(transactionList, database)
+	database_manager.rebuildPortfolio(database)
+	database_manager.rebuildCostBasis(database)
+	database_manager.rebuildLots(database)
+
+	if(trendCount > 0):
+		trendList = [(symbol, generator.randint(1000, 50000), marketDate) for symbol in symbols for marketDate in marketDates]
+		database_manager.addTrends(trendList, database)
+
+	return symbols
+
+'''
+	times a function several times
+
+	@param function - the function to time, called without arguments
+	@param repeats - number of times the function is called
+
+	@return dictionary - the median, fastest and slowest time in seconds
+'''
+def timeRepeated(function, repeats):
+	times = []
+
+	for i in range(0, repeats):
+		start = time.perf_counter()
+		function()
+		times.append(time.perf_counter() - start)
+
+	return {'median': statistics.median(times), 'min': min(times), 'max': max(times), 'repeats': repeats}
+
+'''
+	runs every benchmark against a generated database
+
+	@param holdingCount - number of symbols held
+	@param ledgerCount - number of transactions in the history
+	@param trendCount - number of recorded prices for each symbol
+	@param repeats - number of times each report is timed
+	@param tradeCount - number of trades and trend writes in the throughput benchmarks
+
+	@return dictionary - maps each benchmark to its timings
+'''
+def runSuite(holdingCount, ledgerCount, trendCount, repeats, tradeCount):
+	results = {}
+
+	with tempfile.TemporaryDirectory() as directory:
+		database = os.path.join(directory, 'bench.db')
+
+		symbols = []
+		def generate():
+			symbols.extend(generateDatabase(database, holdingCount, ledgerCount, trendCount))
+
+		results['generate_database'] = timeRepeated(generate, 1)
+
+		scraper = quote_provider.PROVIDER
+		quote_provider.PROVIDER = quote_provider.FixtureProvider(dict.fromkeys(symbols, 12345))
+
+		try:
+			#every view goes to the quote provider rather than the cache
+			def portfolioString():
+				quote_cache.clear()
+				stock_model.getPortfolioString(database)
+
+			results['portfolio_string'] = timeRepeated(portfolioString, repeats)
+
+			results['transaction_string'] = timeRepeated(lambda: stock_model.getTransactionString(database), repeats)
+
+			if(trendCount > 0):
+				results['symbol_trends_string'] = timeRepeated(lambda: stock_model.getSymbolTrendsString(symbols[0], database), repeats)
+
+			#a new day for every write so none are skipped as duplicates
+			firstDay = date(1990, 1, 1)
+			def addTrends():
+				for i in range(0, tradeCount):
+					database_manager.addTrend('NEWSYM', 12345, firstDay + timedelta(days=i), database)
+
+			results['add_trend'] = perOperation(timeRepeated(addTrends, 1), tradeCount)
+
+			#each symbol is bought then sold so holdings stay the same size
+			def trades():
+				for i in range(0, tradeCount):
+					symbol = symbols[i // 2 % len(symbols)]
+
+					if(i % 2 == 0):
+						stock_model.makeTrade(symbol, 'buy', 1, database)
+					else:
+						stock_model.makeTrade(symbol, 'sell', 1, database)
+
+			results['buy_sell'] = perOperation(timeRepeated(trades, 1), tradeCount)
+		finally:
+			quote_provider.PROVIDER = scraper
+			database_manager.closeConnections()
+
+	return results
+
+'''
+	adds per operation figures to the timing of a batch of operations
+
+	@param timing - timing of the whole batch
+	@param count - number of operations in the batch
+
+	@return dictionary - the timing with the operations per second and seconds per operation
+'''
+def perOperation(timing, count):
+	timing['operations'] = count
+	timing['per_second'] = count / timing['median']
+	timing['per_operation'] = timing['median'] / count
+
+	return timing
+
+'''
+	describes the code and machine the results were measured on
+
+	@return dictionary - commit, python and sqlite versions, platform and time
+'''
+def getEnvironment():
+	try:
+		commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+								cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+	except OSError:
+		commit = None
+
+	return {'commit': commit,
+			'python': platform.python_version(),
+			'sqlite': sqlite3.sqlite_version,
+			'platform': platform.platform(),
+			'time': time.strftime('%Y-%m-%d %H:%M:%S')}
+
+'''
+	prints the results, with the change from earlier results when given. The
+	fastest time of each benchmark is compared, it varies least between runs
+
+	@param results - maps each benchmark to its timings
+	@param previous - optional results of an earlier run
+	@param threshold - fraction a benchmark can slow down by before it is flagged
+
+	@return integer - number of benchmarks slower than the earlier run by more
+		than the threshold
+'''
+def printResults(results, previous=None, threshold=REGRESSION_THRESHOLD):
+	regressions = 0
+
+	for name, timing in results.items():
+		line = '  ' + '{:<22}'.format(name) + '{:>12.3f}'.format(timing['median'] * 1000) + ' ms'
+
+		if('per_second' in timing):
+			line += '{:>12.0f}'.format(timing['per_second']) + ' /s'
+
+		if(previous is not None and name in previous):
+			change = timing['min'] / previous[name]['min'] - 1
+			line += '  ' + '{:>+8.1%}'.format(change)
+
+			if(change > threshold and name != 'generate_database'):
+				line += '  slower'
+				regressions += 1
+
+		print(line)
+
+	return regressions
+
+'''
+	runs the suite from command line arguments
+
+	@param argv - the arguments after the program name
+
+	@return integer - exit status, 1 when a benchmark regressed against the compared results
+'''
+def main(argv):
+	parser = argparse.ArgumentParser(prog='benchmark_suite.py', description='Times the database and report hot paths')
+	parser.add_argument('--holdings', type=int, default=100, help='number of symbols held')
+	parser.add_argument('--ledger', type=int, default=100000, help='number of transactions in the history')
+	parser.add_argument('--trends', type=int, default=2520, help='number of recorded prices for each symbol')
+	parser.add_argument('--repeats', type=int, default=5, help='number of times each report is timed')
+	parser.add_argument('--trades', type=int, default=1000, help='number of trades and trend writes timed')
+	parser.add_argument('--output', metavar='FILE', help='save the results as JSON')
+	parser.add_argument('--compare', metavar='FILE', help='show the change from results saved with --output')
+	parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+						help='fraction a benchmark can slow down by before it is flagged')
+
+	arguments = parser.parse_args(argv)
+
+	if(arguments.holdings < 1):
+		parser.error("at least one holding is needed")
+
+	previous = None
+	if(arguments.compare is not None):
+		with open(arguments.compare) as compareFile:
+			previous = json.load(compareFile)['results']
+
+	scale = {'holdings': arguments.holdings, 'ledger': arguments.ledger, 'trends': arguments.trends}
+
+	print("Benchmark suite, " + str(arguments.holdings) + " holdings, " + str(arguments.ledger) +
+			" transactions, " + str(arguments.trends) + " prices per symbol")
+
+	results = runSuite(arguments.holdings, arguments.ledger, arguments.trends, arguments.repeats, arguments.trades)
+
+	regressions = printResults(results, previous, arguments.threshold)
+
+	if(arguments.output is not None):
+		with open(arguments.output, 'w') as outputFile:
+			json.dump({'environment': getEnvironment(), 'scale': scale, 'results': results}, outputFile, indent=2)
+
+	if(regressions):
+		return 1
+
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,505 @@
+'''
+	Module runs the program without prompts so it can be driven from scripts,
+	cron jobs and pipelines. Each subcommand does one thing and exits, and
+	--json prints machine readable results instead of the text tables. A batch
+	file of commands can be run in one process to avoid paying the start up
+	cost for every command
+
+	Commands are given after the program name, for example
+	"python stock_portfolio.py --user bob buy AAPL 10"
+
+	@author Johnathan McNutt
+'''
+import re
+import sys
+import json
+import shlex
+import argparse
+
+import database_manager
+import instrumentation
+import lot_tracker
+import portfolio_history
+import price_alerts
+import price_daemon
+import quote_cache
+import quote_provider
+import report_format
+import stock_model
+import trend_stats
+import user_control
+
+'''
+	builds the parser for the command line arguments
+
+	@return ArgumentParser - parser for the global options and subcommands
+'''
+def getParser():
+	parser = argparse.ArgumentParser(prog='stock_portfolio.py',
+									description='Stock portfolio simulation, runs the interactive menu when no command is given')
+
+	parser.add_argument('--user', help='name of the user whose database is used')
+	parser.add_argument('--json', action='store_true', help='print results as JSON instead of text')
+	parser.add_argument('--replay', metavar='FILE', help='serve quotes recorded with --record instead of fetching them')
+	parser.add_argument('--record', metavar='FILE', help='save every fetched quote to a file for replaying later')
+
+	commands = parser.add_subparsers(dest='command', metavar='command')
+
+	commands.add_parser('portfolio', help='show the portfolio and profit')
+
+	for side in ('buy', 'sell'):
+		trade = commands.add_parser(side, help=side + ' shares at the current price')
+		trade.add_argument('symbol', help='NASDAQ stock symbol')
+		trade.add_argument('quantity', type=int, help='number of shares')
+
+	log = commands.add_parser('log', help='show the transaction history')
+	log.add_argument('--symbol', help='only show transactions for this symbol')
+	log.add_argument('--type', choices=['buy', 'sell'], help='only show buys or sells')
+	log.add_argument('--start', help='first market date to show, YYYY-MM-DD')
+	log.add_argument('--end', help='last market date to show, YYYY-MM-DD')
+
+	profit = commands.add_parser('pnl', help='show realized and unrealized profit of every stock')
+	profit.add_argument('--method', choices=lot_tracker.METHODS, default=lot_tracker.DEFAULT_METHOD,
+						help='order shares are sold from their lots in, or average cost')
+
+	returns = commands.add_parser('returns', help='show time and money weighted returns over the history')
+	returns.add_argument('--start', help='first day to measure from, YYYY-MM-DD')
+	returns.add_argument('--end', help='last day to measure to, YYYY-MM-DD')
+
+	trends = commands.add_parser('trends', help='show the recorded prices of a symbol')
+	trends.add_argument('symbol', help='NASDAQ stock symbol')
+	trends.add_argument('--stats', action='store_true',
+						help='show the moving average, volatility and drawdown instead of every price')
+	trends.add_argument('--start', help='first market date of the statistics, YYYY-MM-DD')
+	trends.add_argument('--end', help='last market date of the statistics, YYYY-MM-DD')
+	trends.add_argument('--window', type=int, default=20, help='number of prices in the moving average')
+
+	alert = commands.add_parser('alert', help='add, list and remove price alerts on any symbol')
+	actions = alert.add_subparsers(dest='action', metavar='action', required=True)
+
+	add = actions.add_parser('add', help='alert when a symbol, held or not, meets a condition')
+	add.add_argument('symbol', help='NASDAQ stock symbol')
+	add.add_argument('kind', choices=price_alerts.KINDS, help='condition to alert on')
+	add.add_argument('value', help='price in dollars for above and below, percent for move, '
+									'days in the moving average for cross_above and cross_below')
+
+	remove = actions.add_parser('remove', help='remove an alert')
+	remove.add_argument('rule', type=int, help='number of the alert, shown by alert list')
+
+	listing = actions.add_parser('list', help='show the alerts')
+	listing.add_argument('--symbol', help='only show alerts on this symbol')
+
+	fired = actions.add_parser('fired', help='show the alerts that fired, newest first')
+	fired.add_argument('--limit', type=int, default=50, help='most alerts shown')
+
+	commands.add_parser('rebuild', help='recalculate the portfolio, cost basis and lots from the transaction history')
+
+	commands.add_parser('check', help='check the cost basis and lots against the transaction history')
+
+	commands.add_parser('stats', help='show call counts and timings so far, run with ' +
+						instrumentation.ENVIRONMENT_VARIABLE + '=1 set')
+
+	batch = commands.add_parser('batch', help='run every command in a file, one per line')
+	batch.add_argument('file', help="file of commands, '-' reads standard input")
+
+	daemon = commands.add_parser('daemon', help='poll the prices of held stocks until stopped')
+	daemon.add_argument('--interval', type=int, default=price_daemon.POLL_INTERVAL, help='seconds between polls')
+
+	return parser
+
+'''
+	gathers the portfolio
+
+	@param arguments - parsed command arguments
+	@param database - path of the user database
+
+	@return dictionary or string - portfolio data, or the portfolio text in text mode
+'''
+def commandPortfolio(arguments, database):
+	if(arguments.json):
+		return stock_model.getPortfolioData(database)
+
+	return stock_model.getPortfolioString(database)
+
+'''
+	buys or sells shares at the current price
+
+	@param arguments - parsed command arguments
+	@param database - path of the user database
+
+	@return dictionary or string - the recorded trade
+'''
+def commandTrade(arguments, database):
+	trade = stock_model.makeTrade(arguments.symbol, arguments.command, arguments.quantity, database)
+
+	if(arguments.json):
+		return trade
+
+	if(trade['type'] == 'buy'):
+		action = "Bought "
+	else:
+		action = "Sold "
+
+	return (action + str(trade['quantity']) + " " + trade['symbol'] + " at " +
+			stock_model.getDollarsString(trade['market_price']) + " per share\n")
+
+'''
+	gathers the transaction history
+
+	@param arguments - parsed command arguments
+	@param database - path of the user database
+
+	@return list or generator - transactions as dictionaries, or pieces of the
+		log text in text mode
+'''
+def commandLog(arguments, database):
+	if(not arguments.json):
+		return stock_model.iterTransactionString(arguments.symbol, arguments.type, arguments.start, arguments.end, database)
+
+	transactions = []
+
+	for page in database_manager.iterTransactions(arguments.symbol, arguments.type, arguments.start, arguments.end, database=database):
+		for symbol, type, quantity, price, marketDate in page:
+			transactions.append({'symbol': symbol, 'type': type, 'quantity': quantity,
+								'market_price': price, 'market_date': marketDate})
+
+	return transactions
+
+'''
+	gathers the realized and unrealized profit of every stock
+
+	@param arguments - parsed command arguments
+	@param database - path of the user database
+
+	@return dictionary or string - profit of each stock
+'''
+def commandProfit(arguments, database):
+	if(arguments.json):
+		return stock_model.getProfitAndLoss(arguments.method, database)
+
+	return stock_model.getProfitAndLossString(arguments.method, database)
+
+'''
+	measures the portfolios returns
+
+	@param arguments - parsed command arguments
+	@param database - path of the user database
+
+	@return dictionary or string - the values at the start and end and the returns
+'''
+def commandReturns(arguments, database):
+	returns = portfolio_history.getReturns(arguments.start, arguments.end, database)
+
+	if(arguments.json):
+		return returns
+
+	timeWeighted = '{:.2%}'.format(returns['time_weighted'])
+	if(returns['time_weighted_annual'] is not None):
+		timeWeighted += ", " + '{:.2%}'.format(returns['time_weighted_annual']) + " a year"
+
+	moneyWeighted = "not found"
+	if(returns['money_weighted'] is not None):
+		moneyWeighted = '{:.2%}'.format(returns['money_weighted']) + " a year"
+
+	return ("Returns from " + returns['start_date'] + " to " + returns['end_date'] + "\n" +
+			"  Starting value:\t" + '{:>20}'.format(stock_model.getDollarsString(returns['start_value'])) + "\n" +
+			"  Ending value:\t\t" + '{:>20}'.format(stock_model.getDollarsString(returns['end_value'])) + "\n" +
+			"  Time weighted:\t" + timeWeighted + "\n" +
+			"  Money weighted:\t" + moneyWeighted + "\n")
+
+'''
+	gathers the recorded prices of a symbol
+
+	@param arguments - parsed command arguments
+	@param database - path of the user database
+
+	@return dictionary, generator or string - trends and their high, low and average
+		price, or with --stats statistics over a range of dates, or the text of either
+		in text mode
+'''
+def commandTrends(arguments, database):
+	if(arguments.stats):
+		if(arguments.json):
+			statistics = trend_stats.getStatistics(arguments.symbol, arguments.start, arguments.end, arguments.window, database)
+			statistics['symbol'] = arguments.symbol.upper()
+
+			return statistics
+
+		return stock_model.getSymbolStatisticsString(arguments.symbol, arguments.start, arguments.end, arguments.window, database)
+
+	if(arguments.start is not None or arguments.end is not None):
+		raise ValueError("--start and --end are only used with --stats")
+
+	if(not arguments.json):
+		return stock_model.iterSymbolTrendsString(arguments.symbol, database)
+
+	trendsList = database_manager.getSymbolTrends(arguments.symbol, database)
+
+	summary = trend_stats.getSummary(arguments.symbol, database=database)
+
+	summary['symbol'] = arguments.symbol.upper()
+	summary['trends'] = [{'market_price': price, 'market_date': marketDate} for symbol, price, marketDate in trendsList]
+
+	return summary
+
+'''
+	adds, removes or shows price alerts
+
+	@param arguments - parsed command arguments
+	@param database - path of the user database
+
+	@return dictionary, list or string - the added or removed rule, the rules, or
+		the fired alerts
+'''
+def commandAlert(arguments, database):
+	if(arguments.action == 'add'):
+		value = stock_model.getAlertValue(arguments.kind, arguments.value)
+		rule = database_manager.addAlertRule(arguments.symbol, arguments.kind, value, database)
+
+		if(arguments.json):
+			return {'rule': rule, 'symbol': arguments.symbol.upper(), 'kind': arguments.kind, 'value': value}
+
+		return ("Added alert " + str(rule) + ": " + arguments.symbol.upper() + " " +
+				stock_model.getAlertRuleString(arguments.kind, value) + "\n")
+
+	if(arguments.action == 'remove'):
+		database_manager.removeAlertRule(arguments.rule, database)
+
+		if(arguments.json):
+			return {'rule': arguments.rule, 'removed': True}
+
+		return "Removed alert " + str(arguments.rule) + "\n"
+
+	if(arguments.action == 'list'):
+		if(not arguments.json):
+			return stock_model.getAlertRulesString(arguments.symbol, database)
+
+		return [{'rule': rule, 'symbol': symbol, 'kind': kind, 'value': value, 'active': active}
+				for rule, symbol, kind, value, active in database_manager.getAlertRules(arguments.symbol, database)]
+
+	if(not arguments.json):
+		return stock_model.getAlertEventsString(arguments.limit, database)
+
+	return [{'rule': rule, 'symbol': symbol, 'kind': kind, 'value': value, 'market_price': price,
+			'market_date': marketDate, 'triggered_at': triggeredAt}
+			for rule, symbol, kind, value, price, marketDate, triggeredAt in database_manager.getAlertEvents(arguments.limit, database)]
+
+'''
+	recalculates the tables kept from the transaction history, for databases
+	changed outside the program or that fail check
+
+	@param arguments - parsed command arguments
+	@param database - path of the user database
+
+	@return dictionary or string - the rebuilt tables
+'''
+def commandRebuild(arguments, database):
+	database_manager.rebuildPortfolio(database)
+	database_manager.rebuildCostBasis(database)
+	database_manager.rebuildLots(database)
+
+	tables = ['portfolio', 'cost_basis', 'lots']
+
+	if(arguments.json):
+		return {'rebuilt': tables}
+
+	return "Rebuilt " + ', '.join(tables) + " from the transaction history\n"
+
+'''
+	checks the cost basis and lots against the transaction history, failing
+	when any symbol doesn't match so scripts can act on the exit status
+
+	@param arguments - parsed command arguments
+	@param database - path of the user database
+
+	@return dictionary or string - the result of the check
+'''
+def commandCheck(arguments, database):
+	costBasis = database_manager.checkCostBasis(database)
+	lots = database_manager.checkLots(database)
+
+	if(costBasis or lots):
+		problems = []
+
+		if(costBasis):
+			problems.append("cost basis differs for " + ', '.join(costBasis))
+
+		if(lots):
+			problems.append("lots differ for " + ', '.join(lots))
+
+		raise ValueError('; '.join(problems) + ", run rebuild to fix")
+
+	if(arguments.json):
+		return {'cost_basis': costBasis, 'lots': lots}
+
+	return "Cost basis and lots match the transaction history\n"
+
+'''
+	gathers the call counts and timings recorded so far in this process, most
+	useful at the end of a batch file
+
+	@param arguments - parsed command arguments
+	@param database - path of the user database
+
+	@return dictionary or string - timings, counters and quote cache usage
+'''
+def commandStats(arguments, database):
+	summary = instrumentation.getSummary()
+	cache = quote_cache.getStats()
+
+	if(arguments.json):
+		summary['quote_cache'] = cache
+		return summary
+
+	return (instrumentation.getSummaryString() + "\nQuote cache: " + str(cache['hits']) + " hits, " +
+			str(cache['misses']) + " misses, " + str(cache['evictions']) + " evictions\n")
+
+#maps each subcommand that works on a user database to its function
+COMMANDS = {'portfolio': commandPortfolio,
+			'buy': commandTrade,
+			'sell': commandTrade,
+			'log': commandLog,
+			'pnl': commandProfit,
+			'returns': commandReturns,
+			'trends': commandTrends,
+			'alert': commandAlert,
+			'rebuild': commandRebuild,
+			'check': commandCheck,
+			'stats': commandStats}
+
+'''
+	prints the result of a command
+
+	@param result - JSON ready value in JSON mode, otherwise a string or
+		iterable of strings
+	@param asJson - whether to print the result as a line of JSON
+'''
+def printResult(result, asJson):
+	if(asJson):
+		sys.stdout.write(json.dumps(result) + '\n')
+	else:
+		#log pages are printed as soon as they are read
+		report_format.writeReport(result, sys.stdout)
+
+'''
+	reports a failed command, as a line of JSON in JSON mode so every command
+	in a batch still produces exactly one line
+
+	@param command - the command that failed
+	@param error - the exception raised
+	@param asJson - whether to print the error as a line of JSON
+'''
+def printError(command, error, asJson):
+	if(asJson):
+		sys.stdout.write(json.dumps({'command': command, 'error': str(error)}) + '\n')
+	else:
+		sys.stderr.write(command + ": " + str(error) + '\n')
+
+'''
+	runs a single database command
+
+	@param arguments - parsed command arguments
+	@param database - path of the user database
+
+	@return boolean - whether the command succeeded
+'''
+def runCommand(arguments, database):
+	try:
+		printResult(COMMANDS[arguments.command](arguments, database), arguments.json)
+	except Exception as error:
+		printError(arguments.command, error, arguments.json)
+		return False
+
+	return True
+
+'''
+	runs every command in a batch file in this process. Lines are parsed like
+	the command line, blank lines and lines starting with # are skipped, and a
+	failed command doesn't stop the ones after it
+
+	@param parser - the command line parser
+	@param arguments - parsed arguments of the batch command
+	@param database - path of the user database
+
+	@return integer - number of commands that failed
+'''
+def runBatch(parser, arguments, database):
+	if(arguments.file == '-'):
+		batchFile = sys.stdin
+	else:
+		batchFile = open(arguments.file)
+
+	failures = 0
+
+	with batchFile:
+		for line in batchFile:
+			words = shlex.split(line, comments=True)
+
+			if(not words):
+				continue
+
+			try:
+				lineArguments = parser.parse_args(words)
+			except SystemExit:
+				#argparse has already printed the usage problem to standard error
+				if(arguments.json):
+					printError(line.strip(), "invalid command", True)
+
+				failures += 1
+				continue
+
+			if(lineArguments.command not in COMMANDS):
+				printError(words[0], "not allowed in a batch file", arguments.json)
+				failures += 1
+				continue
+
+			#options on the batch command apply to every line
+			lineArguments.json = lineArguments.json or arguments.json
+
+			if(not runCommand(lineArguments, database)):
+				failures += 1
+
+	return failures
+
+'''
+	runs the program from command line arguments
+
+	@param argv - the arguments after the program name
+
+	@return integer - exit status, 0 when every command succeeded
+'''
+def main(argv):
+	parser = getParser()
+	arguments = parser.parse_args(argv)
+
+	if(arguments.replay is not None):
+		quote_provider.PROVIDER = quote_provider.ReplayProvider(arguments.replay)
+
+	#records whichever provider is in use, so a replay can be recorded again
+	if(arguments.record is not None):
+		quote_provider.PROVIDER = quote_provider.RecordingProvider(quote_provider.getProvider(), arguments.record)
+
+	if(arguments.command is None):
+		user_control.stock_program()
+		return 0
+
+	if(arguments.command == 'daemon'):
+		price_daemon.run(arguments.interval)
+		return 0
+
+	if(arguments.user is None or not re.fullmatch('[a-zA-Z]+', arguments.user)):
+		parser.error("--user is required and may only contain letters")
+
+	database = user_control.openDatabase(arguments.user)
+
+	if(arguments.command == 'batch'):
+		failures = runBatch(parser, arguments, database)
+	elif(not runCommand(arguments, database)):
+		failures = 1
+	else:
+		failures = 0
+
+	if(failures):
+		return 1
+
+	return 0
@@ -3,17 +3,343 @@
 	
 	@author Johnathan McNutt
 '''
+import os
+import queue
+import shutil
 import sqlite3
-from datetime import date
+import inspect
+import functools
+import threading
+from concurrent.futures import Future
+
+import instrumentation
+import lot_tracker
+import market_calendar
+import price_alerts
+import trend_store
 
 #database is set here for use in all internal functions
 DATABASE = "null.db"
 
+#number of rows read per page when streaming the transaction log
+TRANSACTION_PAGE_SIZE = 1000
+
+#when True recorded prices are kept in a columnar trend store instead of the trends
+#table. Each database has its own store, a directory next to the database file. The
+#first time a database is used with this set its prices are moved into the store,
+#and the trend_location table records that the store holds them from then on
+USE_TREND_STORE = False
+
+#ending that replaces the database files extension to name its trend store directory
+TREND_STORE_SUFFIX = '.trends'
+
+#PRAGMA settings applied to every new connection, write ahead logging lets reads
+#carry on while another session is writing
+PRAGMAS = {'journal_mode': 'WAL'}
+
+#when True all writes to a database are made one at a time by a writer thread
+#for that database, reads still run on the calling threads. Meant for programs
+#that write to the same database from many threads at once, such as a server for
+#several users. The menu, command line and price daemon write from a single thread
+#and leave it off, their processes take turns through the database lock instead
+USE_WRITE_QUEUE = False
+
+#seconds a connection waits for another sessions write to finish before raising
+#"database is locked"
+BUSY_TIMEOUT = 5.0
+
+#per symbol cost basis totals calculated from the whole transaction history, used to
+#fill and check the cost_basis table
+LEDGER_COST_BASIS = '''SELECT symbol,
+						SUM(CASE WHEN type="buy" THEN quantity ELSE 0 END),
+						SUM(CASE WHEN type="buy" THEN quantity * market_price ELSE 0 END),
+						SUM(CASE WHEN type="sell" THEN quantity ELSE 0 END),
+						SUM(CASE WHEN type="sell" THEN quantity * market_price ELSE 0 END)
+					FROM transactions
+					GROUP BY symbol'''
+
+#quantity of each symbol still held according to the whole transaction history, used
+#to fill the portfolio table
+LEDGER_PORTFOLIO = '''SELECT symbol, SUM(CASE WHEN type="buy" THEN quantity ELSE -quantity END) AS owned
+					FROM transactions
+					GROUP BY symbol
+					HAVING owned > 0'''
+
+#lines of an import holding trades the ledger already has. Identical trades of the
+#import are numbered in order, the copies up to the number in the ledger are duplicates.
+#Only trades the ledger has are numbered, so an import of new trades costs little
+IMPORT_DUPLICATES = '''SELECT line FROM (
+						SELECT imported.line, held.copies,
+							ROW_NUMBER() OVER (PARTITION BY symbol, type, quantity, market_price, market_date
+												ORDER BY imported.line) AS copy
+						FROM temp.imported JOIN (
+							SELECT symbol, type, quantity, market_price, market_date, COUNT(*) AS copies
+							FROM transactions
+							GROUP BY symbol, type, quantity, market_price, market_date) AS held
+						USING (symbol, type, quantity, market_price, market_date))
+					WHERE copy <= copies'''
+
+#schema changes applied to user databases in order. The database's PRAGMA user_version
+#records how many have been applied, new migrations must only be added to the end.
+#Steps are SQL statements, or functions given the cursor for work SQL can't do
+MIGRATIONS = [
+	#1 - indexes for trend and transaction lookups, duplicate trend days are removed
+	#first so the unique index can be created on older databases
+	['''DELETE FROM trends WHERE rowid NOT IN
+		(SELECT MIN(rowid) FROM trends GROUP BY symbol, market_date)''',
+	'CREATE UNIQUE INDEX IF NOT EXISTS trends_symbol_date ON trends (symbol, market_date)',
+	'CREATE INDEX IF NOT EXISTS transactions_symbol_type ON transactions (symbol, type)',
+	'CREATE INDEX IF NOT EXISTS transactions_date ON transactions (market_date)'],
+	
+	#2 - running cost basis totals per symbol, kept up to date by every trade
+	['''CREATE TABLE cost_basis (
+		symbol TEXT PRIMARY KEY,
+		shares_bought INTEGER NOT NULL DEFAULT 0,
+		total_cost INTEGER NOT NULL DEFAULT 0,
+		shares_sold INTEGER NOT NULL DEFAULT 0,
+		total_proceeds INTEGER NOT NULL DEFAULT 0
+		)''',
+	'INSERT INTO cost_basis ' + LEDGER_COST_BASIS],
+	
+	#3 - latest polled price of each symbol, written by the price daemon
+	['''CREATE TABLE quotes (
+		symbol TEXT PRIMARY KEY,
+		market_price INTEGER,
+		fetched_at REAL
+		)'''],
+	
+	#4 - open tax lots and realized profit for each accounting method, kept up to
+	#date by every trade and filled from the transaction history
+	['''CREATE TABLE lots (
+		lot INTEGER PRIMARY KEY,
+		method TEXT NOT NULL,
+		symbol TEXT NOT NULL,
+		quantity INTEGER NOT NULL,
+		market_price INTEGER NOT NULL,
+		market_date TEXT
+		)''',
+	'CREATE INDEX lots_method_symbol ON lots (method, symbol, lot)',
+	'''CREATE TABLE lot_totals (
+		method TEXT NOT NULL,
+		symbol TEXT NOT NULL,
+		quantity INTEGER NOT NULL DEFAULT 0,
+		cost INTEGER NOT NULL DEFAULT 0,
+		realized INTEGER NOT NULL DEFAULT 0,
+		PRIMARY KEY (method, symbol)
+		)''',
+	lambda curs: fillLots(curs)],
+	
+	#5 - price alert rules, the rolling state of each watched symbol and the alerts fired
+	['''CREATE TABLE alert_rules (
+		rule INTEGER PRIMARY KEY AUTOINCREMENT,
+		symbol TEXT NOT NULL,
+		kind TEXT NOT NULL,
+		value INTEGER NOT NULL,
+		active INTEGER
+		)''',
+	'CREATE INDEX alert_rules_symbol ON alert_rules (symbol)',
+	'''CREATE TABLE alert_state (
+		symbol TEXT PRIMARY KEY,
+		market_date TEXT,
+		market_price INTEGER,
+		reference INTEGER
+		)''',
+	'''CREATE TABLE alert_averages (
+		symbol TEXT NOT NULL,
+		days INTEGER NOT NULL,
+		closes TEXT NOT NULL,
+		PRIMARY KEY (symbol, days)
+		)''',
+	'''CREATE TABLE alert_events (
+		event INTEGER PRIMARY KEY,
+		rule INTEGER,
+		symbol TEXT,
+		kind TEXT,
+		value INTEGER,
+		market_price INTEGER,
+		market_date TEXT,
+		triggered_at REAL
+		)'''],
+	
+	#6 - count of changes to the alert rules and states, so the copy the alert engine
+	#keeps in memory is only read again when another connection has changed them
+	['CREATE TABLE alert_changes (changes INTEGER NOT NULL)',
+	'INSERT INTO alert_changes VALUES (0)'] +
+	['CREATE TRIGGER ' + table + '_' + action.lower() + ' AFTER ' + action + ' ON ' + table +
+		' BEGIN UPDATE alert_changes SET changes = changes + 1; END'
+		for table in ('alert_rules', 'alert_state', 'alert_averages') for action in ('INSERT', 'UPDATE', 'DELETE')],
+	
+	#7 - where the recorded prices are kept, 'table' for the trends table or 'store'
+	#once they have been moved into the trend store, filled from whether a store exists
+	['CREATE TABLE trend_location (location TEXT NOT NULL)',
+	lambda curs: fillTrendLocation(curs)],
+]
+
+#open connections are kept per thread since sqlite connections can't be shared between threads
+_local = threading.local()
+
+'''
+	retrieves the calling threads connection to a database, opening it the first
+	time it's needed. Connections stay open and are reused by later calls
+	
+	@param database - path of the database file, defaults to the current DATABASE
+	
+	@return Connection - the open database connection
+'''
+def getConnection(database=None):
+	if(database is None):
+		database = DATABASE
+	
+	connections = getattr(_local, 'connections', None)
+	
+	if(connections is None):
+		connections = {}
+		_local.connections = connections
+	
+	conn = connections.get(database)
+	
+	if(conn is None):
+		conn = openConnection(database)
+		connections[database] = conn
+	
+	return conn
+
+'''
+	opens a new connection to a database and applies the PRAGMA settings
+	
+	@param database - path of the database file
+	
+	@return Connection - the new connection
+'''
+@instrumentation.timed
+def openConnection(database):
+	conn = sqlite3.connect(database, timeout=BUSY_TIMEOUT)
+	
+	for name, value in PRAGMAS.items():
+		conn.execute('PRAGMA ' + name + ' = ' + str(value))
+	
+	#counts every statement run, including those inside migrations and rebuilds
+	if(instrumentation.ENABLED):
+		conn.set_trace_callback(lambda statement: instrumentation.count('sqlite statements'))
+	
+	return conn
+
+'''
+	closes all of the calling threads open database connections
+'''
+def closeConnections():
+	connections = getattr(_local, 'connections', {})
+	
+	for conn in connections.values():
+		conn.close()
+	
+	connections.clear()
+
+#maps each database to its write queue and writer thread
+_writers = {}
+_writersLock = threading.Lock()
+
+'''
+	retrieves the write queue of a database, starting its writer thread the
+	first time it's needed
+	
+	@param database - path of the database file
+	
+	@return Queue - queue of (function, args, kwargs, future) writes
+'''
+def getWriteQueue(database):
+	with _writersLock:
+		if(database not in _writers):
+			writeQueue = queue.Queue()
+			
+			writer = threading.Thread(target=runWriter, args=(writeQueue,), daemon=True)
+			writer.start()
+			
+			_writers[database] = (writeQueue, writer)
+		
+		return _writers[database][0]
+
+'''
+	makes the writes sent to a write queue one at a time until the queue
+	is stopped, runs on a databases writer thread
+	
+	@param writeQueue - the queue to take writes from
+'''
+def runWriter(writeQueue):
+	#writes made by the writer itself are not queued again
+	_local.writer = True
+	
+	while(True):
+		write = writeQueue.get()
+		
+		#None is sent by stopWriters
+		if(write is None):
+			break
+		
+		function, args, kwargs, future = write
+		
+		try:
+			future.set_result(function(*args, **kwargs))
+		except BaseException as error:
+			future.set_exception(error)
+	
+	closeConnections()
+
+'''
+	stops every writer thread once the writes already queued are made
+'''
+def stopWriters():
+	with _writersLock:
+		writers = list(_writers.values())
+		_writers.clear()
+	
+	for writeQueue, writer in writers:
+		writeQueue.put(None)
+	
+	#waits for the queued writes to finish
+	for writeQueue, writer in writers:
+		writer.join()
+
+'''
+	marks a function as a write. When USE_WRITE_QUEUE is set the function is
+	run by the writer thread of its database and the caller waits for the result,
+	any error raised by the write is raised to the caller
+	
+	@param function - function taking a database keyword argument
+	
+	@return function - the function sending itself through the write queue
+'''
+def writeOperation(function):
+	signature = inspect.signature(function)
+	
+	@functools.wraps(function)
+	def queuedWrite(*args, **kwargs):
+		if(not USE_WRITE_QUEUE or getattr(_local, 'writer', False)):
+			return function(*args, **kwargs)
+		
+		arguments = signature.bind(*args, **kwargs)
+		
+		#the default database is looked up on the calling thread
+		if(arguments.arguments.get('database') is None):
+			arguments.arguments['database'] = DATABASE
+		
+		future = Future()
+		
+		getWriteQueue(arguments.arguments['database']).put((function, arguments.args, arguments.kwargs, future))
+		
+		return future.result()
+	
+	return queuedWrite
+
 '''
 	Creates the database tables for a new user account
+	
+	@param database - path of the user database, defaults to DATABASE
 '''
-def createDatabase():
-	conn = sqlite3.connect(DATABASE)
+@instrumentation.timed
+@writeOperation
+def createDatabase(database=None):
+	conn = getConnection(database)
 	
 	curs = conn.cursor()
 	
@@ -39,7 +365,49 @@ def createDatabase():
 					)''')
 					
 	conn.commit()
-	conn.close()
+	
+	migrateDatabase(database)
+
+'''
+	upgrades the current database to the latest schema version by applying any
+	migrations it hasn't had yet. Safe to call on every login
+	
+	@param database - path of the user database, defaults to DATABASE
+	
+	@return integer - the schema version of the database
+'''
+@instrumentation.timed
+@writeOperation
+def migrateDatabase(database=None):
+	conn = getConnection(database)
+	
+	curs = conn.cursor()
+	
+	curs.execute('PRAGMA user_version')
+	
+	#nothing to do for databases that are already up to date
+	if(curs.fetchone()[0] >= len(MIGRATIONS)):
+		return len(MIGRATIONS)
+	
+	with conn:
+		#locks the database so two sessions can't apply the same migration
+		curs.execute('BEGIN IMMEDIATE')
+		
+		curs.execute('PRAGMA user_version')
+		version = curs.fetchone()[0]
+		
+		while(version < len(MIGRATIONS)):
+			for statement in MIGRATIONS[version]:
+				if(callable(statement)):
+					statement(curs)
+				else:
+					curs.execute(statement)
+				
+			version += 1
+			
+			curs.execute('PRAGMA user_version = ' + str(version))
+	
+	return version
 
 '''
 	added stocks to the users portfolio. If the user already has stock of that
@@ -47,12 +415,15 @@ def createDatabase():
 	
 	@param symbol - the stocks NASDAQ symbol
 	@param quantity_purchased - the amount of stock bought
+	@param database - path of the user database, defaults to DATABASE
 '''
-def addStockToPortfolio(symbol, quantity_purchased):
+@instrumentation.timed
+@writeOperation
+def addStockToPortfolio(symbol, quantity_purchased, database=None):
 	#makes sure symbol conforms to database storing standard
 	symbol = symbol.upper()
 
-	conn = sqlite3.connect(DATABASE)
+	conn = getConnection(database)
 	
 	curs = conn.cursor()
 	
@@ -76,20 +447,21 @@ def addStockToPortfolio(symbol, quantity_purchased):
 						VALUES (?,?)''', (symbol, quantity_purchased))
 						
 	conn.commit()
-	conn.close()
 
 '''
 	retrieves the quantity of stock owned for a specific stock symbol
 	
 	@param symbol - the NASDAQ stock symbol
+	@param database - path of the user database, defaults to DATABASE
 	
 	@return integer - quantity of stock owned
 '''
-def getAmountOwned(symbol):
+@instrumentation.timed
+def getAmountOwned(symbol, database=None):
 	#makes sure symbol conforms to database storing standard
 	symbol = symbol.upper()
 
-	conn = sqlite3.connect(DATABASE)
+	conn = getConnection(database)
 	
 	curs = conn.cursor()
 	
@@ -98,8 +470,6 @@ def getAmountOwned(symbol):
 	
 	quantity = curs.fetchone()
 	
-	conn.close()
-	
 	if(not quantity):
 		raise IndexError("no stock owned")
 	
@@ -111,10 +481,13 @@ def getAmountOwned(symbol):
 '''
 	retrieves the full portfolio for the current user
 	
+	@param database - path of the user database, defaults to DATABASE
+	
 	@return list - all the entires in the portfolio table
 '''
-def getFullPortfolio():
-	conn = sqlite3.connect(DATABASE)
+@instrumentation.timed
+def getFullPortfolio(database=None):
+	conn = getConnection(database)
 	
 	curs = conn.cursor()
 	
@@ -122,8 +495,6 @@ def getFullPortfolio():
 	
 	portfolioList = curs.fetchall()
 	
-	conn.close()
-	
 	#checks if list is empty
 	if(not portfolioList):
 		raise IndexError("portfolio is empty")
@@ -136,12 +507,15 @@ def getFullPortfolio():
 	
 	@param symbol - the stocks NASDAQ symbol
 	@param quantity_sold - the amount of stock sold
+	@param database - path of the user database, defaults to DATABASE
 '''
-def removeStockFromPortfolio(symbol, quantity_sold):
+@instrumentation.timed
+@writeOperation
+def removeStockFromPortfolio(symbol, quantity_sold, database=None):
 	#makes sure symbol conforms to database storing standard
 	symbol = symbol.upper()
 
-	conn = sqlite3.connect(DATABASE)
+	conn = getConnection(database)
 	
 	curs = conn.cursor()
 	
@@ -175,7 +549,103 @@ def removeStockFromPortfolio(symbol, quantity_sold):
 		raise IndexError('Stock not owned')
 		
 	conn.commit()
-	conn.close()
+'''
+	records a complete trade in a single transaction. The portfolio quantity is
+	updated, the trade is added to the transactions table and the days trend
+	price is recorded, then everything is committed together. If any step fails
+	nothing is written
+	
+	The ledger keeps the date the trade was made, but the trend price is recorded
+	under the trading date the price belongs to, so a trade on a weekend records
+	the price of the last trading day. Trades dated before that keep their own date
+	
+	@param symbol - the stocks NASDAQ symbol
+	@param side - either 'buy' or 'sell'
+	@param quantity - amount of stock bought or sold
+	@param market_price - NASDAQ market price at time of transaction
+	@param market_date - the date the transaction was made
+	@param database - path of the user database, defaults to DATABASE
+'''
+@instrumentation.timed
+@writeOperation
+def executeTrade(symbol, side, quantity, market_price, market_date, database=None):
+	#makes sure symbol conforms to database storing standard
+	symbol = symbol.upper()
+	
+	if(side != 'buy' and side != 'sell'):
+		raise ValueError("trade side must be 'buy' or 'sell'")
+	
+	if(USE_TREND_STORE):
+		#the first use moves the recorded prices into the trend store
+		getTrendStore(database)
+	
+	conn = getConnection(database)
+	
+	#commits once at the end of the block, or rolls back if an error is raised
+	with conn:
+		curs = conn.cursor()
+		
+		#takes the write lock before reading so the quantity can't change underneath the trade
+		curs.execute('BEGIN IMMEDIATE')
+		
+		curs.execute('''SELECT quantity_owned FROM portfolio 
+						WHERE symbol=?''', (symbol,))
+						
+		check = curs.fetchone()
+		
+		if(side == 'buy'):
+			if(check):
+				#updates the table adding the quantities together
+				curs.execute('''UPDATE portfolio
+								SET quantity_owned = quantity_owned + ?
+								WHERE symbol = ?''', (quantity, symbol))
+			else:
+				#creates a new entry for the symbol
+				curs.execute('''INSERT INTO portfolio
+								VALUES (?,?)''', (symbol, quantity))
+		else:
+			if(not check):
+				raise IndexError('Stock not owned')
+			
+			quantity_owned = check[0]
+			
+			if(quantity_owned > quantity):
+				#updates the table subtracting the sold stocks
+				curs.execute('''UPDATE portfolio
+								SET quantity_owned = quantity_owned - ?
+								WHERE symbol = ?''', (quantity, symbol))
+			elif(quantity_owned == quantity):
+				#deletes the stock from the portfolio
+				curs.execute('''DELETE FROM portfolio
+								WHERE symbol=?''', (symbol,))
+			else:
+				raise Exception('cannot sell more stock than you own')
+		
+		curs.execute('''INSERT INTO transactions
+						VALUES (?,?,?,?,?)''', (symbol, side, quantity, market_price, market_date))
+		
+		updateCostBasis(curs, symbol, side, quantity, market_price)
+		
+		lot_tracker.updateLots(curs, symbol, side, quantity, market_price, market_date)
+		
+		trendDate = market_calendar.getTradingDate().isoformat()
+		if(str(market_date)[:10] < trendDate):
+			trendDate = str(market_date)[:10]
+		
+		storeTrends = isTrendStoreUsed(conn)
+		
+		#records the days trend price unless one was already taken
+		if(not storeTrends):
+			curs.execute('''INSERT INTO trends
+							VALUES (?,?,?)
+							ON CONFLICT (symbol, market_date) DO NOTHING''', (symbol, market_price, trendDate))
+		
+		checkAlerts(conn, [(symbol, market_price, trendDate)], database)
+	
+	#the trend store isn't part of the database transaction so is written once the trade is committed
+	if(storeTrends):
+		trend_store.append(getTrendStorePath(database), symbol, market_price, trendDate)
+	
 '''
 	adds a new stock transaction to the transaction table
 	
@@ -184,28 +654,377 @@ def removeStockFromPortfolio(symbol, quantity_sold):
 	@param quantity - amount of stock bought or sold
 	@param market_price - NASDAQ market price at time of transaction
 	@param market_date - the date the transaction was made
+	@param database - path of the user database, defaults to DATABASE
 '''
-def addTransaction(symbol, type, quantity, market_price, market_date):
+@instrumentation.timed
+@writeOperation
+def addTransaction(symbol, type, quantity, market_price, market_date, database=None):
 	#makes sure symbol conforms to database storing standard
 	symbol = symbol.upper()
 
-	conn = sqlite3.connect(DATABASE)
+	conn = getConnection(database)
 	
 	curs = conn.cursor()
 	
 	curs.execute('''INSERT INTO transactions
 					VALUES (?,?,?,?,?)''', (symbol, type, quantity, market_price, market_date))
 	
+	updateCostBasis(curs, symbol, type, quantity, market_price)
+	
+	lot_tracker.updateLots(curs, symbol, type, quantity, market_price, market_date)
+	
 	conn.commit()
-	conn.close()
+	
+'''
+	adds a transaction to the running cost basis totals of its symbol. Called
+	with the cursor of the write recording the transaction so both are
+	committed together
+	
+	@param curs - cursor of the open write
+	@param symbol - the stocks NASDAQ symbol, already upper case
+	@param type - either 'buy' or 'sell'
+	@param quantity - amount of stock bought or sold
+	@param market_price - NASDAQ market price at time of transaction
+'''
+def updateCostBasis(curs, symbol, type, quantity, market_price):
+	if(type == 'buy'):
+		totals = (symbol, quantity, quantity * market_price, 0, 0)
+	else:
+		totals = (symbol, 0, 0, quantity, quantity * market_price)
+	
+	curs.execute('''INSERT INTO cost_basis
+					VALUES (?,?,?,?,?)
+					ON CONFLICT (symbol) DO UPDATE SET
+						shares_bought = shares_bought + excluded.shares_bought,
+						total_cost = total_cost + excluded.total_cost,
+						shares_sold = shares_sold + excluded.shares_sold,
+						total_proceeds = total_proceeds + excluded.total_proceeds''', totals)
+	
+'''
+	retrieves the running cost basis totals kept for each stock symbol
+	
+	@param symbol - optional NASDAQ stock symbol to limit the totals to
+	@param database - path of the user database, defaults to DATABASE
+	
+	@return dictionary - maps each symbol to a (shares bought, total cost, shares sold,
+		total proceeds) tuple, money in cents
+'''
+@instrumentation.timed
+def getCostBasis(symbol=None, database=None):
+	conn = getConnection(database)
+	
+	curs = conn.cursor()
+	
+	if(symbol is None):
+		curs.execute('SELECT * FROM cost_basis')
+	else:
+		#makes sure symbol conforms to database storing standard
+		curs.execute('''SELECT * FROM cost_basis
+						WHERE symbol=?''', (symbol.upper(),))
+	
+	return {row[0]: row[1:] for row in curs}
+	
+'''
+	recalculates the cost basis table from the whole transaction history,
+	replacing what was there before
+	
+	@param database - path of the user database, defaults to DATABASE
+'''
+@instrumentation.timed
+@writeOperation
+def rebuildCostBasis(database=None):
+	conn = getConnection(database)
+	
+	with conn:
+		curs = conn.cursor()
+		
+		curs.execute('DELETE FROM cost_basis')
+		
+		curs.execute('INSERT INTO cost_basis ' + LEDGER_COST_BASIS)
+	
+'''
+	compares the cost basis table against totals calculated from the
+	transaction history
+	
+	@param database - path of the user database, defaults to DATABASE
+	
+	@return list - symbols whose stored totals don't match the transaction history
+'''
+@instrumentation.timed
+def checkCostBasis(database=None):
+	conn = getConnection(database)
+	
+	curs = conn.cursor()
+	
+	curs.execute('''SELECT symbol FROM (SELECT * FROM cost_basis EXCEPT ''' + LEDGER_COST_BASIS + ''')
+					UNION
+					SELECT symbol FROM (''' + LEDGER_COST_BASIS + ''' EXCEPT SELECT * FROM cost_basis)''')
+	
+	return [row[0] for row in curs]
+	
+'''
+	fills the empty lot tables by replaying the whole transaction history
+	
+	@param curs - cursor of the open write
+'''
+def fillLots(curs):
+	#the history is streamed from a cursor of its own, so only the open lots are held in memory
+	reader = curs.connection.cursor()
+	
+	reader.execute('''SELECT * FROM transactions
+					ORDER BY market_date, rowid''')
+	
+	try:
+		lotList, totalList = lot_tracker.replayTransactions(reader)
+	finally:
+		reader.close()
+	
+	curs.executemany('''INSERT INTO lots (method, symbol, quantity, market_price, market_date)
+						VALUES (?,?,?,?,?)''', lotList)
+	
+	curs.executemany('''INSERT INTO lot_totals
+						VALUES (?,?,?,?,?)''', totalList)
+
+'''
+	recalculates the lot tables from the whole transaction history, replacing
+	what was there before
+	
+	@param database - path of the user database, defaults to DATABASE
+'''
+@instrumentation.timed
+@writeOperation
+def rebuildLots(database=None):
+	conn = getConnection(database)
+	
+	with conn:
+		curs = conn.cursor()
+		
+		curs.execute('BEGIN IMMEDIATE')
+		
+		curs.execute('DELETE FROM lots')
+		curs.execute('DELETE FROM lot_totals')
+		
+		fillLots(curs)
+
+'''
+	retrieves the running lot totals of each stock symbol for an accounting method
+	
+	@param method - 'fifo', 'lifo' or 'average'
+	@param symbol - optional NASDAQ stock symbol to limit the totals to
+	@param database - path of the user database, defaults to DATABASE
+	
+	@return dictionary - maps each symbol to a (shares held, cost of shares held,
+		realized profit) tuple, money in cents
+'''
+@instrumentation.timed
+def getLotTotals(method=lot_tracker.DEFAULT_METHOD, symbol=None, database=None):
+	if(method not in lot_tracker.METHODS):
+		raise ValueError("lot method must be one of " + ', '.join(lot_tracker.METHODS))
+	
+	conn = getConnection(database)
+	
+	curs = conn.cursor()
+	
+	if(symbol is None):
+		curs.execute('''SELECT symbol, quantity, cost, realized FROM lot_totals
+						WHERE method=?''', (method,))
+	else:
+		#makes sure symbol conforms to database storing standard
+		curs.execute('''SELECT symbol, quantity, cost, realized FROM lot_totals
+						WHERE method=? AND symbol=?''', (method, symbol.upper()))
+	
+	return {row[0]: row[1:] for row in curs}
+
+'''
+	retrieves the open lots of a stock symbol, oldest first
+	
+	@param symbol - the NASDAQ stock symbol
+	@param method - 'fifo' or 'lifo'
+	@param database - path of the user database, defaults to DATABASE
+	
+	@return list - (quantity, market_price, market_date) tuples of the open lots
+'''
+@instrumentation.timed
+def getOpenLots(symbol, method=lot_tracker.DEFAULT_METHOD, database=None):
+	if(method not in lot_tracker.LOT_METHODS):
+		raise ValueError("open lots are only kept for " + ', '.join(lot_tracker.LOT_METHODS))
+	
+	conn = getConnection(database)
+	
+	curs = conn.cursor()
+	
+	#makes sure symbol conforms to database storing standard
+	curs.execute('''SELECT quantity, market_price, market_date FROM lots
+					WHERE method=? AND symbol=?
+					ORDER BY lot''', (method, symbol.upper()))
+	
+	return curs.fetchall()
+
+'''
+	compares the lot tables against lots worked out from the transaction history
+	
+	@param database - path of the user database, defaults to DATABASE
+	
+	@return list - symbols whose stored lots or totals don't match the transaction history
+'''
+@instrumentation.timed
+def checkLots(database=None):
+	conn = getConnection(database)
+	
+	curs = conn.cursor()
+	
+	#the history is streamed through the replay rather than read into memory first
+	curs.execute('''SELECT * FROM transactions
+					ORDER BY market_date, rowid''')
+	
+	lotList, totalList = lot_tracker.replayTransactions(curs)
+	
+	curs.execute('''SELECT method, symbol, quantity, market_price, market_date FROM lots
+					ORDER BY lot''')
+	storedLots = curs.fetchall()
+	
+	curs.execute('SELECT * FROM lot_totals')
+	storedTotals = curs.fetchall()
+	
+	#rows present on only one side, lots compared in order within each method and symbol
+	different = set()
+	
+	for expected, stored in ((lotList, storedLots), (totalList, storedTotals)):
+		expectedRows = {}
+		storedRows = {}
+		
+		for rows, grouped in ((expected, expectedRows), (stored, storedRows)):
+			for row in rows:
+				grouped.setdefault(row[:2], []).append(row[2:])
+		
+		for key in set(expectedRows) | set(storedRows):
+			if(expectedRows.get(key) != storedRows.get(key)):
+				different.add(key[1])
+	
+	return sorted(different)
+
+'''
+	adds many stock transactions to the transaction table in a single
+	transaction, used for bulk imports. The cost basis and lot tables aren't
+	updated, rebuildCostBasis and rebuildLots should be called once all
+	transactions are added
+	
+	@param transactionList - list of (symbol, type, quantity, market_price, market_date)
+		tuples, symbols must already be upper case
+	@param database - path of the user database, defaults to DATABASE
+'''
+@instrumentation.timed
+@writeOperation
+def addTransactions(transactionList, database=None):
+	conn = getConnection(database)
+	
+	with conn:
+		conn.executemany('''INSERT INTO transactions
+						VALUES (?,?,?,?,?)''', transactionList)
+	
+'''
+	imports trades in a single write, so if anything fails part way through
+	none of them are recorded. Trades are taken a chunk at a time and held in
+	a temporary table rather than in memory. Trades the ledger already holds are
+	skipped as duplicates, so an export overlapping an earlier import only adds
+	the trades that are new. Identical trades are counted, two of a trade the
+	ledger holds once adds one. The portfolio, cost basis and lot tables are
+	rebuilt in the same write
+	
+	@param chunks - iterable of lists of (line number, symbol, type, quantity,
+		market_price, market_date) tuples, symbols must already be upper case
+	@param reportLimit - most duplicate line numbers returned
+	@param database - path of the user database, defaults to DATABASE
+	
+	@return tuple - (number of trades recorded, number of duplicates skipped,
+		list of the line numbers of the first duplicates)
+'''
+@instrumentation.timed
+@writeOperation
+def importTransactions(chunks, reportLimit, database=None):
+	conn = getConnection(database)
+	
+	with conn:
+		curs = conn.cursor()
+		
+		curs.execute('BEGIN IMMEDIATE')
+		
+		curs.execute('''CREATE TEMP TABLE IF NOT EXISTS imported (
+						line INTEGER PRIMARY KEY,
+						symbol TEXT,
+						type TEXT,
+						quantity INTEGER,
+						market_price INTEGER,
+						market_date TEXT,
+						duplicate INTEGER NOT NULL DEFAULT 0
+						)''')
+		
+		curs.execute('DELETE FROM temp.imported')
+		
+		for chunk in chunks:
+			curs.executemany('''INSERT INTO temp.imported (line, symbol, type, quantity, market_price, market_date)
+								VALUES (?,?,?,?,?,?)''', chunk)
+		
+		#duplicates are found before any trade is added to the ledger
+		curs.execute('UPDATE temp.imported SET duplicate = 1 WHERE line IN (' + IMPORT_DUPLICATES + ')')
+		
+		duplicates = curs.rowcount
+		
+		curs.execute('SELECT line FROM temp.imported WHERE duplicate ORDER BY line LIMIT ?', (reportLimit,))
+		
+		duplicateLines = [row[0] for row in curs.fetchall()]
+		
+		curs.execute('''INSERT INTO transactions
+						SELECT symbol, type, quantity, market_price, market_date
+						FROM temp.imported
+						WHERE NOT duplicate
+						ORDER BY line''')
+		
+		imported = curs.rowcount
+		
+		curs.execute('DELETE FROM temp.imported')
+		
+		curs.execute('DELETE FROM portfolio')
+		curs.execute('INSERT INTO portfolio ' + LEDGER_PORTFOLIO)
+		
+		curs.execute('DELETE FROM cost_basis')
+		curs.execute('INSERT INTO cost_basis ' + LEDGER_COST_BASIS)
+		
+		curs.execute('DELETE FROM lots')
+		curs.execute('DELETE FROM lot_totals')
+		fillLots(curs)
+	
+	return imported, duplicates, duplicateLines
+	
+'''
+	recalculates the quantities in the portfolio table from the transaction
+	history, replacing what was there before. Symbols where everything bought
+	has been sold are left out of the portfolio
+	
+	@param database - path of the user database, defaults to DATABASE
+'''
+@instrumentation.timed
+@writeOperation
+def rebuildPortfolio(database=None):
+	conn = getConnection(database)
+	
+	with conn:
+		curs = conn.cursor()
+		
+		curs.execute('DELETE FROM portfolio')
+		
+		curs.execute('INSERT INTO portfolio ' + LEDGER_PORTFOLIO)
 	
 '''
 	retrieves a list of the whole transactions table ordered by date of transaction
 	
+	@param database - path of the user database, defaults to DATABASE
+	
 	@return list - ordered list of transactions
 '''
-def getAllTransactions():
-	conn = sqlite3.connect(DATABASE)
+@instrumentation.timed
+def getAllTransactions(database=None):
+	conn = getConnection(database)
 	
 	curs = conn.cursor()
 	
@@ -214,20 +1033,83 @@ def getAllTransactions():
 	
 	transactionList = curs.fetchall()
 	
-	conn.close()
-	
 	if(not transactionList):
 		raise IndexError("no transactions made")
 	
 	return transactionList
 
+'''
+	streams the transaction table ordered by date one page at a time, so the
+	whole history never has to be held in memory. Rows are read from the open
+	query as each page is asked for
+	
+	@param symbol - optional NASDAQ stock symbol to limit the log to
+	@param type - optional transaction type, either 'buy' or 'sell'
+	@param startDate - optional first market date to include
+	@param endDate - optional last market date to include
+	@param pageSize - number of rows in each page
+	@param database - path of the user database, defaults to DATABASE
+	
+	@return generator - yields lists of transactions, the same layout as getAllTransactions
+'''
+@instrumentation.timed
+def iterTransactions(symbol=None, type=None, startDate=None, endDate=None, pageSize=TRANSACTION_PAGE_SIZE, database=None):
+	#builds the filters that were asked for
+	conditions = []
+	filters = []
+	
+	if(symbol is not None):
+		conditions.append('symbol=?')
+		#makes sure symbol conforms to database storing standard
+		filters.append(symbol.upper())
+	
+	if(type is not None):
+		conditions.append('type=?')
+		filters.append(type)
+	
+	if(startDate is not None):
+		conditions.append('market_date>=?')
+		filters.append(str(startDate))
+	
+	if(endDate is not None):
+		conditions.append('market_date<=?')
+		filters.append(str(endDate))
+	
+	query = 'SELECT * FROM transactions'
+	
+	if(conditions):
+		query += ' WHERE ' + ' AND '.join(conditions)
+	
+	query += ' ORDER BY market_date'
+	
+	conn = getConnection(database)
+	
+	#a cursor of its own so other queries can run between pages
+	curs = conn.cursor()
+	
+	curs.execute(query, filters)
+	
+	try:
+		page = curs.fetchmany(pageSize)
+		
+		while(page):
+			yield page
+			
+			page = curs.fetchmany(pageSize)
+	finally:
+		#releases the query if the caller stops reading early
+		curs.close()
+
 '''
 	retrieves a list of all the transactions of the buy type
 	
+	@param database - path of the user database, defaults to DATABASE
+	
 	@return list - list of all buy transactions
 '''
-def getBuyTransactions():
-	conn = sqlite3.connect(DATABASE)
+@instrumentation.timed
+def getBuyTransactions(database=None):
+	conn = getConnection(database)
 	
 	curs = conn.cursor()
 	
@@ -236,8 +1118,6 @@ def getBuyTransactions():
 					
 	transactionList = curs.fetchall()
 	
-	conn.close()
-	
 	if(not transactionList):
 		raise IndexError("no transactions made")
 	
@@ -246,10 +1126,13 @@ def getBuyTransactions():
 '''
 	retrieves a list of all the transactions of the sell type
 	
+	@param database - path of the user database, defaults to DATABASE
+	
 	@return list - list of all sell transactions
 '''
-def getSellTransactions():
-	conn = sqlite3.connect(DATABASE)
+@instrumentation.timed
+def getSellTransactions(database=None):
+	conn = getConnection(database)
 	
 	curs = conn.cursor()
 	
@@ -258,8 +1141,6 @@ def getSellTransactions():
 					
 	transactionList = curs.fetchall()
 	
-	conn.close()
-	
 	if(not transactionList):
 		raise IndexError("no transactions made")
 	
@@ -270,14 +1151,16 @@ def getSellTransactions():
 	for a specific symbol. Used for averaging prices
 	
 	@param symbol - the stocks NASDAQ symbol
+	@param database - path of the user database, defaults to DATABASE
 	
 	@return list - list of quantities and prices for a specific stock symbol
 '''
-def getSymbolBuyTransactions(symbol):
+@instrumentation.timed
+def getSymbolBuyTransactions(symbol, database=None):
 	#makes sure symbol conforms to database storing standard
 	symbol = symbol.upper()
 	
-	conn = sqlite3.connect(DATABASE)
+	conn = getConnection(database)
 	
 	curs = conn.cursor()
 	
@@ -286,79 +1169,330 @@ def getSymbolBuyTransactions(symbol):
 					
 	transactionList = curs.fetchall()
 	
-	conn.close()
-	
 	if(not transactionList):
 		raise IndexError("no transactions made")
 	
 	return transactionList
 	
+'''
+	builds the path of the trend store of a database
+	
+	@param database - path of the user database, defaults to DATABASE
+	
+	@return string - path of the trend store directory
+'''
+def getTrendStorePath(database=None):
+	if(database is None):
+		database = DATABASE
+	
+	return os.path.splitext(database)[0] + TREND_STORE_SUFFIX
+	
+'''
+	records where the prices of a database made before trend_location existed
+	are kept, a database with a trend store has been using it
+	
+	@param curs - cursor of the migration
+'''
+def fillTrendLocation(curs):
+	curs.execute('PRAGMA database_list')
+	
+	location = 'table'
+	
+	for seq, name, path in curs.fetchall():
+		if(name == 'main' and path and os.path.isdir(getTrendStorePath(path))):
+			location = 'store'
+	
+	curs.execute('INSERT INTO trend_location VALUES (?)', (location,))
+	
+'''
+	checks whether the trend store holds the recorded prices of a database
+	
+	@param conn - connection to the database, inside the write when one is open
+	
+	@return boolean - True for the trend store, False for the trends table
+'''
+def isTrendStoreUsed(conn):
+	return conn.execute('SELECT location FROM trend_location').fetchone()[0] == 'store'
+	
+'''
+	finds the trend store of a database. The first time a database uses one,
+	the prices already in its trends table are copied into the new store and
+	the store is recorded as holding them, all while holding the write lock so
+	no price can be recorded in the table in between
+	
+	@param database - path of the user database, defaults to DATABASE
+	
+	@return string - path of the trend store directory
+'''
+def getTrendStore(database=None):
+	directory = getTrendStorePath(database)
+	
+	conn = getConnection(database)
+	
+	if(isTrendStoreUsed(conn)):
+		return directory
+	
+	with conn:
+		conn.execute('BEGIN IMMEDIATE')
+		
+		#another thread or program may have moved the prices first
+		if(isTrendStoreUsed(conn)):
+			return directory
+		
+		#a store left by a move that wasn't committed is missing the prices recorded since
+		if(os.path.isdir(directory)):
+			shutil.rmtree(directory)
+		
+		#a cursor of its own so the rows are streamed into the store one symbol at a time
+		curs = conn.cursor()
+		
+		curs.execute('''SELECT symbol, market_price, market_date FROM trends
+						ORDER BY symbol, market_date''')
+		
+		try:
+			trend_store.create(directory, curs)
+		finally:
+			curs.close()
+		
+		conn.execute("UPDATE trend_location SET location = 'store'")
+	
+	return directory
+	
+'''
+	checks where the recorded prices of a database are kept, moving them into
+	its trend store first when USE_TREND_STORE is set
+	
+	@param database - path of the user database, defaults to DATABASE
+	
+	@return boolean - True for the trend store, False for the trends table
+'''
+def usesTrendStore(database=None):
+	if(USE_TREND_STORE):
+		getTrendStore(database)
+		return True
+	
+	return isTrendStoreUsed(getConnection(database))
+	
 '''
 	adds new stock trend data to the trends table
 	
 	@param symbol - the stocks NASDAQ symbol
 	@param market_price - NASDAQ market price for the day
 	@param market_date - the date the price was checked
+	@param database - path of the user database, defaults to DATABASE
 '''
-def addTrend(symbol, current_price, market_date):
+@instrumentation.timed
+@writeOperation
+def addTrend(symbol, current_price, market_date, database=None):
 	#makes sure symbol conforms to database storing standard
 	symbol = symbol.upper()
-
-	conn = sqlite3.connect(DATABASE)
 	
-	curs = conn.cursor()
+	if(USE_TREND_STORE):
+		#the first use moves the recorded prices into the trend store
+		getTrendStore(database)
 	
-	#checks whether todays trend data has already been added
-	curs.execute('''SELECT * FROM trends
-					WHERE symbol=? AND market_date=?''', (symbol, market_date,))
-					
-	check = curs.fetchall()
+	conn = getConnection(database)
 	
-	#if a trend data has already been taken for the day trends data does not need to be inserted
-	if(not check):
-		curs.execute('''INSERT INTO trends
-						VALUES (?,?,?)''', (symbol, current_price, market_date))
-					
-		conn.commit()
+	with conn:
+		#takes the write lock before the alerts are read and the prices can't be moved to the store meanwhile
+		conn.execute('BEGIN IMMEDIATE')
+		
+		if(isTrendStoreUsed(conn)):
+			trend_store.append(getTrendStorePath(database), symbol, current_price, market_date)
+		else:
+			#if a trend data has already been taken for the day trends data does not need to be inserted
+			conn.execute('''INSERT INTO trends
+							VALUES (?,?,?)
+							ON CONFLICT (symbol, market_date) DO NOTHING''', (symbol, current_price, market_date))
+		
+		#alerts see every price, not only the first of the day
+		return checkAlerts(conn, [(symbol, current_price, market_date)], database)
+	
+'''
+	adds the days trend data for many stocks at once with a single statement and
+	commit, used when refreshing a whole portfolio
+	
+	@param trendList - list of (symbol, market_price, market_date) tuples
+	@param database - path of the user database, defaults to DATABASE
+'''
+@instrumentation.timed
+@writeOperation
+def addTrends(trendList, database=None):
+	#makes sure symbols conform to database storing standard
+	trendList = [(symbol.upper(), price, market_date) for symbol, price, market_date in trendList]
+	
+	if(USE_TREND_STORE):
+		#the first use moves the recorded prices into the trend store
+		getTrendStore(database)
+	
+	conn = getConnection(database)
+	
+	with conn:
+		#takes the write lock before the alerts are read and the prices can't be moved to the store meanwhile
+		conn.execute('BEGIN IMMEDIATE')
+		
+		if(isTrendStoreUsed(conn)):
+			trend_store.appendMany(getTrendStorePath(database), trendList)
+		else:
+			#days that already have trend data keep their first recorded price
+			conn.executemany('''INSERT INTO trends
+							VALUES (?,?,?)
+							ON CONFLICT (symbol, market_date) DO NOTHING''', trendList)
+		
+		return checkAlerts(conn, trendList, database)
+	
+'''
+	stores the latest polled price of many stocks, replacing older ones, and
+	records them as the trading days trend, checking them against the price
+	alerts once in the same write
+	
+	@param quoteList - list of (symbol, market_price) tuples
+	@param fetchedAt - time the prices were fetched, in seconds since the epoch
+	@param database - path of the user database, defaults to DATABASE
+	
+	@return list - fired alerts as (rule, symbol, kind, value, market_price,
+		market_date, triggered_at) tuples
+'''
+@instrumentation.timed
+@writeOperation
+def recordQuotes(quoteList, fetchedAt, database=None):
+	tradingDate = market_calendar.getTradingDate(fetchedAt)
+	
+	#makes sure symbols conform to database storing standard
+	trendList = [(symbol.upper(), price, tradingDate) for symbol, price in quoteList]
+	
+	if(USE_TREND_STORE):
+		#the first use moves the recorded prices into the trend store
+		getTrendStore(database)
+	
+	conn = getConnection(database)
+	
+	with conn:
+		conn.execute('BEGIN IMMEDIATE')
+		
+		conn.executemany('''INSERT INTO quotes
+						VALUES (?,?,?)
+						ON CONFLICT (symbol) DO UPDATE SET
+							market_price = excluded.market_price,
+							fetched_at = excluded.fetched_at''', [(symbol, price, fetchedAt) for symbol, price, tradingDate in trendList])
+		
+		if(isTrendStoreUsed(conn)):
+			trend_store.appendMany(getTrendStorePath(database), trendList)
+		else:
+			#days that already have trend data keep their first recorded price
+			conn.executemany('''INSERT INTO trends
+							VALUES (?,?,?)
+							ON CONFLICT (symbol, market_date) DO NOTHING''', trendList)
+		
+		return checkAlerts(conn, trendList, database)
+	
+'''
+	checks freshly fetched prices against the price alerts without recording
+	them, so prices fetched for a view or a trade the user backs out of still
+	fire alerts
+	
+	@param quoteList - list of (symbol, market_price) tuples
+	@param database - path of the user database, defaults to DATABASE
+	
+	@return list - fired alerts as (rule, symbol, kind, value, market_price,
+		market_date, triggered_at) tuples
+'''
+@instrumentation.timed
+@writeOperation
+def checkQuotes(quoteList, database=None):
+	tradingDate = market_calendar.getTradingDate()
+	
+	#makes sure symbols conform to database storing standard
+	priceList = [(symbol.upper(), price, tradingDate) for symbol, price in quoteList]
+	
+	conn = getConnection(database)
+	
+	with conn:
+		#the alert state is only changed while holding the write lock
+		conn.execute('BEGIN IMMEDIATE')
 		
-	conn.close()
+		return checkAlerts(conn, priceList, database)
+	
+'''
+	retrieves the polled prices that were fetched recently enough to be used
+	
+	@param since - oldest fetch time accepted, in seconds since the epoch
+	@param database - path of the user database, defaults to DATABASE
+	
+	@return dictionary - maps each symbol to its polled price in cents
+'''
+@instrumentation.timed
+def getRecordedQuotes(since, database=None):
+	conn = getConnection(database)
+	
+	curs = conn.cursor()
+	
+	curs.execute('''SELECT symbol, market_price FROM quotes
+					WHERE fetched_at>=?''', (since,))
+	
+	return dict(curs.fetchall())
 	
 '''
 	removes a days trend data from the database, if it exists
 	
 	@param symbol - the stocks NASDAQ symbol
 	@param market_date - the date the price was checked
+	@param database - path of the user database, defaults to DATABASE
 '''
-def removeTrend(symbol, market_date):
+@instrumentation.timed
+@writeOperation
+def removeTrend(symbol, market_date, database=None):
 	#makes sure symbol conforms to database storing standard
 	symbol = symbol.upper()
-
-	conn = sqlite3.connect(DATABASE)
 	
-	curs = conn.cursor()
+	if(USE_TREND_STORE):
+		#the first use moves the recorded prices into the trend store
+		getTrendStore(database)
 	
-	#checks whether todays trend data exists
-	curs.execute('''SELECT * FROM trends
-					WHERE symbol=? AND market_date=?''', (symbol, market_date))
-					
-	check = curs.fetchall()
+	conn = getConnection(database)
 	
-	if(check):
-		curs.execute('''DELETE FROM trends
+	with conn:
+		#the prices can't be moved to the store while they are removed
+		conn.execute('BEGIN IMMEDIATE')
+		
+		if(isTrendStoreUsed(conn)):
+			trend_store.remove(getTrendStorePath(database), symbol, market_date)
+			return
+		
+		curs = conn.cursor()
+		
+		#checks whether todays trend data exists
+		curs.execute('''SELECT * FROM trends
 						WHERE symbol=? AND market_date=?''', (symbol, market_date))
+						
+		check = curs.fetchall()
+		
+		if(check):
+			curs.execute('''DELETE FROM trends
+							WHERE symbol=? AND market_date=?''', (symbol, market_date))
 	
 '''
 	retrieves all of the recorded prices for a given stock symbol
 	
 	@param symbol - the NASDAQ stock symbol
+	@param database - path of the user database, defaults to DATABASE
 	
 	@return list - trends information for a given symbol
 '''
-def getSymbolTrends(symbol):
+@instrumentation.timed
+def getSymbolTrends(symbol, database=None):
 	#makes sure symbol conforms to database storing standard
 	symbol = symbol.upper()
+	
+	if(usesTrendStore(database)):
+		days, cents = trend_store.readAll(getTrendStorePath(database), symbol)
+		
+		if(len(days) == 0):
+			raise IndexError("no trends for symbol " + symbol)
+		
+		return [(symbol, price, trend_store.fromDay(day)) for day, price in zip(days.tolist(), cents.tolist())]
 
-	conn = sqlite3.connect(DATABASE)
+	conn = getConnection(database)
 	
 	curs = conn.cursor()
 	
@@ -367,36 +1501,340 @@ def getSymbolTrends(symbol):
 					
 	trendsList = curs.fetchall()
 					
-	conn.close()
+	if(not trendsList):
+		raise IndexError("no trends for symbol " + symbol)
+	
+	return trendsList
+	
+'''
+	builds the WHERE clause limiting trends to a symbol and an optional range of dates
+	
+	@param symbol - the NASDAQ stock symbol, already upper case
+	@param startDate - optional first market date to include
+	@param endDate - optional last market date to include
+	
+	@return tuple - (where clause, query parameters)
+'''
+def getTrendRangeFilter(symbol, startDate, endDate):
+	where = 'WHERE symbol=?'
+	filters = [symbol]
+	
+	if(startDate is not None):
+		where += ' AND market_date>=?'
+		filters.append(str(startDate))
+	
+	if(endDate is not None):
+		where += ' AND market_date<=?'
+		filters.append(str(endDate))
+	
+	return where, filters
+
+'''
+	calculates summary figures for a symbols recorded prices inside the database
+	without reading the individual prices
+	
+	@param symbol - the NASDAQ stock symbol
+	@param startDate - optional first market date to include
+	@param endDate - optional last market date to include
+	@param database - path of the user database, defaults to DATABASE
+	
+	@return tuple - (number of prices, lowest price, highest price, sum of prices),
+		prices in cents
+'''
+@instrumentation.timed
+def getSymbolTrendSummary(symbol, startDate=None, endDate=None, database=None):
+	#makes sure symbol conforms to database storing standard
+	symbol = symbol.upper()
+	
+	if(usesTrendStore(database)):
+		days, cents = trend_store.readRange(getTrendStorePath(database), symbol, startDate, endDate)
+		
+		if(len(cents) == 0):
+			raise IndexError("no trends for symbol " + symbol)
+		
+		return (len(cents), int(cents.min()), int(cents.max()), int(cents.sum()))
+	
+	where, filters = getTrendRangeFilter(symbol, startDate, endDate)
+	
+	conn = getConnection(database)
+	
+	curs = conn.cursor()
+	
+	curs.execute('''SELECT COUNT(*), MIN(market_price), MAX(market_price), SUM(market_price)
+					FROM trends ''' + where, filters)
+	
+	summary = curs.fetchone()
+	
+	if(summary[0] == 0):
+		raise IndexError("no trends for symbol " + symbol)
+	
+	return summary
+	
+'''
+	retrieves a symbols recorded prices ordered by date, without the symbol
+	column, for building price series
+	
+	@param symbol - the NASDAQ stock symbol
+	@param startDate - optional first market date to include
+	@param endDate - optional last market date to include
+	@param database - path of the user database, defaults to DATABASE
+	
+	@return list - (market date, market price) tuples
+'''
+@instrumentation.timed
+def getSymbolTrendPrices(symbol, startDate=None, endDate=None, database=None):
+	#makes sure symbol conforms to database storing standard
+	symbol = symbol.upper()
+	
+	if(usesTrendStore(database)):
+		days, cents = trend_store.readRange(getTrendStorePath(database), symbol, startDate, endDate)
+		
+		if(len(days) == 0):
+			raise IndexError("no trends for symbol " + symbol)
+		
+		return [(trend_store.fromDay(day), price) for day, price in zip(days.tolist(), cents.tolist())]
+	
+	where, filters = getTrendRangeFilter(symbol, startDate, endDate)
+	
+	conn = getConnection(database)
+	
+	curs = conn.cursor()
+	
+	curs.execute('''SELECT market_date, market_price
+					FROM trends ''' + where + '''
+					ORDER BY market_date''', filters)
+	
+	trendsList = curs.fetchall()
 	
 	if(not trendsList):
 		raise IndexError("no trends for symbol " + symbol)
 	
 	return trendsList
 	
+'''
+	retrieves the recorded prices of many symbols in one query. Each symbols
+	dates and prices come back as comma separated lists, so they can be read
+	into arrays without creating an object for every price
+	
+	@param symbols - list of NASDAQ stock symbols, already upper case
+	@param startDate - optional first market date to include
+	@param endDate - optional last market date to include
+	@param database - path of the user database, defaults to DATABASE
+	
+	@return list - (symbol, market dates, market prices) tuples, dates and prices
+		in the same order but not sorted by date. Symbols without trends are left out
+'''
+@instrumentation.timed
+def getTrendPriceLists(symbols, startDate=None, endDate=None, database=None):
+	if(not symbols):
+		return []
+	
+	where = 'WHERE symbol IN (' + ','.join('?' * len(symbols)) + ')'
+	filters = list(symbols)
+	
+	if(startDate is not None):
+		where += ' AND market_date>=?'
+		filters.append(str(startDate))
+	
+	if(endDate is not None):
+		where += ' AND market_date<=?'
+		filters.append(str(endDate))
+	
+	conn = getConnection(database)
+	
+	curs = conn.cursor()
+	
+	curs.execute('''SELECT symbol, group_concat(market_date), group_concat(market_price)
+					FROM trends ''' + where + '''
+					GROUP BY symbol''', filters)
+	
+	return curs.fetchall()
+	
 '''
 	removes all trends data for a specific stock symbol
 	
 	@param symbol - the NASDAQ stock symbol to remove
+	@param database - path of the user database, defaults to DATABASE
+'''
+@instrumentation.timed
+@writeOperation
+def removeSymbolTrend(symbol, database=None):
+	#makes sure symbol conforms to database storing standard
+	symbol = symbol.upper()
+	
+	if(USE_TREND_STORE):
+		#the first use moves the recorded prices into the trend store
+		getTrendStore(database)
+	
+	conn = getConnection(database)
+	
+	with conn:
+		#the prices can't be moved to the store while they are removed
+		conn.execute('BEGIN IMMEDIATE')
+		
+		if(isTrendStoreUsed(conn)):
+			trend_store.remove(getTrendStorePath(database), symbol)
+			return
+		
+		curs = conn.cursor()
+		
+		#selection used to check if trends data exists
+		curs.execute('''SELECT market_date FROM trends
+						WHERE symbol=?''', (symbol,))
+						
+		check = curs.fetchone()
+		
+		#if data exists deletes it
+		if(check):
+			curs.execute('''DELETE FROM trends
+							WHERE symbol=?''', (symbol,))
+
+'''
+	checks the price alert rules of newly arrived prices, called inside the
+	write recording the prices so alert state is committed with them
+	
+	@param conn - connection making the write
+	@param priceList - list of (symbol, market_price, market_date) tuples, symbols upper case
+	@param database - path of the user database, defaults to DATABASE
+	
+	@return list - fired alerts as (rule, symbol, kind, value, market_price,
+		market_date, triggered_at) tuples
+'''
+def checkAlerts(conn, priceList, database=None):
+	if(database is None):
+		database = DATABASE
+	
+	return price_alerts.checkPrices(conn, database, priceList)
+
+'''
+	adds a price alert rule for a symbol, held or not. The symbols recorded
+	prices fill its alert state the first time it is watched
+	
+	@param symbol - the stocks NASDAQ symbol
+	@param kind - one of price_alerts.KINDS
+	@param value - threshold price in cents for above and below, move in basis
+		points for move, or days in the moving average for cross_above and cross_below
+	@param database - path of the user database, defaults to DATABASE
+	
+	@return integer - the new rules id
 '''
-def removeSymbolTrend(symbol):
+@instrumentation.timed
+@writeOperation
+def addAlertRule(symbol, kind, value, database=None):
 	#makes sure symbol conforms to database storing standard
 	symbol = symbol.upper()
+	
+	value = price_alerts.validateRule(kind, value)
+	
+	try:
+		trendPrices = getSymbolTrendPrices(symbol, database=database)
+	except IndexError:
+		trendPrices = []
+	
+	conn = getConnection(database)
+	
+	with conn:
+		curs = conn.cursor()
+		
+		curs.execute('BEGIN IMMEDIATE')
+		
+		curs.execute('''INSERT INTO alert_rules (symbol, kind, value)
+						VALUES (?,?,?)''', (symbol, kind, value))
+		
+		rule = curs.lastrowid
+		
+		price_alerts.watchSymbol(curs, symbol, kind, value, trendPrices)
+	
+	return rule
 
-	conn = sqlite3.connect(DATABASE)
+'''
+	removes a price alert rule, along with the state of its symbol once no
+	other rule watches it
+	
+	@param rule - id of the rule
+	@param database - path of the user database, defaults to DATABASE
+'''
+@instrumentation.timed
+@writeOperation
+def removeAlertRule(rule, database=None):
+	conn = getConnection(database)
+	
+	with conn:
+		curs = conn.cursor()
+		
+		curs.execute('BEGIN IMMEDIATE')
+		
+		curs.execute('SELECT symbol FROM alert_rules WHERE rule=?', (rule,))
+		
+		check = curs.fetchone()
+		
+		if(not check):
+			raise IndexError("no alert rule " + str(rule))
+		
+		curs.execute('DELETE FROM alert_rules WHERE rule=?', (rule,))
+		
+		price_alerts.unwatchSymbol(curs, check[0])
+
+'''
+	retrieves the price alert rules
+	
+	@param symbol - optional NASDAQ stock symbol to limit the rules to
+	@param database - path of the user database, defaults to DATABASE
+	
+	@return list - (rule, symbol, kind, value, active) tuples, active is 1 while
+		the rules condition holds, 0 when it doesn't and None before it is known
+'''
+@instrumentation.timed
+def getAlertRules(symbol=None, database=None):
+	conn = getConnection(database)
 	
 	curs = conn.cursor()
 	
-	#selection used to check if trends data exists
-	curs.execute('''SELECT market_date FROM trends
-					WHERE symbol=?''', (symbol,))
-					
-	check = curs.fetchone()
+	if(symbol is None):
+		curs.execute('''SELECT rule, symbol, kind, value, active FROM alert_rules
+						ORDER BY symbol, rule''')
+	else:
+		curs.execute('''SELECT rule, symbol, kind, value, active FROM alert_rules
+						WHERE symbol=?
+						ORDER BY rule''', (symbol.upper(),))
 	
-	#if data exists deletes it
-	if(check):
-		curs.execute('''DELETE FROM trends
-						WHERE symbol=?''', (symbol,))
-					
-	conn.commit()
-	conn.close()
\ No newline at end of file
+	return curs.fetchall()
+
+'''
+	retrieves the symbols watched by price alert rules
+	
+	@param database - path of the user database, defaults to DATABASE
+	
+	@return list - the watched symbols
+'''
+@instrumentation.timed
+def getWatchedSymbols(database=None):
+	conn = getConnection(database)
+	
+	curs = conn.cursor()
+	
+	curs.execute('SELECT DISTINCT symbol FROM alert_rules ORDER BY symbol')
+	
+	return [row[0] for row in curs]
+
+'''
+	retrieves the most recently fired price alerts
+	
+	@param limit - most alerts returned
+	@param database - path of the user database, defaults to DATABASE
+	
+	@return list - (rule, symbol, kind, value, market_price, market_date,
+		triggered_at) tuples, newest first
+'''
+@instrumentation.timed
+def getAlertEvents(limit=50, database=None):
+	conn = getConnection(database)
+	
+	curs = conn.cursor()
+	
+	curs.execute('''SELECT rule, symbol, kind, value, market_price, market_date, triggered_at
+					FROM alert_events
+					ORDER BY event DESC
+					LIMIT ?''', (limit,))
+	
+	return curs.fetchall()
@@ -0,0 +1,80 @@
+'''
+	Module holds the shared HTTP session used for all requests to the NASDAQ
+	website. Connections are kept alive and pooled between requests, so only the
+	first quote from a host pays for DNS lookup and TCP setup. Failed requests
+	are retried with an exponential backoff
+
+	@author Johnathan McNutt
+'''
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import instrumentation
+
+#number of kept alive connections per host, should be at least the number of quote workers
+POOL_SIZE = 16
+
+#seconds to wait for a connection and for a response
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 10
+
+#number of times a failed request is retried and the backoff between retries
+RETRIES = 3
+BACKOFF_FACTOR = 0.3
+
+#server responses that are worth retrying
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+
+#the session is created lazily by whichever quote thread gets there first
+_lock = threading.Lock()
+
+'''
+	retrieves the shared session, creating it with the current settings if
+	it doesn't exist yet
+
+	@return Session - the pooled requests session
+'''
+def getSession():
+	global _session
+
+	with _lock:
+		if(_session is None):
+			retry = Retry(total=RETRIES, backoff_factor=BACKOFF_FACTOR,
+							status_forcelist=RETRY_STATUSES, allowed_methods=['GET'],
+							raise_on_status=False)
+
+			adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE,
+									max_retries=retry)
+
+			_session = requests.Session()
+			_session.mount('http://', adapter)
+			_session.mount('https://', adapter)
+
+		return _session
+
+'''
+	sends a GET request through the shared session
+
+	@param url - the address to fetch
+
+	@return Response - the servers response
+'''
+@instrumentation.timed
+def get(url):
+	return getSession().get(url, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+
+'''
+	closes all pooled connections. The next request opens a new session,
+	picking up any changed settings
+'''
+def closeSession():
+	global _session
+
+	with _lock:
+		if(_session is not None):
+			_session.close()
+			_session = None
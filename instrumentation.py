@@ -0,0 +1,246 @@
+'''
+	Module measures where the program spends its time. Functions marked with
+	the timed decorator have their calls counted and their latencies kept in a
+	histogram, and any part of the program can add to a named counter. The
+	database queries, HTTP fetches, quote page parsing and report functions are
+	all marked
+
+	Instrumentation is turned on by setting the STOCK_PORTFOLIO_STATS
+	environment variable to 1 before the program starts, a summary is then
+	printed to standard error when the program exits. When it is off the timed
+	decorator hands back the function unchanged, so there is no cost at all
+
+	@author Johnathan McNutt
+'''
+import os
+import sys
+import time
+import atexit
+import inspect
+import functools
+import threading
+
+#environment variable that turns instrumentation on
+ENVIRONMENT_VARIABLE = 'STOCK_PORTFOLIO_STATS'
+
+#read once at start up, functions are only wrapped if this is set when their module is imported
+ENABLED = os.environ.get(ENVIRONMENT_VARIABLE, '') not in ('', '0')
+
+#maps a name to the Histogram of its latencies
+_histograms = {}
+
+#maps a name to its count
+_counters = {}
+
+#calls are recorded from the quote fetching and writer threads too
+_lock = threading.Lock()
+
+'''
+	Class keeps the number, total and spread of the latencies of one function.
+	Latencies are counted in buckets that double in size, bucket n holding
+	latencies under 2^n microseconds, so recording is one addition and the
+	percentiles are accurate to a factor of two
+'''
+class Histogram:
+	'''
+		creates an empty histogram
+	'''
+	def __init__(self):
+		self.count = 0
+		self.total = 0.0
+		self.min = None
+		self.max = 0.0
+		self.buckets = [0] * 40
+
+	'''
+		adds a latency
+
+		@param seconds - the latency
+	'''
+	def add(self, seconds):
+		self.count += 1
+		self.total += seconds
+
+		if(self.min is None or seconds < self.min):
+			self.min = seconds
+
+		if(seconds > self.max):
+			self.max = seconds
+
+		self.buckets[min(int(seconds * 1000000).bit_length(), 39)] += 1
+
+	'''
+		estimates a percentile of the latencies
+
+		@param fraction - the percentile, 0.95 for the 95th
+
+		@return float - upper bound of the bucket the percentile falls in, in
+			seconds, no more than the slowest latency
+	'''
+	def getPercentile(self, fraction):
+		target = fraction * self.count
+		seen = 0
+
+		for bucket, count in enumerate(self.buckets):
+			seen += count
+
+			if(count and seen >= target):
+				return min((1 << bucket) / 1000000, self.max)
+
+		return self.max
+
+	'''
+		summarizes the latencies
+
+		@return dictionary - calls, total, mean, min, p50, p95, p99 and max, times in seconds
+	'''
+	def getSummary(self):
+		mean = 0.0
+		if(self.count):
+			mean = self.total / self.count
+
+		return {'calls': self.count,
+				'total': self.total,
+				'mean': mean,
+				'min': self.min or 0.0,
+				'p50': self.getPercentile(0.50),
+				'p95': self.getPercentile(0.95),
+				'p99': self.getPercentile(0.99),
+				'max': self.max}
+
+'''
+	adds a latency to the histogram of a name
+
+	@param name - what was timed
+	@param seconds - the latency
+'''
+def record(name, seconds):
+	with _lock:
+		histogram = _histograms.get(name)
+
+		if(histogram is None):
+			histogram = Histogram()
+			_histograms[name] = histogram
+
+		histogram.add(seconds)
+
+'''
+	adds to a counter
+
+	@param name - the counter
+	@param amount - amount to add
+'''
+def count(name, amount=1):
+	with _lock:
+		_counters[name] = _counters.get(name, 0) + amount
+
+'''
+	decorator recording the latency of every call to a function under its
+	module and name. Generators are timed over their whole run, counting only
+	the time spent producing items. Does nothing unless instrumentation is on
+
+	@param function - the function to time
+
+	@return function - the timed function, or the function itself when off
+'''
+def timed(function):
+	if(not ENABLED):
+		return function
+
+	name = function.__module__ + '.' + function.__qualname__
+
+	if(inspect.isgeneratorfunction(function)):
+		@functools.wraps(function)
+		def timedGenerator(*args, **kwargs):
+			elapsed = 0.0
+			generator = function(*args, **kwargs)
+
+			try:
+				while(True):
+					start = time.perf_counter()
+
+					try:
+						item = next(generator)
+					finally:
+						elapsed += time.perf_counter() - start
+
+					yield item
+			except StopIteration:
+				return
+			finally:
+				generator.close()
+				record(name, elapsed)
+
+		return timedGenerator
+
+	@functools.wraps(function)
+	def timedCall(*args, **kwargs):
+		start = time.perf_counter()
+
+		try:
+			return function(*args, **kwargs)
+		finally:
+			record(name, time.perf_counter() - start)
+
+	return timedCall
+
+'''
+	gathers everything recorded so far
+
+	@return dictionary - enabled, timings mapping each name to its latency
+		summary, and counters mapping each counter to its count
+'''
+def getSummary():
+	with _lock:
+		timings = {name: histogram.getSummary() for name, histogram in _histograms.items()}
+		counters = dict(_counters)
+
+	return {'enabled': ENABLED, 'timings': timings, 'counters': counters}
+
+'''
+	formats everything recorded so far as a table, slowest total time first
+
+	@return string - the timings and counters
+'''
+def getSummaryString():
+	summary = getSummary()
+
+	if(not summary['enabled']):
+		return "Instrumentation is off, set " + ENVIRONMENT_VARIABLE + "=1 to turn it on\n"
+
+	lines = ['{:<48}{:>9}{:>12}{:>10}{:>10}{:>10}{:>10}'.format('Function', 'calls', 'total ms', 'mean ms',
+																	'p50 ms', 'p95 ms', 'max ms')]
+
+	timings = sorted(summary['timings'].items(), key=lambda item: item[1]['total'], reverse=True)
+
+	for name, timing in timings:
+		lines.append('{:<48}{:>9}{:>12.2f}{:>10.3f}{:>10.3f}{:>10.3f}{:>10.3f}'.format(
+						name, timing['calls'], timing['total'] * 1000, timing['mean'] * 1000,
+						timing['p50'] * 1000, timing['p95'] * 1000, timing['max'] * 1000))
+
+	if(summary['counters']):
+		lines.append('')
+		lines.append('{:<48}{:>9}'.format('Counter', 'count'))
+
+		for name, value in sorted(summary['counters'].items()):
+			lines.append('{:<48}{:>9}'.format(name, value))
+
+	return '\n'.join(lines) + '\n'
+
+'''
+	clears everything recorded so far
+'''
+def reset():
+	with _lock:
+		_histograms.clear()
+		_counters.clear()
+
+'''
+	prints the summary to standard error, run when the program exits
+'''
+def printSummary():
+	if(_histograms or _counters):
+		sys.stderr.write(getSummaryString())
+
+if(ENABLED):
+	atexit.register(printSummary)
@@ -0,0 +1,212 @@
+'''
+	Module keeps the open tax lots of every stock so realized and unrealized
+	profit can be read without going back over the transaction history. Lots are
+	kept for three accounting methods at once, first in first out, last in first
+	out and average cost, so switching between them needs no rebuild
+
+	Every buy opens a lot for the fifo and lifo methods, a sell closes shares
+	from the oldest or newest lots and adds the difference between the proceeds
+	and the cost of the closed shares to the realized profit. The average method
+	only keeps the number of shares held and their total cost. Running totals of
+	each method and symbol are kept alongside the lots
+
+	Trades are applied to the database with updateLots as they are recorded, and
+	replayTransactions works out the same lots from a transaction history in
+	memory, used to rebuild and check the stored lots
+
+	@author Johnathan McNutt
+'''
+from collections import deque
+
+#accounting methods lots are kept for
+METHODS = ('fifo', 'lifo', 'average')
+
+#methods that close shares from individual lots
+LOT_METHODS = ('fifo', 'lifo')
+
+#method used when none is given
+DEFAULT_METHOD = 'fifo'
+
+'''
+	works out the cost of shares sold under the average cost method
+
+	@param cost - total cost of the shares held, in cents
+	@param held - number of shares held
+	@param sold - number of shares sold
+
+	@return integer - the cost of the sold shares rounded to the cent, the whole
+		cost when every held share is sold
+'''
+def getAverageCost(cost, held, sold):
+	if(held <= 0):
+		return 0
+
+	if(sold >= held):
+		return cost
+
+	return (cost * sold + held // 2) // held
+
+'''
+	applies a transaction to the stored lots and totals of its symbol. Called
+	with the cursor of the write recording the transaction so both are
+	committed together
+
+	@param curs - cursor of the open write
+	@param symbol - the stocks NASDAQ symbol, already upper case
+	@param type - either 'buy' or 'sell'
+	@param quantity - amount of stock bought or sold
+	@param market_price - NASDAQ market price at time of transaction
+	@param market_date - the date the transaction was made
+'''
+def updateLots(curs, symbol, type, quantity, market_price, market_date):
+	if(type == 'buy'):
+		for method in LOT_METHODS:
+			curs.execute('''INSERT INTO lots (method, symbol, quantity, market_price, market_date)
+							VALUES (?,?,?,?,?)''', (method, symbol, quantity, market_price, str(market_date)))
+
+		for method in METHODS:
+			addTotals(curs, method, symbol, quantity, quantity * market_price, 0)
+
+		return
+
+	proceeds = quantity * market_price
+
+	for method in LOT_METHODS:
+		if(method == 'fifo'):
+			order = 'ASC'
+		else:
+			order = 'DESC'
+
+		#lots are read on a cursor of their own and only until the sold shares are
+		#covered, so a sell touches the lots it closes rather than every open lot
+		reader = curs.connection.cursor()
+		reader.execute('''SELECT lot, quantity, market_price FROM lots
+						WHERE method=? AND symbol=?
+						ORDER BY lot ''' + order, (method, symbol))
+
+		remaining = quantity
+		closedQuantity = 0
+		closedCost = 0
+
+		for lot, lotQuantity, lotPrice in reader:
+			taken = min(remaining, lotQuantity)
+
+			if(taken == lotQuantity):
+				curs.execute('DELETE FROM lots WHERE lot=?', (lot,))
+			else:
+				curs.execute('UPDATE lots SET quantity = quantity - ? WHERE lot=?', (taken, lot))
+
+			closedQuantity += taken
+			closedCost += taken * lotPrice
+			remaining -= taken
+
+			if(remaining == 0):
+				break
+
+		reader.close()
+
+		addTotals(curs, method, symbol, -closedQuantity, -closedCost, proceeds - closedCost)
+
+	curs.execute('''SELECT quantity, cost FROM lot_totals
+					WHERE method='average' AND symbol=?''', (symbol,))
+
+	held, cost = curs.fetchone() or (0, 0)
+
+	closedCost = getAverageCost(cost, held, quantity)
+
+	addTotals(curs, 'average', symbol, -min(quantity, held), -closedCost, proceeds - closedCost)
+
+'''
+	adds to the running totals of a method and symbol
+
+	@param curs - cursor of the open write
+	@param method - the accounting method
+	@param symbol - the stocks NASDAQ symbol, already upper case
+	@param quantity - change in the number of shares held
+	@param cost - change in the cost of the shares held, in cents
+	@param realized - profit realized, in cents
+'''
+def addTotals(curs, method, symbol, quantity, cost, realized):
+	curs.execute('''INSERT INTO lot_totals
+					VALUES (?,?,?,?,?)
+					ON CONFLICT (method, symbol) DO UPDATE SET
+						quantity = quantity + excluded.quantity,
+						cost = cost + excluded.cost,
+						realized = realized + excluded.realized''', (method, symbol, quantity, cost, realized))
+
+'''
+	works out the lots and totals of a transaction history in memory, giving
+	the same result as applying each transaction with updateLots in order
+
+	@param transactions - iterable of (symbol, type, quantity, market_price,
+		market_date) tuples in the order they were made
+
+	@return tuple - (list of open lots as (method, symbol, quantity, market_price,
+		market_date) tuples oldest first, list of totals as (method, symbol,
+		quantity, cost, realized) tuples)
+'''
+def replayTransactions(transactions):
+	#maps (method, symbol) to the open lots, oldest first, as [quantity, price, date] lists
+	openLots = {}
+
+	#maps (method, symbol) to [quantity, cost, realized]
+	totals = {}
+
+	for symbol, type, quantity, price, marketDate in transactions:
+		if(type == 'buy'):
+			for method in LOT_METHODS:
+				openLots.setdefault((method, symbol), deque()).append([quantity, price, str(marketDate)])
+
+			for method in METHODS:
+				total = totals.setdefault((method, symbol), [0, 0, 0])
+				total[0] += quantity
+				total[1] += quantity * price
+
+			continue
+
+		proceeds = quantity * price
+
+		for method in LOT_METHODS:
+			lots = openLots.setdefault((method, symbol), deque())
+
+			remaining = quantity
+			closedQuantity = 0
+			closedCost = 0
+
+			while(remaining > 0 and lots):
+				if(method == 'fifo'):
+					lot = lots[0]
+				else:
+					lot = lots[-1]
+
+				taken = min(remaining, lot[0])
+
+				if(taken == lot[0]):
+					if(method == 'fifo'):
+						lots.popleft()
+					else:
+						lots.pop()
+				else:
+					lot[0] -= taken
+
+				closedQuantity += taken
+				closedCost += taken * lot[1]
+				remaining -= taken
+
+			total = totals.setdefault((method, symbol), [0, 0, 0])
+			total[0] -= closedQuantity
+			total[1] -= closedCost
+			total[2] += proceeds - closedCost
+
+		total = totals.setdefault(('average', symbol), [0, 0, 0])
+
+		closedCost = getAverageCost(total[1], total[0], quantity)
+
+		total[0] -= min(quantity, total[0])
+		total[1] -= closedCost
+		total[2] += proceeds - closedCost
+
+	lotList = [(method, symbol) + tuple(lot) for (method, symbol), lots in openLots.items() for lot in lots]
+	totalList = [key + tuple(total) for key, total in totals.items()]
+
+	return lotList, totalList
@@ -0,0 +1,305 @@
+'''
+	Module answers whether the NASDAQ market is open and which trading date
+	prices belong to, from the exchanges rules rather than the NASDAQ website.
+	Holidays are worked out once per year and kept, so a check costs a few date
+	comparisons. Knowing when the market is closed lets the quote cache and the
+	price daemon skip fetches, since prices can't change after the close
+
+	Times are given as seconds since the epoch like time.time(), and the rules
+	are the current ones, dates from before a holiday was added aren't adjusted
+
+	@author Johnathan McNutt
+'''
+import time
+from datetime import date, datetime, timedelta
+from datetime import time as clockTime
+from zoneinfo import ZoneInfo
+
+#timezone the market hours are set in
+TIMEZONE = ZoneInfo('America/New_York')
+
+#regular trading session, and the close on days the market closes early
+OPEN_TIME = clockTime(9, 30)
+CLOSE_TIME = clockTime(16, 0)
+EARLY_CLOSE_TIME = clockTime(13, 0)
+
+#maps a year to its holidays and early close days, filled in as years are asked for
+_holidays = {}
+_earlyCloses = {}
+
+#last closed period found, (close time, next open time), most checks fall inside it
+_closedPeriod = (0.0, 0.0)
+
+'''
+	finds a weekday of a month, such as the third Monday
+
+	@param year - the year
+	@param month - the month
+	@param weekday - day of the week, 0 for Monday
+	@param n - which occurrence, 1 for the first and -1 for the last
+
+	@return date - the day
+'''
+def getNthWeekday(year, month, weekday, n):
+	if(n > 0):
+		first = date(year, month, 1)
+		return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+	#counts back from the last day of the month
+	last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+	return last - timedelta(days=(last.weekday() - weekday) % 7 + 7 * (-n - 1))
+
+'''
+	works out the date of Easter Sunday with the anonymous Gregorian algorithm
+
+	@param year - the year
+
+	@return date - Easter Sunday
+'''
+def getEaster(year):
+	a = year % 19
+	b, c = divmod(year, 100)
+	d, e = divmod(b, 4)
+	f = (b + 8) // 25
+	g = (b - f + 1) // 3
+	h = (19 * a + b - d - g + 15) % 30
+	i, k = divmod(c, 4)
+	l = (32 + 2 * e + 2 * i - h - k) % 7
+	m = (a + 11 * h + 22 * l) // 451
+	month, day = divmod(h + l - 7 * m + 114, 31)
+
+	return date(year, month, day + 1)
+
+'''
+	moves a holiday on a weekend to the weekday it is observed on, Saturday
+	holidays are observed the Friday before and Sunday holidays the Monday after
+
+	@param day - the holiday
+
+	@return date - the day the market is closed for it
+'''
+def getObserved(day):
+	if(day.weekday() == 5):
+		return day - timedelta(days=1)
+
+	if(day.weekday() == 6):
+		return day + timedelta(days=1)
+
+	return day
+
+'''
+	works out the days in a year the market is closed for a holiday
+
+	@param year - the year
+
+	@return dictionary - maps each holiday's date to its name
+'''
+def getHolidays(year):
+	holidays = _holidays.get(year)
+
+	if(holidays is not None):
+		return holidays
+
+	holidays = {}
+
+	#a new year's day on Saturday isn't observed, the market stays open the Friday before
+	newYear = date(year, 1, 1)
+	if(newYear.weekday() != 5):
+		holidays[getObserved(newYear)] = "New Year's Day"
+
+	holidays[getNthWeekday(year, 1, 0, 3)] = "Martin Luther King Jr. Day"
+	holidays[getNthWeekday(year, 2, 0, 3)] = "Washington's Birthday"
+	holidays[getEaster(year) - timedelta(days=2)] = "Good Friday"
+	holidays[getNthWeekday(year, 5, 0, -1)] = "Memorial Day"
+
+	if(year >= 2022):
+		holidays[getObserved(date(year, 6, 19))] = "Juneteenth"
+
+	holidays[getObserved(date(year, 7, 4))] = "Independence Day"
+	holidays[getNthWeekday(year, 9, 0, 1)] = "Labor Day"
+	holidays[getNthWeekday(year, 11, 3, 4)] = "Thanksgiving Day"
+	holidays[getObserved(date(year, 12, 25))] = "Christmas Day"
+
+	_holidays[year] = holidays
+
+	return holidays
+
+'''
+	works out the days in a year the market closes early, the day before
+	Independence Day, the day after Thanksgiving and Christmas Eve
+
+	@param year - the year
+
+	@return set - dates of the early close days
+'''
+def getEarlyCloses(year):
+	earlyCloses = _earlyCloses.get(year)
+
+	if(earlyCloses is not None):
+		return earlyCloses
+
+	candidates = [date(year, 7, 3),
+					getNthWeekday(year, 11, 3, 4) + timedelta(days=1),
+					date(year, 12, 24)]
+
+	earlyCloses = set(day for day in candidates if isTradingDay(day))
+
+	_earlyCloses[year] = earlyCloses
+
+	return earlyCloses
+
+'''
+	checks whether the market trades on a day
+
+	@param day - the date
+
+	@return boolean - false on weekends and holidays
+'''
+def isTradingDay(day):
+	return day.weekday() < 5 and day not in getHolidays(day.year)
+
+'''
+	finds the last trading day before a day
+
+	@param day - the date
+
+	@return date - the trading day before it
+'''
+def getPreviousTradingDay(day):
+	day -= timedelta(days=1)
+
+	while(not isTradingDay(day)):
+		day -= timedelta(days=1)
+
+	return day
+
+'''
+	finds the first trading day after a day
+
+	@param day - the date
+
+	@return date - the trading day after it
+'''
+def getNextTradingDay(day):
+	day += timedelta(days=1)
+
+	while(not isTradingDay(day)):
+		day += timedelta(days=1)
+
+	return day
+
+'''
+	works out when the market opens and closes on a trading day
+
+	@param day - a trading day
+
+	@return tuple - (open time, close time) in seconds since the epoch
+'''
+def getSessionTimes(day):
+	closeTime = CLOSE_TIME
+	if(day in getEarlyCloses(day.year)):
+		closeTime = EARLY_CLOSE_TIME
+
+	opening = datetime.combine(day, OPEN_TIME, TIMEZONE).timestamp()
+	closing = datetime.combine(day, closeTime, TIMEZONE).timestamp()
+
+	return opening, closing
+
+'''
+	converts a time into the markets local date and time
+
+	@param now - seconds since the epoch, the current time when not given
+
+	@return datetime - the time in the markets timezone
+'''
+def getMarketTime(now=None):
+	if(now is None):
+		now = time.time()
+
+	return datetime.fromtimestamp(now, TIMEZONE)
+
+'''
+	finds the period the market is closed for at a time, from the close of the
+	last session to the open of the next one
+
+	@param now - seconds since the epoch, the current time when not given
+
+	@return tuple - (last close time, next open time) in seconds since the
+		epoch, or None if the market is open
+'''
+def getClosedPeriod(now=None):
+	global _closedPeriod
+
+	if(now is None):
+		now = time.time()
+
+	#reuses the last period found while the market stays closed
+	lastClose, nextOpen = _closedPeriod
+	if(lastClose <= now < nextOpen):
+		return _closedPeriod
+
+	today = getMarketTime(now).date()
+
+	if(isTradingDay(today)):
+		opening, closing = getSessionTimes(today)
+
+		if(opening <= now < closing):
+			return None
+
+		if(now >= closing):
+			period = (closing, getSessionTimes(getNextTradingDay(today))[0])
+		else:
+			period = (getSessionTimes(getPreviousTradingDay(today))[1], opening)
+	else:
+		period = (getSessionTimes(getPreviousTradingDay(today))[1], getSessionTimes(getNextTradingDay(today))[0])
+
+	_closedPeriod = period
+
+	return period
+
+'''
+	checks whether the market is open
+
+	@param now - seconds since the epoch, the current time when not given
+
+	@return boolean - whether a trading session is running
+'''
+def isMarketOpen(now=None):
+	return getClosedPeriod(now) is None
+
+'''
+	finds the trading date current prices belong to, today once the market has
+	opened on a trading day and the last trading day otherwise
+
+	@param now - seconds since the epoch, the current time when not given
+
+	@return date - the trading date
+'''
+def getTradingDate(now=None):
+	if(now is None):
+		now = time.time()
+
+	today = getMarketTime(now).date()
+
+	if(isTradingDay(today) and now >= getSessionTimes(today)[0]):
+		return today
+
+	return getPreviousTradingDay(today)
+
+'''
+	checks whether a price fetched at one time could be out of date, which it
+	can't be if it was fetched after the market last closed and the market
+	hasn't opened since
+
+	@param fetchedAt - seconds since the epoch the price was fetched at
+	@param now - seconds since the epoch, the current time when not given
+
+	@return boolean - whether the price may have changed since it was fetched
+'''
+def pricesMayChange(fetchedAt, now=None):
+	period = getClosedPeriod(now)
+
+	if(period is None):
+		return True
+
+	return fetchedAt < period[0]
@@ -0,0 +1,420 @@
+'''
+	Module evaluates price alerts as new prices arrive. A rule watches one
+	symbol, held or not, and fires when its price goes above or below a
+	threshold, moves by a percentage from the previous days close, or crosses a
+	moving average of daily closes. A rule fires when its condition becomes
+	true and can fire again once the condition has cleared
+	
+	Each watched symbol keeps a rolling state, its latest price and date, the
+	previous days close and a running total of the last closes for every
+	moving average its rules use. A new price updates the state in constant
+	time and only the rules of its own symbol are checked, each in constant
+	time, so the trend history is never read again. Rules and states are kept
+	in memory for each database and saved in the alert tables as they change.
+	Triggers count every change to the rule and state tables in alert_changes,
+	the memory copy is read again only when the count shows they were changed
+	by something other than the engine, so prices and trades recorded by other
+	connections don't make it read everything again
+	
+	Prices are checked with checkPrices, called by database_manager with the
+	cursor of the write recording them so alert state is committed with them
+	
+	@author Johnathan McNutt
+'''
+import time
+import threading
+from collections import deque
+
+#kinds of rule, the meaning of a rules value depends on its kind
+#  above, below - threshold price in cents
+#  move - smallest move from the previous close in basis points, 500 being 5%
+#  cross_above, cross_below - number of daily closes in the moving average
+KINDS = ('above', 'below', 'move', 'cross_above', 'cross_below')
+
+#kinds of rule that compare the price to a moving average
+AVERAGE_KINDS = ('cross_above', 'cross_below')
+
+#longest moving average allowed, in days
+MAX_AVERAGE_DAYS = 1000
+
+#maps a database to its AlertEngine
+_engines = {}
+_enginesLock = threading.Lock()
+
+'''
+	Class keeps the rolling state of a watched symbol
+'''
+class SymbolState:
+	'''
+		@param marketDate - date of the latest price, None if none has arrived
+		@param price - latest price in cents
+		@param reference - close of the day before marketDate in cents, None if unknown
+	'''
+	def __init__(self, marketDate=None, price=None, reference=None):
+		self.marketDate = marketDate
+		self.price = price
+		self.reference = reference
+		
+		#maps a number of days to [deque of the last closes, total of the closes]
+		self.averages = {}
+	
+	'''
+		starts keeping a moving average
+		
+		@param days - number of closes in the average
+		@param closes - list of the latest closes in cents, oldest first
+	'''
+	def addAverage(self, days, closes):
+		closes = deque(closes[-days:])
+		self.averages[days] = [closes, sum(closes)]
+	
+	'''
+		moves the state on to a new price. When the price is the first of a new
+		day the last price of the day before becomes its close, and is added to
+		every moving average while the oldest close is dropped
+		
+		@param price - the new price in cents
+		@param marketDate - the date the price is for, YYYY-MM-DD
+		
+		@return boolean - whether the state changed, False for prices older
+			than the latest one
+	'''
+	def addPrice(self, price, marketDate):
+		if(self.marketDate is not None):
+			if(marketDate < self.marketDate):
+				return False
+			
+			if(marketDate > self.marketDate):
+				close = self.price
+				self.reference = close
+				
+				for days, average in self.averages.items():
+					average[0].append(close)
+					average[1] += close
+					
+					if(len(average[0]) > days):
+						average[1] -= average[0].popleft()
+		
+		self.marketDate = marketDate
+		self.price = price
+		
+		return True
+	
+	'''
+		retrieves a moving average of the closes
+		
+		@param days - number of closes in the average
+		
+		@return float - the average in cents, None until there are enough closes
+	'''
+	def getAverage(self, days):
+		closes, total = self.averages.get(days, ((), 0))
+		
+		if(len(closes) < days):
+			return None
+		
+		return total / days
+
+'''
+	checks whether a rules condition holds for the current state of its symbol
+	
+	@param kind - the kind of rule
+	@param value - the rules value, see KINDS
+	@param state - SymbolState of the rules symbol
+	
+	@return boolean - whether the condition holds, None if it can't be known yet
+'''
+def isActive(kind, value, state):
+	price = state.price
+	
+	if(kind == 'above'):
+		return price >= value
+	
+	if(kind == 'below'):
+		return price <= value
+	
+	if(kind == 'move'):
+		if(not state.reference):
+			return None
+		
+		return abs(price - state.reference) * 10000 >= value * state.reference
+	
+	average = state.getAverage(value)
+	
+	if(average is None):
+		return None
+	
+	if(kind == 'cross_above'):
+		return price > average
+	
+	return price < average
+
+'''
+	checks the kind and value of a new rule
+	
+	@param kind - the kind of rule
+	@param value - the rules value, see KINDS
+	
+	@return integer - the value
+'''
+def validateRule(kind, value):
+	if(kind not in KINDS):
+		raise ValueError("alert kind must be one of " + ', '.join(KINDS))
+	
+	if(value <= 0):
+		raise ValueError("alert value must be positive")
+	
+	if(kind in AVERAGE_KINDS and value > MAX_AVERAGE_DAYS):
+		raise ValueError("moving averages can cover at most " + str(MAX_AVERAGE_DAYS) + " days")
+	
+	return value
+
+'''
+	Class holds the rules and symbol states of one database in memory
+'''
+class AlertEngine:
+	'''
+		creates an empty engine, filled by load
+	'''
+	def __init__(self):
+		#maps a symbol to its rules as [rule, kind, value, active] lists
+		self.rules = {}
+		
+		#maps a symbol to its SymbolState
+		self.states = {}
+		
+		#count of changes to the alert tables the memory copy is in step with, None to read it again
+		self.changes = None
+		
+		self.lock = threading.Lock()
+	
+	'''
+		reads every rule and symbol state from the database
+		
+		@param curs - cursor of the open write
+	'''
+	def load(self, curs):
+		self.rules = {}
+		self.states = {}
+		
+		curs.execute('SELECT rule, symbol, kind, value, active FROM alert_rules ORDER BY rule')
+		
+		for rule, symbol, kind, value, active in curs.fetchall():
+			self.rules.setdefault(symbol, []).append([rule, kind, value, active])
+		
+		curs.execute('SELECT symbol, market_date, market_price, reference FROM alert_state')
+		
+		for symbol, marketDate, price, reference in curs.fetchall():
+			self.states[symbol] = SymbolState(marketDate, price, reference)
+		
+		curs.execute('SELECT symbol, days, closes FROM alert_averages')
+		
+		for symbol, days, closes in curs.fetchall():
+			state = self.states.setdefault(symbol, SymbolState())
+			state.addAverage(days, [int(close) for close in closes.split(',') if close])
+	
+	'''
+		checks the rules of each symbol given a new price and saves the changed
+		states, rule conditions and fired alerts
+		
+		@param curs - cursor of the open write
+		@param priceList - list of (symbol, market_price, market_date) tuples,
+			symbols already upper case
+		
+		@return list - fired alerts as (rule, symbol, kind, value, market_price,
+			market_date, triggered_at) tuples
+	'''
+	def checkPrices(self, curs, priceList):
+		now = time.time()
+		
+		fired = []
+		changedRules = []
+		changedStates = {}
+		rolledSymbols = set()
+		
+		for symbol, price, marketDate in priceList:
+			rules = self.rules.get(symbol)
+			
+			#prices of symbols nobody watches cost a dictionary lookup
+			if(rules is None):
+				continue
+			
+			marketDate = str(marketDate)[:10]
+			
+			state = self.states.get(symbol)
+			if(state is None):
+				state = SymbolState()
+				self.states[symbol] = state
+			
+			previousDate = state.marketDate
+			
+			if(not state.addPrice(price, marketDate)):
+				continue
+			
+			if(previousDate is not None and marketDate > previousDate and state.averages):
+				rolledSymbols.add(symbol)
+			
+			changedStates[symbol] = state
+			
+			for rule in rules:
+				active = isActive(rule[1], rule[2], state)
+				
+				if(active is None):
+					continue
+				
+				#moving average crosses need the side the price was on before
+				if(active and (rule[3] == 0 or (rule[3] is None and rule[1] not in AVERAGE_KINDS))):
+					fired.append((rule[0], symbol, rule[1], rule[2], price, marketDate, now))
+				
+				if(rule[3] != active):
+					rule[3] = int(active)
+					changedRules.append((rule[3], rule[0]))
+		
+		if(not changedStates):
+			return fired
+		
+		curs.executemany('''INSERT INTO alert_state VALUES (?,?,?,?)
+							ON CONFLICT (symbol) DO UPDATE SET
+								market_date = excluded.market_date,
+								market_price = excluded.market_price,
+								reference = excluded.reference''',
+						[(symbol, state.marketDate, state.price, state.reference) for symbol, state in changedStates.items()])
+		
+		#closes are only saved when a new day adds one
+		curs.executemany('UPDATE alert_averages SET closes=? WHERE symbol=? AND days=?',
+						[(','.join(map(str, average[0])), symbol, days)
+							for symbol in rolledSymbols for days, average in self.states[symbol].averages.items()])
+		
+		curs.executemany('UPDATE alert_rules SET active=? WHERE rule=?', changedRules)
+		
+		curs.executemany('''INSERT INTO alert_events (rule, symbol, kind, value, market_price, market_date, triggered_at)
+							VALUES (?,?,?,?,?,?,?)''', fired)
+		
+		return fired
+
+'''
+	retrieves the engine of a database, creating an empty one the first time
+	
+	@param database - path of the database
+	
+	@return AlertEngine - the engine
+'''
+def getEngine(database):
+	with _enginesLock:
+		engine = _engines.get(database)
+		
+		if(engine is None):
+			engine = AlertEngine()
+			_engines[database] = engine
+	
+	return engine
+
+'''
+	reads the count of changes made to the alert rule and state tables
+	
+	@param curs - cursor of the open write
+	
+	@return integer - the count
+'''
+def getChanges(curs):
+	curs.execute('SELECT changes FROM alert_changes')
+	
+	return curs.fetchone()[0]
+
+'''
+	checks the alert rules of newly arrived prices, saving the results with the
+	write they arrived in. Must be called inside that write, so the database
+	can't be changed by another connection while the engine is used
+	
+	@param conn - the connection making the write
+	@param database - path of the database
+	@param priceList - list of (symbol, market_price, market_date) tuples,
+		symbols already upper case
+	
+	@return list - fired alerts as (rule, symbol, kind, value, market_price,
+		market_date, triggered_at) tuples
+'''
+def checkPrices(conn, database, priceList):
+	engine = getEngine(database)
+	
+	with engine.lock:
+		curs = conn.cursor()
+		
+		if(engine.changes != getChanges(curs)):
+			engine.load(curs)
+		
+		try:
+			fired = engine.checkPrices(curs, priceList)
+		except Exception:
+			#the memory copy may be ahead of a write that won't be committed
+			engine.changes = None
+			raise
+		
+		#the count now includes the engines own changes, the write lock keeps out any others
+		engine.changes = getChanges(curs)
+		
+		return fired
+
+'''
+	makes the next check read the rules and states of a database again
+	
+	@param database - path of the database
+'''
+def invalidate(database):
+	with _enginesLock:
+		engine = _engines.get(database)
+	
+	if(engine is not None):
+		with engine.lock:
+			engine.changes = None
+
+'''
+	starts watching a symbol for a new rule, filling its state from the
+	recorded prices the first time it is watched and starting any moving
+	average the rule needs
+	
+	@param curs - cursor of the open write
+	@param symbol - the stocks NASDAQ symbol, already upper case
+	@param kind - the kind of rule
+	@param value - the rules value, see KINDS
+	@param trendPrices - list of (market_date, market_price) tuples of the
+		symbols recorded prices, oldest first
+'''
+def watchSymbol(curs, symbol, kind, value, trendPrices):
+	curs.execute('SELECT market_date FROM alert_state WHERE symbol=?', (symbol,))
+	row = curs.fetchone()
+	
+	if(row is None):
+		marketDate = None
+		price = None
+		reference = None
+		
+		if(trendPrices):
+			marketDate, price = trendPrices[-1]
+		
+		if(len(trendPrices) > 1):
+			reference = trendPrices[-2][1]
+		
+		curs.execute('INSERT INTO alert_state VALUES (?,?,?,?)', (symbol, marketDate, price, reference))
+	else:
+		marketDate = row[0]
+	
+	if(kind in AVERAGE_KINDS):
+		#closes are the recorded prices of the days before the latest price
+		closes = [str(trendPrice) for trendDate, trendPrice in trendPrices if marketDate is None or trendDate < marketDate]
+		
+		curs.execute('''INSERT INTO alert_averages VALUES (?,?,?)
+						ON CONFLICT (symbol, days) DO NOTHING''', (symbol, value, ','.join(closes[-value:])))
+
+'''
+	stops keeping the state a removed rule needed once no other rule needs it
+	
+	@param curs - cursor of the open write
+	@param symbol - the stocks NASDAQ symbol, already upper case
+'''
+def unwatchSymbol(curs, symbol):
+	curs.execute('''DELETE FROM alert_averages WHERE symbol=? AND days NOT IN
+					(SELECT value FROM alert_rules WHERE symbol=? AND kind IN ('cross_above', 'cross_below'))''', (symbol, symbol))
+	
+	curs.execute('''DELETE FROM alert_state WHERE symbol=? AND NOT EXISTS
+					(SELECT 1 FROM alert_rules WHERE symbol=?)''', (symbol, symbol))
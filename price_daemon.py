@@ -0,0 +1,176 @@
+'''
+	Module runs the price daemon, which polls the NASDAQ website on a schedule
+	for every stock held or watched by an alert in any user database and
+	records the prices, checking the alerts as it goes. Trend
+	data is then recorded every day whether or not the user checks their
+	portfolio, and portfolio views use the polled prices instead of fetching.
+	Once the closing prices have been polled nothing is fetched again until
+	the market opens
+
+	The daemon can be started by typing "python stock_portfolio.py daemon"
+
+	@author Johnathan McNutt
+'''
+import os
+import glob
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import database_manager
+import market_calendar
+import stock_model
+
+#directory searched for user databases
+DATA_DIRECTORY = 'data'
+
+#seconds between polls
+POLL_INTERVAL = 300
+
+#number of quotes fetched at the same time
+WORKERS = 8
+
+#most quote requests started in a second across all workers
+REQUESTS_PER_SECOND = 5
+
+#longest a failing symbol is skipped for, in seconds
+MAX_BACKOFF = 3600
+
+#time the next quote request may start, shared by all workers
+_nextRequest = 0.0
+_rateLock = threading.Lock()
+
+#maps a failing symbol to (number of failures in a row, time it may be retried)
+_failures = {}
+
+'''
+	waits until the rate limit allows another quote request
+'''
+def waitForRateLimit():
+	global _nextRequest
+
+	with _rateLock:
+		now = time.monotonic()
+		start = max(now, _nextRequest)
+		_nextRequest = start + 1.0 / REQUESTS_PER_SECOND
+
+	if(start > now):
+		time.sleep(start - now)
+
+'''
+	fetches a single price for the daemon, respecting the rate limit. A failing
+	symbol is skipped for a time that doubles with every failure in a row
+
+	@param symbol - the NASDAQ stock symbol
+	@param interval - seconds between polls, the first wait after a failure
+
+	@return integer - the current price in cents, or None if it couldn't be fetched
+'''
+def fetchPrice(symbol, interval=POLL_INTERVAL):
+	failures, retryAt = _failures.get(symbol, (0, 0))
+
+	if(time.monotonic() < retryAt):
+		return None
+
+	waitForRateLimit()
+
+	try:
+		price = stock_model.getCurrentPrice(symbol, useCache=False)
+	except Exception:
+		failures += 1
+		backoff = min(MAX_BACKOFF, interval * 2 ** (failures - 1))
+		_failures[symbol] = (failures, time.monotonic() + backoff)
+		return None
+
+	_failures.pop(symbol, None)
+
+	return price
+
+'''
+	finds every user database in the data directory
+
+	@return list - paths of the database files
+'''
+def findDatabases():
+	return sorted(glob.glob(os.path.join(DATA_DIRECTORY, '*.db')))
+
+'''
+	polls the price of every held or watched stock once and records the prices
+	in each database holding or watching it
+
+	@param interval - seconds between polls, failing symbols are skipped for multiples of it
+
+	@return dictionary - number of databases, symbols polled and prices fetched,
+		and alerts, the fired price alerts as (database, alert) tuples
+'''
+def pollOnce(interval=POLL_INTERVAL):
+	#maps each database to the symbols it holds
+	holdings = {}
+
+	for database in findDatabases():
+		#brings databases made by older versions up to date
+		database_manager.migrateDatabase(database)
+
+		try:
+			holdings[database] = [entry[0] for entry in database_manager.getFullPortfolio(database)]
+		except IndexError:
+			holdings[database] = []
+
+		#symbols watched by price alerts are polled whether or not they are held
+		holdings[database] = sorted(set(holdings[database]).union(database_manager.getWatchedSymbols(database)))
+
+	#each symbol is fetched once no matter how many users hold it
+	symbols = sorted(set(symbol for held in holdings.values() for symbol in held))
+
+	prices = {}
+	if(symbols):
+		with ThreadPoolExecutor(max_workers=min(WORKERS, len(symbols))) as executor:
+			for symbol, price in zip(symbols, executor.map(fetchPrice, symbols, [interval] * len(symbols))):
+				if(price is not None):
+					prices[symbol] = price
+
+	fetchedAt = time.time()
+
+	alerts = []
+
+	#writes each databases quotes and trends as one batch
+	for database, held in holdings.items():
+		polled = [(symbol, prices[symbol]) for symbol in held if symbol in prices]
+
+		if(not polled):
+			continue
+
+		alerts.extend((database, alert) for alert in database_manager.recordQuotes(polled, fetchedAt, database))
+
+	return {'databases': len(holdings), 'symbols': len(symbols), 'fetched': len(prices), 'alerts': alerts}
+
+'''
+	polls prices every interval until stopped with ctrl-c. Polls are skipped
+	while the market is closed and the prices after the close have been polled
+
+	@param interval - seconds between the start of each poll
+'''
+def run(interval=POLL_INTERVAL):
+	print("Price daemon polling every " + str(interval) + " seconds, press ctrl-c to stop")
+
+	#time the last poll started, prices fetched after the close stay current
+	lastPoll = 0.0
+
+	try:
+		while(True):
+			start = time.monotonic()
+
+			if(market_calendar.pricesMayChange(lastPoll)):
+				lastPoll = time.time()
+
+				report = pollOnce(interval)
+
+				print(time.strftime('%Y-%m-%d %H:%M:%S') + " fetched " + str(report['fetched']) + " of " +
+						str(report['symbols']) + " symbols for " + str(report['databases']) + " databases")
+
+				for database, alert in report['alerts']:
+					print("  alert " + str(alert[0]) + " in " + database + ": " + stock_model.getAlertString(alert))
+
+			time.sleep(max(0, interval - (time.monotonic() - start)))
+	except KeyboardInterrupt:
+		print()
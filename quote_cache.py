@@ -0,0 +1,101 @@
+'''
+	Module keeps recently fetched stock prices in memory so repeated lookups of
+	the same symbol during a session don't go back to the NASDAQ website. Entries
+	expire after TTL seconds, except while the market is closed when a price
+	fetched after the close stays valid until the market opens again. The least
+	recently used symbol is evicted once the cache holds MAX_SIZE symbols
+
+	@author Johnathan McNutt
+'''
+import time
+import threading
+from collections import OrderedDict
+
+import market_calendar
+
+#seconds a cached price stays valid
+TTL = 60
+
+#maximum number of symbols held before the least recently used one is evicted
+MAX_SIZE = 1024
+
+#maps symbol to a (price, monotonic time fetched, epoch time fetched) tuple, ordered from least to most recently used
+_cache = OrderedDict()
+
+#quotes are fetched from several threads at once
+_lock = threading.Lock()
+
+#usage counters, reported by getStats
+hits = 0
+misses = 0
+evictions = 0
+
+'''
+	retrieves a cached price if it is still fresh
+
+	@param symbol - the NASDAQ stock symbol
+
+	@return integer - the cached price in cents, or None if not cached or expired
+'''
+def getPrice(symbol):
+	global hits, misses
+
+	symbol = symbol.upper()
+
+	with _lock:
+		entry = _cache.get(symbol)
+
+		#prices fetched after the market closed can't change until it opens
+		if(entry and (time.monotonic() - entry[1] < TTL or not market_calendar.pricesMayChange(entry[2]))):
+			#marks the symbol as most recently used
+			_cache.move_to_end(symbol)
+			hits += 1
+			return entry[0]
+
+		#expired entries are dropped so they don't take up space
+		if(entry):
+			del _cache[symbol]
+
+		misses += 1
+		return None
+
+'''
+	stores a freshly fetched price, evicting the least recently used symbol
+	if the cache is full
+
+	@param symbol - the NASDAQ stock symbol
+	@param price - the current price in cents
+'''
+def putPrice(symbol, price):
+	global evictions
+
+	symbol = symbol.upper()
+
+	with _lock:
+		_cache[symbol] = (price, time.monotonic(), time.time())
+		_cache.move_to_end(symbol)
+
+		while(len(_cache) > MAX_SIZE):
+			_cache.popitem(last=False)
+			evictions += 1
+
+'''
+	empties the cache and resets the usage counters
+'''
+def clear():
+	global hits, misses, evictions
+
+	with _lock:
+		_cache.clear()
+		hits = 0
+		misses = 0
+		evictions = 0
+
+'''
+	retrieves the caches usage counters
+
+	@return dictionary - hits, misses, evictions and current size of the cache
+'''
+def getStats():
+	with _lock:
+		return {'hits': hits, 'misses': misses, 'evictions': evictions, 'size': len(_cache)}
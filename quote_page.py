@@ -0,0 +1,76 @@
+'''
+	Module reads fields out of NASDAQ quote pages. Rather than building a tree of
+	the whole page, the page is fed a piece at a time to a pull parser that only
+	reports the elements the fields are kept in, and parsing stops as soon as
+	every field asked for has been found, so several fields cost a single pass
+	over the front of the page
+
+	@author Johnathan McNutt
+'''
+from lxml import etree
+
+import instrumentation
+
+#fields that can be read from a quote page, mapped to the tag and id of the element holding them
+FIELDS = {'last_sale': ('div', 'qwidget_lastsale'),
+			'market_time': ('span', 'qwidget_markettime')}
+
+#bytes of the page given to the parser at a time
+CHUNK_SIZE = 8192
+
+'''
+	reads fields from a quote page
+
+	@param content - the page as bytes or a string
+	@param fields - names of the fields to read from FIELDS, every field when not given
+
+	@return dictionary - maps each field found to its text, fields missing from
+		the page are left out
+'''
+@instrumentation.timed
+def extractFields(content, fields=None):
+	if(fields is None):
+		fields = FIELDS.keys()
+
+	#maps the id of each wanted element to its field name
+	wanted = {FIELDS[field][1]: field for field in fields}
+	tags = set(FIELDS[field][0] for field in fields)
+
+	#only the closing of the tags holding fields is reported, by then their text has been read
+	parser = etree.HTMLPullParser(events=('end',), tag=tags)
+
+	found = {}
+
+	for start in range(0, len(content), CHUNK_SIZE):
+		parser.feed(content[start:start + CHUNK_SIZE])
+
+		collectFields(parser, wanted, found)
+
+		#the rest of the page is never parsed
+		if(len(found) == len(wanted)):
+			return found
+
+	#an empty page has nothing to close
+	if(not content):
+		return found
+
+	#elements left open by the end of the page are closed here
+	parser.close()
+
+	collectFields(parser, wanted, found)
+
+	return found
+
+'''
+	records the text of the wanted elements the parser has finished reading
+
+	@param parser - the pull parser
+	@param wanted - maps the ids of the wanted elements to field names
+	@param found - maps fields already found to their text, added to
+'''
+def collectFields(parser, wanted, found):
+	for event, element in parser.read_events():
+		field = wanted.get(element.get('id'))
+
+		if(field is not None and field not in found):
+			found[field] = element.text or ''
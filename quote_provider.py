@@ -0,0 +1,197 @@
+'''
+	Module supplies stock prices to the rest of the program. A provider is any
+	object with a getPrice(symbol) method returning the price in integer cents
+	and raising ValueError for an unknown symbol. The provider in PROVIDER is
+	used for every quote, the NASDAQ scraper when none is set
+
+	Besides the scraper there is a fixture provider serving fixed prices from
+	memory, a recording provider saving every price another provider returns,
+	and a replay provider serving recorded prices back from disk, so the program
+	and its benchmarks can run without the network
+
+	@author Johnathan McNutt
+'''
+import json
+import time
+import threading
+
+import http_session
+import quote_page
+
+#base address of the NASDAQ quote pages, symbol is appended to the end
+NASDAQ_URL = 'http://www.nasdaq.com/symbol/'
+
+#provider used for every quote, None uses the NASDAQ scraper
+PROVIDER = None
+
+'''
+	converts a price shown on the NASDAQ website into cents
+	example: $1.00 would become 100
+
+	@param text - price with a leading dollar sign
+
+	@return integer - the price in cents
+'''
+def parsePrice(text):
+	#price includes dollar sign which is removed
+	price = float(text.strip()[1:])
+
+	#converts price to integer cents to keep price accurate to money
+	return int((price * 100) + .5) # .5 added to round off cents
+
+'''
+	fetches prices from the NASDAQ quote pages
+'''
+class ScraperProvider:
+	'''
+		@param url - base address of the quote pages, NASDAQ_URL when not given
+	'''
+	def __init__(self, url=None):
+		self.url = url
+
+	'''
+		@param symbol - the NASDAQ stock symbol
+
+		@return integer - the current price in cents
+	'''
+	def getPrice(self, symbol):
+		url = (self.url or NASDAQ_URL) + symbol.lower()
+
+		page = http_session.get(url)
+
+		#gets the days market price
+		fields = quote_page.extractFields(page.content, ['last_sale'])
+
+		page.close()
+
+		#makes sure information was actually collected
+		if('last_sale' not in fields):
+			raise ValueError(symbol + " is not a recognized stock symbol")
+
+		return parsePrice(fields['last_sale'])
+
+'''
+	serves fixed prices held in memory, for tests and benchmarks
+'''
+class FixtureProvider:
+	'''
+		@param prices - dictionary mapping symbols to prices in cents
+	'''
+	def __init__(self, prices=None):
+		self.prices = {}
+
+		for symbol, price in (prices or {}).items():
+			self.setPrice(symbol, price)
+
+	'''
+		@param symbol - the NASDAQ stock symbol
+		@param price - the price in cents served from now on
+	'''
+	def setPrice(self, symbol, price):
+		self.prices[symbol.upper()] = price
+
+	'''
+		@param symbol - the NASDAQ stock symbol
+
+		@return integer - the fixed price in cents
+	'''
+	def getPrice(self, symbol):
+		try:
+			return self.prices[symbol.upper()]
+		except KeyError:
+			raise ValueError(symbol + " is not a recognized stock symbol")
+
+'''
+	passes quotes through to another provider and appends every price it
+	returns to a recording file, one JSON object per line
+'''
+class RecordingProvider:
+	'''
+		@param provider - the provider the prices come from
+		@param path - location of the recording file, added to if it exists
+	'''
+	def __init__(self, provider, path):
+		self.provider = provider
+		self.path = path
+
+		#quotes are fetched from several threads at once
+		self.lock = threading.Lock()
+
+	'''
+		@param symbol - the NASDAQ stock symbol
+
+		@return integer - the price in cents from the wrapped provider
+	'''
+	def getPrice(self, symbol):
+		price = self.provider.getPrice(symbol)
+
+		line = json.dumps({'symbol': symbol.upper(), 'price': price, 'fetched_at': time.time()})
+
+		with self.lock:
+			with open(self.path, 'a') as recording:
+				recording.write(line + '\n')
+
+		return price
+
+'''
+	serves the prices saved by a recording provider. Each symbols prices are
+	served in the order they were recorded, and the last one is repeated once
+	they run out, so a replay gives the same prices every time
+'''
+class ReplayProvider:
+	'''
+		@param path - location of the recording file
+	'''
+	def __init__(self, path):
+		#maps each symbol to its recorded prices and the index of the next one served
+		self.prices = {}
+		self.positions = {}
+		self.lock = threading.Lock()
+
+		with open(path) as recording:
+			for line in recording:
+				if(line.strip()):
+					quote = json.loads(line)
+					self.prices.setdefault(quote['symbol'].upper(), []).append(quote['price'])
+
+	'''
+		@param symbol - the NASDAQ stock symbol
+
+		@return integer - the next recorded price in cents
+	'''
+	def getPrice(self, symbol):
+		symbol = symbol.upper()
+
+		if(symbol not in self.prices):
+			raise ValueError(symbol + " is not a recognized stock symbol")
+
+		prices = self.prices[symbol]
+
+		with self.lock:
+			position = self.positions.get(symbol, 0)
+			self.positions[symbol] = min(position + 1, len(prices) - 1)
+
+		return prices[position]
+
+'''
+	retrieves the provider used for quotes
+
+	@return provider - PROVIDER, or a NASDAQ scraper when it isn't set
+'''
+def getProvider():
+	global PROVIDER
+
+	if(PROVIDER is None):
+		PROVIDER = ScraperProvider()
+
+	return PROVIDER
+
+'''
+	gets a price from the current provider
+
+	@param symbol - the NASDAQ stock symbol
+
+	@return integer - the current price in cents
+'''
+def getPrice(symbol):
+	return getProvider().getPrice(symbol)
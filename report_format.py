@@ -0,0 +1,136 @@
+'''
+	Module renders the text reports. Money is formatted from integer cents with
+	a single divmod and format call, and the columns money is shown in keep the
+	padded text of the values they have already formatted, since a log repeats
+	the same prices many times. Every row of a report is laid out by a format
+	template worked out once, and reports are built as lists of pieces that are
+	joined once or written straight to a stream, never by adding to a string
+
+	@author Johnathan McNutt
+'''
+import sys
+
+#most values a money column keeps the padded text of
+DOLLARS_MEMO_SIZE = 65536
+
+#line between the header, rows and totals of a report
+SEPARATOR = "---------------------------------------------------------------------------\n"
+SHORT_SEPARATOR = "-----------------------------------------------------------------------\n"
+
+#headers and row templates of each report, money columns are padded by their DollarColumn
+PORTFOLIO_HEADER = "Stock Symbol\tQuantity Owned\tAverage Purchase\tCurrent Price\n" + SHORT_SEPARATOR
+PORTFOLIO_ROW = '{}\t\t{:>14}\t{}\t{}\n'
+
+TRANSACTION_HEADER = "Stock Symbol\tTrans Type\tQuantity\tMarket Price\tMarket Date\n" + SEPARATOR
+TRANSACTION_ROW = '{}\t\t{}\t\t{:>8}\t{}\t{}\n'
+
+TREND_HEADER = "Market Price\tMarket Date\n" + SHORT_SEPARATOR
+TREND_ROW = '{}\t{}\n'
+
+PROFIT_HEADER = "Stock Symbol\tQuantity Owned\t  Cost of Shares\t    Realized\t  Unrealized\n" + SEPARATOR
+PROFIT_ROW = '{}\t\t{:>14}\t{}\t{}\t{}\n'
+
+#number of trend rows formatted into each piece of a streamed trend report
+TREND_CHUNK_SIZE = 1000
+
+'''
+	converts a price in integer cents to a string representing common dollar representation
+	example: 123456 cents would become $1,234.56
+
+	@param cents - integer representing money in cents
+
+	@return string - the dollars string
+'''
+def formatDollars(cents):
+	if(cents < 0):
+		return '-' + formatDollars(-cents)
+
+	dollars, change = divmod(cents, 100)
+
+	return '${:,}.{:02d}'.format(dollars, change)
+
+'''
+	Class formats money right aligned to a column width, keeping the text of up
+	to DOLLARS_MEMO_SIZE values so repeated values aren't formatted again. Loops
+	over many rows can read memo directly and only call format for values not in it
+'''
+class DollarColumn:
+	'''
+		creates an empty column
+
+		@param width - number of characters the values are padded to
+	'''
+	def __init__(self, width):
+		self.width = width
+		self.memo = {}
+
+	'''
+		formats a value padded to the column width
+
+		@param cents - integer representing money in cents
+
+		@return string - the padded dollars string
+	'''
+	def format(self, cents):
+		text = self.memo.get(cents)
+
+		if(text is None):
+			text = formatDollars(cents).rjust(self.width)
+
+			if(len(self.memo) < DOLLARS_MEMO_SIZE):
+				self.memo[cents] = text
+
+		return text
+
+#columns shared by the reports, so values formatted by one report are reused by the next
+AVERAGE_COLUMN = DollarColumn(16)
+CURRENT_COLUMN = DollarColumn(13)
+PRICE_COLUMN = DollarColumn(12)
+TOTAL_COLUMN = DollarColumn(20)
+SUMMARY_COLUMN = DollarColumn(10)
+
+'''
+	formats the rows of the transaction log for a page of transactions
+
+	@param transactionList - list of (symbol, type, quantity, market_price,
+		market_date) tuples
+
+	@return string - one line for each transaction
+'''
+def formatTransactionRows(transactionList):
+	row = TRANSACTION_ROW.format
+	prices = PRICE_COLUMN.memo
+	formatPrice = PRICE_COLUMN.format
+
+	return ''.join([row(symbol, type, quantity, prices.get(price) or formatPrice(price), marketDate)
+					for symbol, type, quantity, price, marketDate in transactionList])
+
+'''
+	formats the rows of a symbols price history
+
+	@param trendsList - list of (symbol, market_price, market_date) tuples
+
+	@return string - one line for each recorded price
+'''
+def formatTrendRows(trendsList):
+	row = TREND_ROW.format
+	prices = PRICE_COLUMN.memo
+	formatPrice = PRICE_COLUMN.format
+
+	return ''.join([row(prices.get(price) or formatPrice(price), marketDate)
+					for symbol, price, marketDate in trendsList])
+
+'''
+	writes the pieces of a report to a stream as they are produced
+
+	@param pieces - a string or iterable of strings
+	@param stream - file to write to, standard output when not given
+'''
+def writeReport(pieces, stream=None):
+	if(stream is None):
+		stream = sys.stdout
+
+	if(isinstance(pieces, str)):
+		stream.write(pieces)
+	else:
+		stream.writelines(pieces)
@@ -5,51 +5,120 @@
 	
 	@author Johnathan McNutt
 '''
-from lxml import html
 import requests
 from datetime import date
 import re
 import math
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import database_manager
+import instrumentation
+import lot_tracker
+import market_calendar
+import price_alerts
+import quote_cache
+import quote_provider
+import report_format
+import trend_stats
 
-NASDAQ_MONTHS = ["null", "Jan.", "Feb.", "Mar.", "Apr.", "May", "Jun.", "Jul.", "Aug.", "Sep.", "Oct.", "Nov.", "Dec."]
+#upper bound on the number of quotes fetched at the same time
+MAX_QUOTE_WORKERS = 16
+
+#seconds a price recorded by the price daemon is used in place of fetching it
+RECORDED_QUOTE_AGE = 600
 
 '''
-	Checks the nasdaq website for the price on a specific
-	stock via symbol and returns the current price in cents
+	Checks the quote provider, the nasdaq website unless another
+	is set, for the price on a specific stock via symbol and returns
+	the current price in cents. Recently checked prices are served
+	from the quote cache
 	
 	@param symbol - stock symbol representing a companies stock
+	@param useCache - when false the cache is skipped and the price is always
+		fetched, used for the price a trade is executed at
 	
 	@return integer - the current price in cents
 '''
-def getCurrentPrice(symbol):
-	url = 'http://www.nasdaq.com/symbol/' + symbol.lower()
-
-	page = requests.get(url)
-	tree = html.fromstring(page.content)
+@instrumentation.timed
+def getCurrentPrice(symbol, useCache=True):
+	if(useCache):
+		cachedPrice = quote_cache.getPrice(symbol)
+		
+		if(cachedPrice is not None):
+			return cachedPrice
 	
-	page.close()
+	lastSale = quote_provider.getPrice(symbol)
+	
+	quote_cache.putPrice(symbol, lastSale)
+	
+	return lastSale
 
-	#gets the days market price
-	lastSale = tree.xpath('//div[@id="qwidget_lastsale"]/text()')
+'''
+	Checks the nasdaq website for the prices of several stocks at once. Quotes
+	are fetched concurrently through a bounded pool of worker threads and each
+	symbol is only fetched once no matter how often it appears
 	
-	#makes sure information was actually collected
-	if(len(lastSale) == 0):
-		raise ValueError(symbol + " is not a recognized stock symbol")
-		
-	#xpath returns lists, but only one entry for each item
-	lastSale = lastSale[0]
+	@param symbols - list of stock symbols
+	@param useCache - when false the cache is skipped for every symbol
+	
+	@return dictionary - maps each symbol to its current price in cents
+'''
+@instrumentation.timed
+def getCurrentPrices(symbols, useCache=True):
+	#removes duplicate symbols while keeping their order
+	uniqueSymbols = list(dict.fromkeys(symbols))
 	
-	#price includes dollar sign which is removed
-	lastSale = lastSale[1:]
+	if(not uniqueSymbols):
+		return {}
 	
-	#converts price to integer cents to keep price accurate to money
-	lastSale = float(lastSale)
-	lastSale = (lastSale * 100) + .5 # .5 added to round off cents
-	lastSale = int(lastSale)
+	workers = min(MAX_QUOTE_WORKERS, len(uniqueSymbols))
 	
-	return lastSale
+	with ThreadPoolExecutor(max_workers=workers) as executor:
+		prices = list(executor.map(getCurrentPrice, uniqueSymbols, [useCache] * len(uniqueSymbols)))
+	
+	return dict(zip(uniqueSymbols, prices))
+	
+'''
+	retrieves the current prices of the stocks in a portfolio. Prices recently
+	recorded by the price daemon, or recorded since the close while the market
+	is closed, are used as they are, only the rest are fetched and checked
+	against the price alerts
+	
+	@param symbols - list of stock symbols
+	@param database - path of the user database, defaults to database_manager.DATABASE
+	
+	@return dictionary - maps each symbol to its current price in cents
+'''
+@instrumentation.timed
+def getPortfolioPrices(symbols, database=None):
+	since = time.time() - RECORDED_QUOTE_AGE
+	
+	#while the market is closed any price recorded after the close is current
+	closedPeriod = market_calendar.getClosedPeriod()
+	if(closedPeriod is not None):
+		since = min(since, closedPeriod[0])
+	
+	recordedPrices = database_manager.getRecordedQuotes(since, database)
+	
+	currentPrices = {}
+	missing = []
+	
+	for symbol in symbols:
+		if(symbol in recordedPrices):
+			currentPrices[symbol] = recordedPrices[symbol]
+		else:
+			missing.append(symbol)
+	
+	fetchedPrices = getCurrentPrices(missing)
+	
+	#recorded prices were checked when the daemon recorded them
+	if(fetchedPrices):
+		database_manager.checkQuotes(list(fetchedPrices.items()), database)
+	
+	currentPrices.update(fetchedPrices)
+	
+	return currentPrices
 	
 '''
 	converts a price in integer cents to a string representing common dollar representation
@@ -60,53 +129,80 @@ def getCurrentPrice(symbol):
 	@returns string - the dollars string
 '''
 def getDollarsString(cents):
-	if(cents < 10 and cents > 0):
-		return "$0.0" + str(cents)
-	
-	if(cents < 100 and cents > 0):
-		return "$0." + str(cents)
+	return report_format.formatDollars(cents)
 
-	dollars = str(cents)[:-2]
-	change = str(cents)[-2:]
+'''
+	works out the realized and unrealized profit of every stock from its open
+	lots, reading one row of running totals per stock rather than the
+	transaction history
+	
+	@param method - accounting method the lots are closed by, 'fifo', 'lifo'
+		or 'average'
+	@param database - path of the user database, defaults to database_manager.DATABASE
 	
-	#sign is blank unless number is negative
-	sign = ''
+	@return dictionary - maps each symbol ever bought to a dictionary of the
+		quantity held, cost of the shares held, current price, realized and
+		unrealized profit, money in cents
+'''
+@instrumentation.timed
+def getProfitAndLoss(method=lot_tracker.DEFAULT_METHOD, database=None):
+	totals = database_manager.getLotTotals(method, database=database)
 	
-	#checks if the number is negative
-	if(dollars[0] == '-'):
-		sign = '-'
-		#removes minus sign to prevent it from interfering with comma placement
-		dollars = dollars[1:]
+	#only stocks still held need a current price
+	currentPrices = getPortfolioPrices([symbol for symbol, total in totals.items() if total[0] > 0], database)
 	
+	profits = {}
 	
-	#separates the dollars into sets of three for comma placement
-	dollarSegments = []
-	while(len(dollars) > 3):
-		dollarSegments.append(dollars[-3:])
-		dollars = dollars[:-3]
+	for symbol, (quantity, cost, realized) in sorted(totals.items()):
+		currentPrice = currentPrices.get(symbol)
+		
+		unrealized = 0
+		if(currentPrice is not None):
+			unrealized = quantity * currentPrice - cost
+		
+		profits[symbol] = {'quantity': quantity,
+							'cost': cost,
+							'current_price': currentPrice,
+							'realized': realized,
+							'unrealized': unrealized}
 	
-	#adds the first set of numbers
-	dollarSegments.append(dollars)
+	return profits
+
+'''
+	assembles a string of the realized and unrealized profit of every stock
 	
-	#reverses the list for correct order
-	dollarSegments = reversed(dollarSegments)
+	@param method - accounting method the lots are closed by, 'fifo', 'lifo'
+		or 'average'
+	@param database - path of the user database, defaults to database_manager.DATABASE
 	
-	#begins string construction
-	message = sign
-	message += '$'
+	@return string - profit of each stock and the totals
+'''
+@instrumentation.timed
+def getProfitAndLossString(method=lot_tracker.DEFAULT_METHOD, database=None):
+	profits = getProfitAndLoss(method, database)
 	
-	#adds commas between different magnitudes of dollars
-	for segment in dollarSegments:
-		message += segment + ','
+	if(not profits):
+		raise IndexError("no transactions made")
 	
-	#removes final comma and replaces with a decimal point
-	message = message[:-1]
-	message += '.'
+	lines = [report_format.PROFIT_HEADER]
 	
-	#adds in the left over change
-	message += change
+	totalRealized = 0
+	totalUnrealized = 0
 	
-	return message
+	for symbol, profit in profits.items():
+		lines.append(report_format.PROFIT_ROW.format(symbol, profit['quantity'],
+													report_format.AVERAGE_COLUMN.format(profit['cost']),
+													report_format.PRICE_COLUMN.format(profit['realized']),
+													report_format.PRICE_COLUMN.format(profit['unrealized'])))
+		
+		totalRealized += profit['realized']
+		totalUnrealized += profit['unrealized']
+	
+	lines.append(report_format.SEPARATOR)
+	lines.append("  Realized Profit (" + method + "):\t" + report_format.TOTAL_COLUMN.format(totalRealized) + "\n")
+	lines.append("  Unrealized Profit:\t\t" + report_format.TOTAL_COLUMN.format(totalUnrealized) + "\n")
+	
+	return ''.join(lines)
 
 '''
 	Checks the NASDAQ current price of stock by symbol and then allows the
@@ -118,9 +214,13 @@ def buyStock():
 	print()
 	
 	try:
-		price = getCurrentPrice(symbol)
+		#trades always execute at a freshly fetched price
+		price = getCurrentPrice(symbol, useCache=False)
 		dollarsPrice = getDollarsString(price)
 		
+		#alerts fire even if the user decides not to trade
+		database_manager.checkQuotes([(symbol, price)])
+		
 		print("Stock price is " + dollarsPrice + " per share")
 		
 		quantity = input("How many shares would you like to purchase? ")
@@ -129,16 +229,15 @@ def buyStock():
 			quantity = int(quantity)
 		
 			if(quantity > 0):
-				database_manager.addStockToPortfolio(symbol, quantity)
-				database_manager.addTransaction(symbol, 'buy', quantity, price, date.today())
-				database_manager.addTrend(symbol, price, date.today())
+				database_manager.executeTrade(symbol, 'buy', quantity, price, date.today())
 			else:
 				print()
 				print("cannot buy zero or less stocks")
 		else:
 			print()
 			print("quantity must be a positive whole number")
-	except requests.exceptions.ConnectionError:
+	except requests.exceptions.RequestException:
+		#connection failures and timeouts of the quote session alike
 		print("Couldn't connect to stock information. Please check internet connection")
 	except ValueError:
 		print("No stock information found for symbol " + symbol.upper())
@@ -153,9 +252,13 @@ def sellStock():
 	print()
 	
 	try:
-		price = getCurrentPrice(symbol)
+		#trades always execute at a freshly fetched price
+		price = getCurrentPrice(symbol, useCache=False)
 		dollarsPrice = getDollarsString(price)
 		
+		#alerts fire even if the user decides not to trade
+		database_manager.checkQuotes([(symbol, price)])
+		
 		quantity_owned = database_manager.getAmountOwned(symbol.upper())
 		
 		print("Stock price is " + dollarsPrice + " per share")
@@ -167,9 +270,7 @@ def sellStock():
 			quantity = int(quantity)
 			
 			if(quantity_owned >= quantity and quantity > 0):
-				database_manager.removeStockFromPortfolio(symbol, quantity)
-				database_manager.addTransaction(symbol, 'sell', quantity, price, date.today())
-				database_manager.addTrend(symbol, price, date.today())
+				database_manager.executeTrade(symbol, 'sell', quantity, price, date.today())
 			elif(quantity <= 0):
 				print()
 				print("Cannot sell zero or less stock")
@@ -179,209 +280,282 @@ def sellStock():
 		else:
 			print()
 			print("quantity must be a positive whole number")
-	except requests.exceptions.ConnectionError:
+	except requests.exceptions.RequestException:
+		#connection failures and timeouts of the quote session alike
 		print("Couldn't connect to stock information. Please check internet connection")
 	except ValueError:
 		print("No stock information found for symbol " + symbol.upper())
 	
 '''
-	checks the NASDAQ websites current date against the computer clock date
-	if they match returns true otherwise returns false
+	buys or sells stock at a freshly fetched price without asking the user,
+	used for scripted trades
 	
-	@return boolean - whether dates match
-'''
-def checkDate():
-	url = 'http://www.nasdaq.com/symbol/goog'
+	@param symbol - the stocks NASDAQ symbol
+	@param side - either 'buy' or 'sell'
+	@param quantity - amount of stock to buy or sell
+	@param database - path of the user database, defaults to database_manager.DATABASE
 	
-	page = requests.get(url)
-	tree = html.fromstring(page.content)
+	@return dictionary - the recorded trade's symbol, type, quantity, market_price
+		and market_date
+'''
+@instrumentation.timed
+def makeTrade(symbol, side, quantity, database=None):
+	if(quantity <= 0):
+		raise ValueError("quantity must be a positive whole number")
 	
-	page.close()
+	#trades always execute at a freshly fetched price
+	price = getCurrentPrice(symbol, useCache=False)
 	
-	#gets today's market date
-	marketDate = tree.xpath('//span[@id="qwidget_markettime"]/text()')
-	marketDate = marketDate[0]
+	#alerts fire even if the trade is turned down
+	database_manager.checkQuotes([(symbol, price)], database)
 	
-	day = date.today().day
-	month = date.today().month
-	year = date.today().year
+	marketDate = date.today()
 	
-	#organizes the computer date in the same schema as NASDAQ website
-	computerDate = NASDAQ_MONTHS[month] + " " + str(day) + ", " + str(year)
+	database_manager.executeTrade(symbol, side, quantity, price, marketDate, database)
 	
-	matching = re.match(computerDate, marketDate)
+	return {'symbol': symbol.upper(), 'type': side, 'quantity': quantity,
+			'market_price': price, 'market_date': marketDate.isoformat()}
 	
-	if(matching):
-		return True
-		
-	return False
+'''
+	checks the current trading date against the computer clock date, worked out
+	from the market calendar. If they match returns true otherwise returns false
 	
+	@return boolean - whether dates match
 '''
-	assembles a string containing information on the users portfolio
+def checkDate():
+	return market_calendar.getTradingDate() == date.today()
 	
-	@return string - data about portfolio
 '''
-def getPortfolioString():
-	message = "Stock Symbol\tQuantity Owned\tAverage Purchase\tCurrent Price\n"
-	message += "-----------------------------------------------------------------------\n"
+	gathers the figures shown in the portfolio view and records the current
+	price of every held stock
+	
+	@param database - path of the user database, defaults to database_manager.DATABASE
 	
-	portfolioList = database_manager.getFullPortfolio()
+	@return dictionary - holdings, a list of dictionaries with each symbol, quantity,
+		average_price and current_price, and the portfolio totals sold, value,
+		gross_profit, cost and net_profit, money in cents
+'''
+@instrumentation.timed
+def getPortfolioData(database=None):
+	portfolioList = database_manager.getFullPortfolio(database)
 	
 	#checks if portfolio is empty
 	if(not portfolioList):
 		raise IndexError("portfolio is empty")
 	
-	i = 0
-	for i in range(0, len(portfolioList)):
-		symbol = portfolioList[i][0]
-		
-		quantity = portfolioList[i][1]
-		quantityString = '{:>14}'.format(str(quantity))
-		
-		averagePrice = getAveragePrice(symbol)
-		averagePriceString = '{:>16}'.format(getDollarsString(averagePrice))
-		
-		currentPrice = getCurrentPrice(symbol)
-		currentPriceString = '{:>13}'.format(getDollarsString(currentPrice))
-		
-		database_manager.addTrend(symbol, currentPrice, date.today())
-		
-		message += symbol + '\t\t' + quantityString + '\t' + averagePriceString + '\t' + currentPriceString + '\n'
-		
-	message += "-----------------------------------------------------------------------\n"
+	#fetches every quote once up front, reused for the portfolio value below
+	currentPrices = getPortfolioPrices([entry[0] for entry in portfolioList], database)
+	
+	averagePrices = getAveragePrices(database)
+	
+	holdings = []
 	
-	portfolioValue = getPortfolioCurrentValue()
-	portfolioValueString = '{:>20}'.format(getDollarsString(portfolioValue))
+	for symbol, quantity in portfolioList:
+		holdings.append({'symbol': symbol,
+						'quantity': quantity,
+						'average_price': averagePrices.get(symbol, 0),
+						'current_price': currentPrices[symbol]})
 	
-	sellTransactionTotal = getSellTransactionTotalValue()
-	sellTransactionTotalString = '{:>20}'.format(getDollarsString(sellTransactionTotal))
+	#records the price of every held stock in one write, under the trading date the prices belong to
+	tradingDate = market_calendar.getTradingDate()
+	database_manager.addTrends([(symbol, price, tradingDate) for symbol, price in currentPrices.items()], database)
 	
-	buyTransactionTotal = getBuyTransactionTotalValue()
-	buyTransactionTotalString = '{:>20}'.format(getDollarsString(buyTransactionTotal))
+	portfolioValue = getPortfolioCurrentValue(currentPrices, database)
+	
+	sellTransactionTotal = getSellTransactionTotalValue(database)
+	
+	buyTransactionTotal = getBuyTransactionTotalValue(database)
 	
 	grossProfit = portfolioValue + sellTransactionTotal
-	grossProfitString = '{:>20}'.format(getDollarsString(grossProfit))
 	
 	netProfit = grossProfit - buyTransactionTotal
-	netProfitString = '{:>20}'.format(getDollarsString(netProfit))
 	
-	message += "  Total value of stocks sold:\t" + sellTransactionTotalString + "\n"
-	message += "+ Today's portfolio value:\t" + portfolioValueString + "\n"
-	message += "-----------------------------------------------------------------------\n"
-	message += "  Gross Profit:\t\t\t" + grossProfitString + "\n"
-	message += "- Total cost of stocks:\t\t" + buyTransactionTotalString + "\n"
-	message += "-----------------------------------------------------------------------\n"
-	message += "  Net Profit:\t\t\t" + netProfitString + "\n"
+	return {'holdings': holdings,
+			'sold': sellTransactionTotal,
+			'value': portfolioValue,
+			'gross_profit': grossProfit,
+			'cost': buyTransactionTotal,
+			'net_profit': netProfit}
+
+'''
+	assembles a string containing information on the users portfolio
+	
+	@param database - path of the user database, defaults to database_manager.DATABASE
+	
+	@return string - data about portfolio
+'''
+@instrumentation.timed
+def getPortfolioString(database=None):
+	portfolio = getPortfolioData(database)
+	
+	lines = [report_format.PORTFOLIO_HEADER]
+	
+	for holding in portfolio['holdings']:
+		lines.append(report_format.PORTFOLIO_ROW.format(holding['symbol'], holding['quantity'],
+														report_format.AVERAGE_COLUMN.format(holding['average_price']),
+														report_format.CURRENT_COLUMN.format(holding['current_price'])))
 	
-	return message
+	total = report_format.TOTAL_COLUMN.format
+	
+	lines.append(report_format.SHORT_SEPARATOR)
+	lines.append("  Total value of stocks sold:\t" + total(portfolio['sold']) + "\n")
+	lines.append("+ Today's portfolio value:\t" + total(portfolio['value']) + "\n")
+	lines.append(report_format.SHORT_SEPARATOR)
+	lines.append("  Gross Profit:\t\t\t" + total(portfolio['gross_profit']) + "\n")
+	lines.append("- Total cost of stocks:\t\t" + total(portfolio['cost']) + "\n")
+	lines.append(report_format.SHORT_SEPARATOR)
+	lines.append("  Net Profit:\t\t\t" + total(portfolio['net_profit']) + "\n")
+	
+	return ''.join(lines)
 
 '''
 	assembles a string containing information on the users transaction history
 	
+	@param database - path of the user database, defaults to database_manager.DATABASE
+	
 	@return string - data about transactions
 '''
-def getTransactionString():
-	message = "Stock Symbol\tTrans Type\tQuantity\tMarket Price\tMarket Date\n"
+@instrumentation.timed
+def getTransactionString(database=None):
+	return ''.join(iterTransactionString(database=database))
+
+'''
+	assembles the users transaction history a page at a time, so the first
+	lines can be shown before the whole history has been read
 	
-	message += "---------------------------------------------------------------------------\n"
+	@param symbol - optional NASDAQ stock symbol to limit the log to
+	@param type - optional transaction type, either 'buy' or 'sell'
+	@param startDate - optional first market date to include
+	@param endDate - optional last market date to include
+	@param database - path of the user database, defaults to database_manager.DATABASE
 	
-	transactionList = database_manager.getAllTransactions()
+	@return generator - yields pieces of the transaction log string
+'''
+@instrumentation.timed
+def iterTransactionString(symbol=None, type=None, startDate=None, endDate=None, database=None):
+	pages = database_manager.iterTransactions(symbol, type, startDate, endDate, database=database)
 	
-	if(not transactionList):
-		raise Exception("no transactions made")
+	#reads the first page before any output so an empty log can be reported
+	firstPage = next(pages, None)
 	
-	i = 0
-	for i in range(0, len(transactionList)):
-		symbol = transactionList[i][0]
-		
-		type = transactionList[i][1]
-		
-		quantity = transactionList[i][2]
-		quantityString = '{:>8}'.format(str(quantity))
-		
-		price = transactionList[i][3]
-		priceString = '{:>12}'.format(getDollarsString(price))
-		
-		marketDate = transactionList[i][4]
-		
-		message += symbol + '\t\t' + type + '\t\t' + quantityString + '\t' + priceString + '\t' + marketDate + '\n'
+	if(not firstPage):
+		raise IndexError("no transactions made")
 	
-	message += "---------------------------------------------------------------------------\n"
+	yield report_format.TRANSACTION_HEADER
 	
-	return message
+	yield getTransactionRowsString(firstPage)
+	
+	for page in pages:
+		yield getTransactionRowsString(page)
+	
+	yield report_format.SEPARATOR
+
+'''
+	assembles the lines of the transaction log for a page of transactions
+	
+	@param transactionList - list of transactions
+	
+	@return string - one line for each transaction
+'''
+def getTransactionRowsString(transactionList):
+	return report_format.formatTransactionRows(transactionList)
 	
 '''
 	constructs a string displaying information on a stocks price over time by symbol
 	
 	@param symbol - the NASDAQ stock symbol
+	@param database - path of the user database, defaults to database_manager.DATABASE
 	
 	@return string - data from the trends table
 '''
-def getSymbolTrendsString(symbol):
-	message = "Market Price\tMarket Date\n"
+@instrumentation.timed
+def getSymbolTrendsString(symbol, database=None):
+	return ''.join(iterSymbolTrendsString(symbol, database))
+
+'''
+	assembles a stocks price history a chunk of rows at a time, so long
+	histories can be written out as they are formatted
 	
-	message += "-----------------------------------------------------------------------\n"
+	@param symbol - the NASDAQ stock symbol
+	@param database - path of the user database, defaults to database_manager.DATABASE
 	
-	trendsList = database_manager.getSymbolTrends(symbol)
+	@return generator - yields pieces of the trends string
+'''
+@instrumentation.timed
+def iterSymbolTrendsString(symbol, database=None):
+	trendsList = database_manager.getSymbolTrends(symbol, database)
 	
 	if(not trendsList):
 		raise Exception("no trends recorded for symbol " + symbol)
 	
-	#a starting value lower than any possible unit stock price
-	highestPrice = 0
-	#a starting value higher than any possible unit stock price
-	lowestPrice = 999999999
+	yield report_format.TREND_HEADER
 	
-	sum = 0
-	count = 0
+	for start in range(0, len(trendsList), report_format.TREND_CHUNK_SIZE):
+		yield report_format.formatTrendRows(trendsList[start:start + report_format.TREND_CHUNK_SIZE])
 	
-	i = 0
-	for i in range(0, len(trendsList)):
-		marketPrice = trendsList[i][1]
-		marketPriceString = '{:>12}'.format(getDollarsString(marketPrice))
-		
-		marketDate = trendsList[i][2]
-		
-		message += marketPriceString + '\t' + marketDate + '\n'
-		
-		if(marketPrice > highestPrice):
-			highestPrice = marketPrice
-		
-		if(marketPrice < lowestPrice):
-			lowestPrice = marketPrice
-			
-		sum += marketPrice
-		
-		count += 1
-		
-	message += "-----------------------------------------------------------------------\n"
+	yield report_format.SHORT_SEPARATOR
 	
-	highestPriceString = '{:>10}'.format(getDollarsString(highestPrice))
-	lowestPriceString = '{:>10}'.format(getDollarsString(lowestPrice))
+	#high, low and average are calculated by the database
+	summary = trend_stats.getSummary(symbol, database=database)
 	
-	averagePrice = math.ceil(sum/count)
-	averagePriceString = '{:>10}'.format(getDollarsString(averagePrice))
+	yield ("Highest Price:\t" + report_format.SUMMARY_COLUMN.format(summary['high']) + '\n' +
+			"Lowest Price:\t" + report_format.SUMMARY_COLUMN.format(summary['low']) + '\n' +
+			"Average Price:\t" + report_format.SUMMARY_COLUMN.format(summary['average']) + '\n')
 	
-	message += "Highest Price:\t" + highestPriceString + '\n'
-	message += "Lowest Price:\t" + lowestPriceString + '\n'
-	message += "Average Price:\t" + averagePriceString + '\n'
-		
-	return message
-		
-		
+'''
+	constructs a string of a stocks price statistics over a range of dates,
+	worked out without listing the prices
+	
+	@param symbol - the NASDAQ stock symbol
+	@param startDate - optional first market date to include
+	@param endDate - optional last market date to include
+	@param window - number of prices in the moving average
+	@param database - path of the user database, defaults to database_manager.DATABASE
 	
+	@return string - the statistics
+'''
+@instrumentation.timed
+def getSymbolStatisticsString(symbol, startDate=None, endDate=None, window=20, database=None):
+	statistics = trend_stats.getStatistics(symbol, startDate, endDate, window, database)
+	
+	movingAverage = "not enough prices"
+	if(statistics['moving_average'] is not None):
+		movingAverage = report_format.SUMMARY_COLUMN.format(statistics['moving_average'])
+	
+	return (symbol.upper() + " from " + statistics['start_date'] + " to " + statistics['end_date'] + ", " +
+			str(statistics['count']) + " prices\n" + report_format.SHORT_SEPARATOR +
+			"Highest Price:\t" + report_format.SUMMARY_COLUMN.format(statistics['high']) + '\n' +
+			"Lowest Price:\t" + report_format.SUMMARY_COLUMN.format(statistics['low']) + '\n' +
+			"Average Price:\t" + report_format.SUMMARY_COLUMN.format(statistics['average']) + '\n' +
+			str(window) + " Day Average:\t" + movingAverage + '\n' +
+			"Volatility:\t" + '{:>9.2%}'.format(statistics['volatility']) + " a year\n" +
+			"Max Drawdown:\t" + '{:>9.2%}'.format(statistics['max_drawdown']) + " from " +
+			statistics['drawdown_peak'] + " to " + statistics['drawdown_trough'] + '\n')
+
 '''
 	retrieves the current value of the portfolio if all stocks were sold today
 	
+	@param currentPrices - optional dictionary of already fetched prices by symbol,
+		any symbol missing from it is fetched
+	@param database - path of the user database, defaults to database_manager.DATABASE
+	
 	@returns integer - the portfolios total value in cents
 '''
-def getPortfolioCurrentValue():
-	portfolio = database_manager.getFullPortfolio()
+@instrumentation.timed
+def getPortfolioCurrentValue(currentPrices=None, database=None):
+	portfolio = database_manager.getFullPortfolio(database)
 	
 	#returns 0 if portfolio is empty
 	if(not portfolio):
 		return 0
 	
+	if(currentPrices is None):
+		currentPrices = {}
+	
+	#fetches any prices that were not passed in as a single batch
+	missing = [entry[0] for entry in portfolio if entry[0] not in currentPrices]
+	currentPrices = dict(currentPrices, **getCurrentPrices(missing))
+	
 	sum = 0
 	
 	i = 0
@@ -389,7 +563,7 @@ def getPortfolioCurrentValue():
 		symbol = portfolio[i][0]
 		quantity = portfolio[i][1]
 		
-		currentPrice = getCurrentPrice(symbol)
+		currentPrice = currentPrices[symbol]
 		
 		sum += quantity * currentPrice
 		
@@ -398,76 +572,168 @@ def getPortfolioCurrentValue():
 '''
 	retrieves the total value of all buy transactions
 	
+	@param database - path of the user database, defaults to database_manager.DATABASE
+	
 	@return integer - the buy sum in cents
 '''
-def getBuyTransactionTotalValue():
-	try:
-		buyList = database_manager.getBuyTransactions()
-	#returns 0 if no transactions made
-	except IndexError:
-		return 0
+def getBuyTransactionTotalValue(database=None):
+	costBasis = database_manager.getCostBasis(database=database)
 	
-	sum = 0
-	
-	i = 0
-	for i in range(0, len(buyList)):
-		quantity = buyList[i][2]
-		price = buyList[i][3]
-		
-		sum += quantity * price
-		
-	return sum
+	return sum(totals[1] for totals in costBasis.values())
 	
 '''
 	retrieves the total value of all sell transactions
 	
+	@param database - path of the user database, defaults to database_manager.DATABASE
+	
 	@return integer - the sell sum in cents
 '''
-def getSellTransactionTotalValue():
-	try:
-		sellList = database_manager.getSellTransactions()
-	#returns 0 if no transactions made
-	except IndexError:
-		return 0
+def getSellTransactionTotalValue(database=None):
+	costBasis = database_manager.getCostBasis(database=database)
 	
-	sum = 0
-	
-	i = 0
-	for i in range(0, len(sellList)):
-		quantity = sellList[i][2]
-		price = sellList[i][3]
-		
-		sum += quantity * price
-		
-	return sum
+	return sum(totals[3] for totals in costBasis.values())
 	
 '''
-	averages the price of all transactions by summing the quantity * price and
-	dividing by the sum of all the quantities
+	averages the price of all transactions by dividing the total cost of a
+	stock by the number of shares bought
 	
 	@param symbol - the stocks NASDAQ symbol
+	@param database - path of the user database, defaults to database_manager.DATABASE
 	
 	@return integer - the average price in cents
 '''
-def getAveragePrice(symbol):
-	priceList = database_manager.getSymbolBuyTransactions(symbol)
+def getAveragePrice(symbol, database=None):
+	costBasis = database_manager.getCostBasis(symbol, database)
+	
+	totals = costBasis.get(symbol.upper())
+	
+	if(not totals or totals[0] == 0):
+		raise IndexError("no transactions made")
+	
+	averagePrice = math.ceil(totals[1]/totals[0])
+		
+	return averagePrice
 
-	#returns 0 if no transactions made
-	if(not priceList):
-		return 0
+'''
+	averages the purchase price of every stock symbol bought, read from the
+	cost basis kept for each symbol
 	
-	#the numerator in the average equation
-	sum = 0
-	#the denominator in the average equation
-	count = 0
+	@param database - path of the user database, defaults to database_manager.DATABASE
 	
-	i = 0
-	for i in range(0, len(priceList)):
-		#adds the quantity times the price
-		sum += priceList[i][0] * priceList[i][1]
-		#adds the quantity
-		count += priceList[i][0]
+	@return dictionary - maps each symbol to its average price in cents
+'''
+@instrumentation.timed
+def getAveragePrices(database=None):
+	costBasis = database_manager.getCostBasis(database=database)
+	
+	averagePrices = {}
+	
+	for symbol, totals in costBasis.items():
+		#symbols that were only ever sold have no purchase price
+		if(totals[0] > 0):
+			averagePrices[symbol] = math.ceil(totals[1]/totals[0])
+	
+	return averagePrices
+
+'''
+	converts the value of a price alert rule typed by the user into the value
+	stored, dollars for above and below, a percentage for move and a number of
+	days for the moving average crosses
+	example: above 110.50 would become 11050
+	
+	@param kind - one of price_alerts.KINDS
+	@param text - the value as typed
+	
+	@return integer - the rules value
+'''
+def getAlertValue(kind, text):
+	text = text.strip().lstrip('$').rstrip('%').replace(',', '')
+	
+	if(kind in price_alerts.AVERAGE_KINDS):
+		return int(text)
+	
+	#dollars become cents and percentages become basis points
+	return int(float(text) * 100 + .5)
+
+'''
+	describes the condition of a price alert rule
+	
+	@param kind - one of price_alerts.KINDS
+	@param value - the rules value
+	
+	@return string - the condition, such as "above $110.50"
+'''
+def getAlertRuleString(kind, value):
+	if(kind == 'above' or kind == 'below'):
+		return kind + " " + getDollarsString(value)
+	
+	if(kind == 'move'):
+		return "moves " + '{:.2f}'.format(value / 100) + "% from the previous close"
+	
+	if(kind == 'cross_above'):
+		return "crosses above the " + str(value) + " day moving average"
+	
+	return "crosses below the " + str(value) + " day moving average"
+
+'''
+	describes a fired price alert
+	
+	@param alert - (rule, symbol, kind, value, market_price, market_date,
+		triggered_at) tuple
+	
+	@return string - what happened, such as "AAPL above $110.50 at $111.00 on 2020-01-02"
+'''
+def getAlertString(alert):
+	rule, symbol, kind, value, price, marketDate, triggeredAt = alert
+	
+	return symbol + " " + getAlertRuleString(kind, value) + " at " + getDollarsString(price) + " on " + marketDate
+
+'''
+	assembles a string of the users price alert rules
+	
+	@param symbol - optional NASDAQ stock symbol to limit the rules to
+	@param database - path of the user database, defaults to database_manager.DATABASE
+	
+	@return string - one line for each rule
+'''
+@instrumentation.timed
+def getAlertRulesString(symbol=None, database=None):
+	rules = database_manager.getAlertRules(symbol, database)
+	
+	if(not rules):
+		raise IndexError("no alert rules set")
+	
+	lines = ["Rule\tStock Symbol\tCondition\n", report_format.SHORT_SEPARATOR]
+	
+	for rule, ruleSymbol, kind, value, active in rules:
+		line = str(rule) + '\t' + ruleSymbol + '\t\t' + getAlertRuleString(kind, value)
 		
-	averagePrice = math.ceil(sum/count)
+		if(active):
+			line += " (condition met)"
 		
-	return averagePrice
\ No newline at end of file
+		lines.append(line + '\n')
+	
+	return ''.join(lines)
+
+'''
+	assembles a string of the most recently fired price alerts
+	
+	@param limit - most alerts shown
+	@param database - path of the user database, defaults to database_manager.DATABASE
+	
+	@return string - one line for each alert, newest first
+'''
+@instrumentation.timed
+def getAlertEventsString(limit=50, database=None):
+	alerts = database_manager.getAlertEvents(limit, database)
+	
+	if(not alerts):
+		raise IndexError("no alerts fired")
+	
+	lines = []
+	
+	for alert in alerts:
+		lines.append(time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(alert[6])) + '\trule ' + str(alert[0]) +
+					'\t' + getAlertString(alert) + '\n')
+	
+	return ''.join(lines)
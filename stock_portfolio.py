@@ -1,9 +1,11 @@
 '''
 	Driver class for stock portfolio program, used for basic start update
+	and for running commands without the interactive menu
 	
 	@author Johnathan McNutt
 '''
-from user_control import stock_program
+import sys
+import command_line
 
-#begins the program
-stock_program()
\ No newline at end of file
+#runs the interactive menu unless a command such as "portfolio" or "daemon" is given
+sys.exit(command_line.main(sys.argv[1:]))
@@ -0,0 +1,53 @@
+'''
+	Base test case giving each test a new user database in a temporary
+	directory, with quotes served from fixed prices instead of the network
+
+	@author Johnathan McNutt
+'''
+import os
+import shutil
+import tempfile
+import unittest
+
+import database_manager
+import quote_cache
+import quote_provider
+
+class DatabaseTestCase(unittest.TestCase):
+	#file name of the database made for each test, None to leave it to the test
+	DATABASE_NAME = 'test.db'
+
+	#prices in cents served by the fixture provider
+	PRICES = {}
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.database = None
+
+		if(self.DATABASE_NAME is not None):
+			self.database = self.makeDatabase(self.DATABASE_NAME)
+
+		self.scraper = quote_provider.PROVIDER
+		self.provider = quote_provider.FixtureProvider(self.PRICES)
+		quote_provider.PROVIDER = self.provider
+		quote_cache.clear()
+
+	def tearDown(self):
+		quote_provider.PROVIDER = self.scraper
+		quote_cache.clear()
+		database_manager.USE_TREND_STORE = False
+		database_manager.closeConnections()
+		shutil.rmtree(self.directory)
+
+	'''
+		creates another empty user database in the test directory
+
+		@param name - file name of the database
+
+		@return string - path of the database
+	'''
+	def makeDatabase(self, name):
+		database = os.path.join(self.directory, name)
+		database_manager.createDatabase(database)
+
+		return database
@@ -0,0 +1,125 @@
+'''
+	Tests checking price alerts on every path prices arrive by
+
+	@author Johnathan McNutt
+'''
+import time
+import sqlite3
+import threading
+import unittest
+
+import database_manager
+import price_alerts
+import stock_model
+from tests.database_test_case import DatabaseTestCase
+
+class AlertTest(DatabaseTestCase):
+	PRICES = {'AAPL': 10000}
+
+	'''
+		@return list - (rule, kind) of every fired alert, oldest first
+	'''
+	def getFired(self):
+		return [(event[0], event[2]) for event in reversed(database_manager.getAlertEvents(database=self.database))]
+
+	def testTrendStoreFiresAlerts(self):
+		database_manager.USE_TREND_STORE = True
+
+		rule = database_manager.addAlertRule('AAPL', 'above', 15000, self.database)
+
+		self.assertEqual(database_manager.addTrend('AAPL', 14000, '2024-01-02', self.database), [])
+
+		fired = database_manager.addTrends([('AAPL', 15500, '2024-01-03')], self.database)
+
+		self.assertEqual([alert[0] for alert in fired], [rule])
+		self.assertEqual(self.getFired(), [(rule, 'above')])
+
+	def testFetchedQuotesFireAlerts(self):
+		database_manager.executeTrade('AAPL', 'buy', 5, 10000, '2024-01-02', self.database)
+		rule = database_manager.addAlertRule('AAPL', 'above', 12000, self.database)
+
+		self.provider.setPrice('AAPL', 12500)
+		stock_model.getPortfolioPrices(['AAPL'], self.database)
+
+		self.assertEqual(self.getFired(), [(rule, 'above')])
+
+		#the condition has to clear before the rule fires again
+		fired = database_manager.recordQuotes([('AAPL', 11000)], time.time(), self.database)
+		self.assertEqual(fired, [])
+
+		fired = database_manager.recordQuotes([('AAPL', 13000)], time.time(), self.database)
+		self.assertEqual([alert[0] for alert in fired], [rule])
+
+	def testRulesFromOtherConnections(self):
+		database_manager.addTrend('AAPL', 10000, '2024-01-02', self.database)
+
+		#a rule written by another program is counted by the alert table triggers
+		conn = sqlite3.connect(self.database)
+		with conn:
+			conn.execute('''INSERT INTO alert_rules (symbol, kind, value) VALUES ('AAPL', 'below', 9000)''')
+		conn.close()
+
+		fired = database_manager.addTrend('AAPL', 8500, '2024-01-03', self.database)
+		self.assertEqual([alert[2] for alert in fired], ['below'])
+
+		#another thread has its own connection, prices it records are seen by this one
+		rule = database_manager.addAlertRule('AAPL', 'above', 12000, self.database)
+
+		thread = threading.Thread(target=lambda: (database_manager.addTrend('AAPL', 12500, '2024-01-04', self.database),
+												database_manager.closeConnections()))
+		thread.start()
+		thread.join()
+
+		self.assertEqual(database_manager.addTrend('AAPL', 12600, '2024-01-04', self.database), [])
+		self.assertEqual(self.getFired()[-1], (rule, 'above'))
+
+	def testWritesElsewhereDontReload(self):
+		database_manager.addAlertRule('AAPL', 'above', 12000, self.database)
+		database_manager.addTrend('AAPL', 10000, '2024-01-02', self.database)
+
+		engine = price_alerts.getEngine(self.database)
+		loads = []
+		load = engine.load
+		engine.load = lambda curs: (loads.append(curs), load(curs))
+
+		#two threads take turns recording prices and trading through their own connections
+		def record(first):
+			for day in range(first, 20, 2):
+				database_manager.addTrend('AAPL', 10000 + day, '2024-02-' + '{:02d}'.format(day + 1), self.database)
+				database_manager.executeTrade('MSFT', 'buy', 1, 5000, '2024-02-01', self.database)
+
+			database_manager.closeConnections()
+
+		threads = [threading.Thread(target=record, args=(first,)) for first in (0, 1)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+
+		self.assertEqual(loads, [])
+
+	def testDaemonQuotesAreCheckedOnce(self):
+		rule = database_manager.addAlertRule('AAPL', 'above', 12000, self.database)
+
+		engine = price_alerts.getEngine(self.database)
+		checks = []
+		checkPrices = engine.checkPrices
+		engine.checkPrices = lambda curs, priceList: (checks.append(priceList), checkPrices(curs, priceList))[1]
+
+		fired = database_manager.recordQuotes([('AAPL', 12500)], time.time(), self.database)
+
+		self.assertEqual([alert[0] for alert in fired], [rule])
+		self.assertEqual(len(checks), 1)
+		self.assertEqual([trend[1] for trend in database_manager.getSymbolTrends('AAPL', self.database)], [12500])
+
+	def testRejectedTradeChecksAlerts(self):
+		rule = database_manager.addAlertRule('AAPL', 'above', 9000, self.database)
+
+		#nothing is held to sell
+		with self.assertRaises(IndexError):
+			stock_model.makeTrade('AAPL', 'sell', 5, self.database)
+
+		self.assertEqual(self.getFired(), [(rule, 'above')])
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,33 @@
+'''
+	Tests many users trading on shared databases from their own threads at the
+	same time, with and without the write queues
+
+	@author Johnathan McNutt
+'''
+import unittest
+
+import benchmark
+
+class ConcurrentUsersTest(unittest.TestCase):
+	'''
+		runs the users and checks no write hit a locked database and every
+		database still agrees with its transaction history
+
+		@param useWriteQueue - whether writes go through the write queues
+	'''
+	def checkConcurrentUsers(self, useWriteQueue):
+		report = benchmark.runConcurrentUsers(16, 2, 50, useWriteQueue)
+
+		self.assertGreater(report['buy'], 0)
+		self.assertGreater(report['sell'], 0)
+		self.assertEqual(report['locked'], 0)
+		self.assertEqual(report['inconsistent'], [])
+
+	def testWriteQueue(self):
+		self.checkConcurrentUsers(True)
+
+	def testConnectionPerThread(self):
+		self.checkConcurrentUsers(False)
+
+if __name__ == '__main__':
+	unittest.main()
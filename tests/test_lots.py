@@ -0,0 +1,114 @@
+'''
+	Tests that the lots kept up to date by every trade match the lots worked out
+	by replaying the whole transaction history
+
+	@author Johnathan McNutt
+'''
+import random
+import unittest
+from datetime import date, timedelta
+
+import database_manager
+import lot_tracker
+import stock_model
+from tests.database_test_case import DatabaseTestCase
+
+SYMBOLS = ('AAPL', 'MSFT', 'BRK-B', 'SYM0')
+
+class LotTest(DatabaseTestCase):
+	PRICES = {symbol: 10000 + 1000 * i for i, symbol in enumerate(SYMBOLS)}
+
+	'''
+		makes random trades through executeTrade, including sells of more than
+		is held that must be rejected without changing anything
+
+		@param count - number of trades
+		@param seed - seed of the random generator
+
+		@return list - the recorded trades as (symbol, type, quantity,
+			market_price, market_date) tuples in order
+	'''
+	def makeTrades(self, count, seed):
+		generator = random.Random(seed)
+		held = dict.fromkeys(SYMBOLS, 0)
+		ledger = []
+
+		marketDate = date(2020, 1, 2)
+
+		for i in range(0, count):
+			symbol = generator.choice(SYMBOLS)
+			price = generator.randint(5000, 20000)
+
+			if(generator.random() < 0.3):
+				marketDate += timedelta(days=1)
+
+			if(held[symbol] > 0 and generator.random() < 0.45):
+				quantity = generator.randint(1, held[symbol])
+				type = 'sell'
+			elif(generator.random() < 0.05):
+				with self.assertRaises(Exception):
+					database_manager.executeTrade(symbol, 'sell', held[symbol] + 1, price, marketDate, self.database)
+
+				continue
+			else:
+				quantity = generator.randint(1, 50)
+				type = 'buy'
+
+			database_manager.executeTrade(symbol, type, quantity, price, marketDate, self.database)
+
+			if(type == 'buy'):
+				held[symbol] += quantity
+			else:
+				held[symbol] -= quantity
+
+			ledger.append((symbol, type, quantity, price, marketDate.isoformat()))
+
+		return ledger
+
+	def testTradesMatchReplay(self):
+		ledger = self.makeTrades(2000, 7)
+
+		self.assertEqual(database_manager.checkLots(self.database), [])
+		self.assertEqual(database_manager.checkCostBasis(self.database), [])
+
+		lotList, totalList = lot_tracker.replayTransactions(ledger)
+
+		for method in lot_tracker.METHODS:
+			expected = {symbol: (quantity, cost, realized) for totalMethod, symbol, quantity, cost, realized in totalList
+						if totalMethod == method}
+
+			profits = stock_model.getProfitAndLoss(method, self.database)
+
+			self.assertEqual(sorted(profits), sorted(expected))
+
+			for symbol, (quantity, cost, realized) in expected.items():
+				self.assertEqual(profits[symbol]['quantity'], quantity)
+				self.assertEqual(profits[symbol]['realized'], realized)
+
+				#stocks no longer held have no current price to measure against
+				if(quantity > 0):
+					self.assertEqual(profits[symbol]['unrealized'], quantity * self.PRICES[symbol] - cost)
+
+			self.assertEqual(sum(profit['realized'] for profit in profits.values()),
+							sum(total[4] for total in totalList if total[0] == method))
+
+		#the open lots stored by the trades are the ones the replay leaves
+		for method in lot_tracker.LOT_METHODS:
+			for symbol in SYMBOLS:
+				self.assertEqual(database_manager.getOpenLots(symbol, method, self.database),
+								[lot[2:] for lot in lotList if lot[0] == method and lot[1] == symbol])
+
+	def testRebuildMatchesTrades(self):
+		self.makeTrades(500, 11)
+
+		before = {method: database_manager.getLotTotals(method, database=self.database) for method in lot_tracker.METHODS}
+
+		database_manager.rebuildLots(self.database)
+
+		for method in lot_tracker.METHODS:
+			self.assertEqual(database_manager.getLotTotals(method, database=self.database), before[method])
+
+		self.assertEqual(database_manager.checkLots(self.database), [])
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,64 @@
+'''
+	Tests the market calendar against fixed dates of the NYSE schedule
+
+	@author Johnathan McNutt
+'''
+import unittest
+from datetime import date, datetime
+
+import market_calendar
+
+'''
+	finds the time of a moment in New York
+
+	@return float - seconds since the epoch
+'''
+def getMarketTimestamp(year, month, day, hour, minute=0):
+	return datetime(year, month, day, hour, minute, tzinfo=market_calendar.TIMEZONE).timestamp()
+
+class MarketCalendarTest(unittest.TestCase):
+	def testEaster(self):
+		for year, easter in ((2000, date(2000, 4, 23)), (2019, date(2019, 4, 21)), (2024, date(2024, 3, 31)),
+								(2025, date(2025, 4, 20)), (2038, date(2038, 4, 25)), (2285, date(2285, 3, 22))):
+			self.assertEqual(market_calendar.getEaster(year), easter)
+
+		self.assertEqual(market_calendar.getHolidays(2024)[date(2024, 3, 29)], "Good Friday")
+		self.assertFalse(market_calendar.isTradingDay(date(2025, 4, 18)))
+
+	def testObservedHolidays(self):
+		#Saturday holidays close the Friday before and Sunday holidays the Monday after
+		for closed in (date(2026, 7, 3), date(2022, 12, 26), date(2023, 1, 2), date(2022, 6, 20)):
+			self.assertFalse(market_calendar.isTradingDay(closed))
+
+		#a new year's day on Saturday leaves the Friday before open
+		self.assertTrue(market_calendar.isTradingDay(date(2021, 12, 31)))
+
+		#Juneteenth is a holiday from 2022
+		self.assertTrue(market_calendar.isTradingDay(date(2021, 6, 18)))
+
+		self.assertEqual(market_calendar.getPreviousTradingDay(date(2022, 12, 27)), date(2022, 12, 23))
+		self.assertEqual(market_calendar.getNextTradingDay(date(2026, 7, 2)), date(2026, 7, 6))
+
+	def testEarlyCloses(self):
+		self.assertEqual(market_calendar.getEarlyCloses(2024), {date(2024, 7, 3), date(2024, 11, 29), date(2024, 12, 24)})
+
+		#weekend days and July 3rd observed as Independence Day don't close early
+		self.assertEqual(market_calendar.getEarlyCloses(2022), {date(2022, 11, 25)})
+		self.assertNotIn(date(2026, 7, 3), market_calendar.getEarlyCloses(2026))
+
+		self.assertEqual(market_calendar.getSessionTimes(date(2024, 11, 29)),
+						(getMarketTimestamp(2024, 11, 29, 9, 30), getMarketTimestamp(2024, 11, 29, 13)))
+
+		self.assertTrue(market_calendar.isMarketOpen(getMarketTimestamp(2024, 11, 29, 12, 59)))
+		self.assertFalse(market_calendar.isMarketOpen(getMarketTimestamp(2024, 11, 29, 13, 1)))
+
+	def testTradingDate(self):
+		#before Tuesdays open after Martin Luther King Jr. Day prices are still Fridays
+		self.assertEqual(market_calendar.getTradingDate(getMarketTimestamp(2024, 1, 16, 9)), date(2024, 1, 12))
+		self.assertEqual(market_calendar.getTradingDate(getMarketTimestamp(2024, 1, 16, 9, 30)), date(2024, 1, 16))
+
+		self.assertEqual(market_calendar.getClosedPeriod(getMarketTimestamp(2024, 1, 13, 12)),
+						(getMarketTimestamp(2024, 1, 12, 16), getMarketTimestamp(2024, 1, 16, 9, 30)))
+
+if __name__ == '__main__':
+	unittest.main()
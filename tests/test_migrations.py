@@ -0,0 +1,80 @@
+'''
+	Tests the schema migrations against a copy of the example database, which
+	was made before any migration existed
+
+	@author Johnathan McNutt
+'''
+import os
+import shutil
+import sqlite3
+import unittest
+
+import database_manager
+from tests.database_test_case import DatabaseTestCase
+
+EXAMPLE_DATABASE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'example.db')
+
+class MigrationTest(DatabaseTestCase):
+	DATABASE_NAME = None
+
+	def setUp(self):
+		super().setUp()
+
+		self.database = os.path.join(self.directory, 'example.db')
+		shutil.copyfile(EXAMPLE_DATABASE, self.database)
+
+	'''
+		retrieves the query plan sqlite picks for a query
+
+		@param query - the SQL query
+		@param parameters - the query parameters
+
+		@return string - every step of the plan, one per line
+	'''
+	def getPlan(self, query, parameters):
+		conn = sqlite3.connect(self.database)
+
+		try:
+			return '\n'.join(row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + query, parameters))
+		finally:
+			conn.close()
+
+	def testMigratesExampleDatabase(self):
+		conn = sqlite3.connect(self.database)
+		counts = [conn.execute('SELECT COUNT(*) FROM ' + table).fetchone()[0] for table in ('portfolio', 'transactions', 'trends')]
+		conn.close()
+
+		self.assertEqual(database_manager.migrateDatabase(self.database), len(database_manager.MIGRATIONS))
+
+		#a second run finds nothing left to do
+		self.assertEqual(database_manager.migrateDatabase(self.database), len(database_manager.MIGRATIONS))
+
+		conn = sqlite3.connect(self.database)
+		self.assertEqual(conn.execute('PRAGMA user_version').fetchone()[0], len(database_manager.MIGRATIONS))
+		self.assertEqual([conn.execute('SELECT COUNT(*) FROM ' + table).fetchone()[0] for table in ('portfolio', 'transactions')], counts[:2])
+		self.assertLessEqual(conn.execute('SELECT COUNT(*) FROM trends').fetchone()[0], counts[2])
+		conn.close()
+
+		#tables filled from the transaction history agree with it
+		self.assertEqual(database_manager.checkCostBasis(self.database), [])
+		self.assertEqual(database_manager.checkLots(self.database), [])
+
+	def testQueriesUseIndexes(self):
+		database_manager.migrateDatabase(self.database)
+
+		plan = self.getPlan('''SELECT market_price, market_date FROM trends
+								WHERE symbol=? AND market_date>=? ORDER BY market_date''', ('AAPL', '2020-01-01'))
+		self.assertIn('trends_symbol_date', plan)
+		self.assertNotIn('TEMP B-TREE', plan)
+
+		plan = self.getPlan('''SELECT quantity, market_price FROM transactions
+								WHERE symbol=? AND type="buy"''', ('AAPL',))
+		self.assertIn('transactions_symbol_type', plan)
+
+		plan = self.getPlan('''SELECT * FROM transactions
+								WHERE market_date>=? AND market_date<=? ORDER BY market_date''', ('2020-01-01', '2020-12-31'))
+		self.assertIn('transactions_date', plan)
+		self.assertNotIn('TEMP B-TREE', plan)
+
+if __name__ == '__main__':
+	unittest.main()
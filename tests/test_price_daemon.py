@@ -0,0 +1,37 @@
+'''
+	Tests the price daemon fetching quotes
+
+	@author Johnathan McNutt
+'''
+import time
+import unittest
+
+import price_daemon
+from tests.database_test_case import DatabaseTestCase
+
+class PriceDaemonTest(DatabaseTestCase):
+	PRICES = {'AAPL': 10000}
+
+	def tearDown(self):
+		price_daemon._failures.clear()
+		super().tearDown()
+
+	def testBackoffFollowsInterval(self):
+		for failures, backoff in ((1, 10), (2, 20), (3, 40)):
+			#the symbol is due to be retried
+			price_daemon._failures['MISSING'] = (failures - 1, 0)
+
+			self.assertIsNone(price_daemon.fetchPrice('MISSING', 10))
+
+			count, retryAt = price_daemon._failures['MISSING']
+			self.assertEqual(count, failures)
+			self.assertAlmostEqual(retryAt - time.monotonic(), backoff, delta=1)
+
+		#skipped without fetching until the backoff is over
+		self.assertIsNone(price_daemon.fetchPrice('MISSING', 10))
+		self.assertEqual(price_daemon._failures['MISSING'][0], 3)
+
+		self.assertEqual(price_daemon.fetchPrice('AAPL', 10), 10000)
+
+if __name__ == '__main__':
+	unittest.main()
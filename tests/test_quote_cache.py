@@ -0,0 +1,86 @@
+'''
+	Tests keeping fetched prices in the quote cache, with the clock under the
+	tests control
+
+	@author Johnathan McNutt
+'''
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import market_calendar
+import quote_cache
+import stock_model
+from tests.database_test_case import DatabaseTestCase
+
+'''
+	finds the time of a moment in New York
+
+	@return float - seconds since the epoch
+'''
+def getMarketTimestamp(year, month, day, hour, minute=0):
+	return datetime(year, month, day, hour, minute, tzinfo=market_calendar.TIMEZONE).timestamp()
+
+class QuoteCacheTest(DatabaseTestCase):
+	DATABASE_NAME = None
+
+	PRICES = {'AAPL': 10000, 'MSFT': 20000}
+
+	def setUp(self):
+		super().setUp()
+
+		#a Wednesday morning while the market is open
+		self.now = getMarketTimestamp(2024, 1, 10, 10)
+
+		for name in ('time', 'monotonic'):
+			patcher = mock.patch('time.' + name, side_effect=lambda: self.now)
+			patcher.start()
+			self.addCleanup(patcher.stop)
+
+	def testEntriesExpire(self):
+		quote_cache.putPrice('aapl', 10000)
+
+		self.now += quote_cache.TTL - 1
+		self.assertEqual(quote_cache.getPrice('AAPL'), 10000)
+
+		self.now += 2
+		self.assertIsNone(quote_cache.getPrice('AAPL'))
+		self.assertEqual(quote_cache.getStats(), {'hits': 1, 'misses': 1, 'evictions': 0, 'size': 0})
+
+	def testClosingPricesLastUntilOpen(self):
+		#a Friday evening, the market next opens on Tuesday after Martin Luther King Jr. Day
+		self.now = getMarketTimestamp(2024, 1, 12, 17)
+		quote_cache.putPrice('AAPL', 10000)
+
+		self.now = getMarketTimestamp(2024, 1, 16, 9, 29)
+		self.assertEqual(quote_cache.getPrice('AAPL'), 10000)
+
+		self.now = getMarketTimestamp(2024, 1, 16, 9, 31)
+		self.assertIsNone(quote_cache.getPrice('AAPL'))
+
+	def testLeastRecentlyUsedIsEvicted(self):
+		with mock.patch.object(quote_cache, 'MAX_SIZE', 3):
+			for symbol in ('A', 'B', 'C'):
+				quote_cache.putPrice(symbol, 100)
+
+			#using A leaves B the least recently used
+			quote_cache.getPrice('A')
+			quote_cache.putPrice('D', 100)
+
+			self.assertIsNone(quote_cache.getPrice('B'))
+			self.assertEqual([quote_cache.getPrice(symbol) for symbol in ('A', 'C', 'D')], [100, 100, 100])
+			self.assertEqual(quote_cache.getStats()['evictions'], 1)
+
+	def testBypassingCache(self):
+		self.assertEqual(stock_model.getCurrentPrice('AAPL'), 10000)
+
+		self.provider.setPrice('AAPL', 10500)
+
+		self.assertEqual(stock_model.getCurrentPrice('AAPL'), 10000)
+		self.assertEqual(stock_model.getCurrentPrice('AAPL', useCache=False), 10500)
+
+		#the fresh price replaces the cached one
+		self.assertEqual(stock_model.getCurrentPrice('AAPL'), 10500)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,51 @@
+'''
+	Tests money formatting of the reports, and that prices read from quote
+	pages come back out as the same text
+
+	@author Johnathan McNutt
+'''
+import unittest
+from unittest import mock
+
+import quote_provider
+import report_format
+
+class ReportFormatTest(unittest.TestCase):
+	def testFormatDollars(self):
+		for cents, text in ((0, '$0.00'), (5, '$0.05'), (99, '$0.99'), (100, '$1.00'),
+							(123456, '$1,234.56'), (123456789, '$1,234,567.89')):
+			self.assertEqual(report_format.formatDollars(cents), text)
+
+	def testNegativeDollars(self):
+		for cents, text in ((-5, '-$0.05'), (-99, '-$0.99'), (-100, '-$1.00'), (-123456, '-$1,234.56')):
+			self.assertEqual(report_format.formatDollars(cents), text)
+
+	def testParsedPricesRound(self):
+		#prices like 0.29 and 1.15 aren't exact as floats and must round to the nearest cent
+		for text in ('$0.01', '$0.29', '$1.15', '$4.35', '$999.99', '$0.07'):
+			self.assertEqual(report_format.formatDollars(quote_provider.parsePrice(text)), text)
+
+		self.assertEqual(quote_provider.parsePrice('$10.005'), 1001)
+		self.assertEqual(quote_provider.parsePrice('$10.0049'), 1000)
+
+	def testDollarColumn(self):
+		column = report_format.DollarColumn(10)
+
+		self.assertEqual(column.format(123456), ' $1,234.56')
+		self.assertEqual(column.format(-5), '    -$0.05')
+
+		#values wider than the column aren't cut
+		self.assertEqual(column.format(123456789), '$1,234,567.89')
+		self.assertEqual(column.memo[-5], '    -$0.05')
+
+	def testDollarColumnMemoLimit(self):
+		column = report_format.DollarColumn(8)
+
+		with mock.patch.object(report_format, 'DOLLARS_MEMO_SIZE', 2):
+			for cents in range(4):
+				self.assertEqual(column.format(cents), '   $0.0' + str(cents))
+
+		self.assertEqual(sorted(column.memo), [0, 1])
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,37 @@
+'''
+	Tests measuring the returns of a portfolio
+
+	@author Johnathan McNutt
+'''
+import unittest
+
+import database_manager
+import portfolio_history
+from tests.database_test_case import DatabaseTestCase
+
+class ReturnsTest(DatabaseTestCase):
+	def testLargeShortGainIsNotAnnualized(self):
+		database_manager.executeTrade('AAPL', 'buy', 1, 100, '2024-01-02', self.database)
+		database_manager.addTrend('AAPL', 100000, '2024-01-03', self.database)
+
+		returns = portfolio_history.getReturns(None, '2024-01-03', self.database)
+
+		self.assertAlmostEqual(returns['time_weighted'], 999.0)
+		self.assertIsNone(returns['time_weighted_annual'])
+
+	def testAnnualReturn(self):
+		database_manager.executeTrade('AAPL', 'buy', 1, 10000, '2022-01-03', self.database)
+		database_manager.addTrend('AAPL', 12100, '2024-01-03', self.database)
+
+		returns = portfolio_history.getReturns(None, '2024-01-03', self.database)
+
+		self.assertAlmostEqual(returns['time_weighted'], 0.21)
+		self.assertAlmostEqual(returns['time_weighted_annual'], 1.21 ** (365 / 730) - 1)
+
+	def testAnnualReturnLimits(self):
+		self.assertIsNone(portfolio_history.getAnnualReturn(0.5, portfolio_history.MIN_ANNUAL_DAYS - 1))
+		self.assertEqual(portfolio_history.getAnnualReturn(-1.0, 400), -1.0)
+		self.assertAlmostEqual(portfolio_history.getAnnualReturn(0.5, 365), 0.5)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,93 @@
+'''
+	Tests importing trade history from broker exports
+
+	@author Johnathan McNutt
+'''
+import os
+import unittest
+
+import database_manager
+import trade_import
+from tests.database_test_case import DatabaseTestCase
+
+HEADER = "symbol,type,quantity,market_price,market_date\n"
+
+class TradeImportTest(DatabaseTestCase):
+	'''
+		writes an import file in the test directory
+
+		@param name - file name, its extension picks the format
+		@param content - text or bytes of the file
+
+		@return string - path of the file
+	'''
+	def writeFile(self, name, content):
+		path = os.path.join(self.directory, name)
+
+		if(isinstance(content, str)):
+			content = content.encode('utf-8')
+
+		with open(path, 'wb') as file:
+			file.write(content)
+
+		return path
+
+	def testInvalidRowsAreSkipped(self):
+		path = self.writeFile('trades.csv', HEADER +
+								"AAPL,buy,10,10000,2024-01-02\n" +
+								"AA PL,buy,10,10000,2024-01-02\n" +
+								"BRK-B,buy,0,10000,2024-01-02\n" +
+								"MSFT,buy,-3,10000,2024-01-02\n" +
+								"MSFT,buy,3,-1,2024-01-02\n" +
+								"MSFT,buy,3,ten,2024-01-02\n" +
+								"MSFT,hold,3,100,2024-01-02\n" +
+								"MSFT,buy,3,100,2024-13-02\n" +
+								"brk.b,buy,2,30000,2024-01-03\n")
+
+		report = trade_import.importTrades(path, database=self.database)
+
+		self.assertEqual((report['imported'], report['skipped'], report['duplicates']), (2, 7, 0))
+		self.assertEqual([error.split(':')[0] for error in report['errors']],
+						['line ' + str(line) for line in range(3, 10)])
+		self.assertIn("invalid symbol", report['errors'][0])
+		self.assertIn("quantity must be a positive whole number", report['errors'][1])
+		self.assertIn("market price cannot be negative", report['errors'][3])
+
+		self.assertEqual(database_manager.getFullPortfolio(self.database), [('AAPL', 10), ('BRK.B', 2)])
+
+	def testRecordedTradesAreDuplicates(self):
+		first = self.writeFile('first.jsonl',
+								'{"symbol": "AAPL", "type": "buy", "quantity": 5, "market_price": 10000, "market_date": "2024-01-02"}\n' +
+								'{"symbol": "AAPL", "type": "buy", "quantity": 5, "market_price": 10000, "market_date": "2024-01-02"}\n')
+
+		report = trade_import.importTrades(first, database=self.database)
+		self.assertEqual((report['imported'], report['duplicates']), (2, 0))
+
+		#an overlapping export holds the two recorded trades, a third identical one and a sell
+		second = self.writeFile('second.csv', HEADER +
+								"AAPL,buy,5,10000,2024-01-02\n" * 3 +
+								"AAPL,sell,4,11000,2024-01-05\n")
+
+		report = trade_import.importTrades(second, database=self.database)
+
+		self.assertEqual((report['imported'], report['duplicates']), (2, 2))
+		self.assertEqual(report['errors'], ["line 2: trade is already recorded", "line 3: trade is already recorded"])
+
+		self.assertEqual(database_manager.getAmountOwned('AAPL', self.database), 11)
+		self.assertEqual(database_manager.checkCostBasis(self.database), [])
+		self.assertEqual(database_manager.checkLots(self.database), [])
+
+	def testFailedImportRecordsNothing(self):
+		database_manager.executeTrade('AAPL', 'buy', 1, 10000, '2024-01-02', self.database)
+
+		#the last line can't be read, after many chunks were already written
+		path = self.writeFile('trades.csv', (HEADER + "MSFT,buy,1,100,2024-01-02\n" * 2000).encode('ascii') + b"MSFT,buy,1,\xff\xfe,2024-01-02\n")
+
+		with self.assertRaises(UnicodeDecodeError):
+			trade_import.importTrades(path, chunkSize=2, database=self.database)
+
+		self.assertEqual(len(database_manager.getAllTransactions(self.database)), 1)
+		self.assertEqual(database_manager.getFullPortfolio(self.database), [('AAPL', 1)])
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,51 @@
+'''
+	Tests recording trades and the prices they were made at
+
+	@author Johnathan McNutt
+'''
+import io
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import requests
+
+import database_manager
+import market_calendar
+import stock_model
+from tests.database_test_case import DatabaseTestCase
+
+class TradeTest(DatabaseTestCase):
+
+	def testTrendUsesTradingDate(self):
+		#before Tuesdays open after Martin Luther King Jr. Day in New York the trading date is still Friday
+		now = datetime(2024, 1, 16, 9, tzinfo=market_calendar.TIMEZONE).timestamp()
+
+		with mock.patch('time.time', return_value=now):
+			database_manager.executeTrade('AAPL', 'buy', 5, 10000, '2024-01-16', self.database)
+
+		#a portfolio view records the same trading date, so the day has one price
+		database_manager.addTrend('AAPL', 10100, '2024-01-12', self.database)
+
+		self.assertEqual(database_manager.getSymbolTrends('AAPL', self.database), [('AAPL', 10000, '2024-01-12')])
+		self.assertEqual(database_manager.getAllTransactions(self.database)[0][4], '2024-01-16')
+
+	def testBackdatedTradeKeepsItsDate(self):
+		database_manager.executeTrade('AAPL', 'buy', 5, 10000, '2020-01-02', self.database)
+
+		self.assertEqual(database_manager.getSymbolTrends('AAPL', self.database), [('AAPL', 10000, '2020-01-02')])
+
+	def testMenuTradesSurviveTimeouts(self):
+		def timeOut(symbol):
+			raise requests.exceptions.ReadTimeout("read timed out")
+
+		self.provider.getPrice = timeOut
+
+		for trade in (stock_model.buyStock, stock_model.sellStock):
+			with mock.patch('builtins.input', return_value='AAPL'), mock.patch('sys.stdout', new_callable=io.StringIO) as output:
+				trade()
+
+			self.assertIn("Couldn't connect to stock information", output.getvalue())
+
+if __name__ == '__main__':
+	unittest.main()
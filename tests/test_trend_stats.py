@@ -0,0 +1,29 @@
+'''
+	Tests reading recorded dates for the trend statistics
+
+	@author Johnathan McNutt
+'''
+import unittest
+
+import numpy as np
+
+import trend_stats
+
+class ParseDatesTest(unittest.TestCase):
+	def testFixedWidthDates(self):
+		dates = trend_stats.parseDates('2024-01-03,2023-12-31,2024-02-29')
+
+		self.assertEqual(list(dates), list(np.array(['2024-01-03', '2023-12-31', '2024-02-29'], dtype='datetime64[D]')))
+
+	def testDatesWithoutPadding(self):
+		dates = trend_stats.parseDates('2024-1-3,2024-01-03 10:00:00,2024-12-9')
+
+		self.assertEqual(list(dates.astype(str)), ['2024-01-03', '2024-01-03', '2024-12-09'])
+
+	def testBadDatesRaise(self):
+		for text in ('2024-02-30', '2024-13-01', '2024/01/03', '20240103xx', ''):
+			with self.assertRaises(ValueError):
+				trend_stats.parseDates(text)
+
+if __name__ == '__main__':
+	unittest.main()
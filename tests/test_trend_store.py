@@ -0,0 +1,125 @@
+'''
+	Tests keeping recorded prices in the columnar trend store
+
+	@author Johnathan McNutt
+'''
+import os
+import sqlite3
+import unittest
+import multiprocessing
+
+import database_manager
+import trend_stats
+import trend_store
+from tests.database_test_case import DatabaseTestCase
+
+class TrendStoreTest(DatabaseTestCase):
+	DATABASE_NAME = 'first.db'
+
+	def setUp(self):
+		super().setUp()
+
+		self.first = self.database
+		self.second = self.makeDatabase('second.db')
+
+	def testStoreLoadsTrendsTable(self):
+		trendList = [('AAPL', 10000 + i, '2024-01-' + '{:02d}'.format(i)) for i in range(1, 31)]
+		database_manager.addTrends(trendList + [('MSFT', 30000, '2024-01-02')], self.first)
+
+		expected = database_manager.getSymbolTrends('AAPL', self.first)
+
+		database_manager.USE_TREND_STORE = True
+
+		self.assertEqual(database_manager.getSymbolTrends('AAPL', self.first), expected)
+		self.assertEqual(database_manager.getSymbolTrends('MSFT', self.first), [('MSFT', 30000, '2024-01-02')])
+		self.assertEqual(trend_stats.getSummary('AAPL', '2024-01-10', '2024-01-19', self.first)['count'], 10)
+
+		#new prices go to the store, the days already loaded keep their price
+		database_manager.addTrends([('AAPL', 1, '2024-01-05'), ('AAPL', 20000, '2024-02-01')], self.first)
+
+		trendsList = database_manager.getSymbolTrends('AAPL', self.first)
+		self.assertEqual(len(trendsList), 31)
+		self.assertEqual(trendsList[4], ('AAPL', 10005, '2024-01-05'))
+		self.assertEqual(trendsList[-1], ('AAPL', 20000, '2024-02-01'))
+
+	def testStoresAreKeptPerDatabase(self):
+		database_manager.USE_TREND_STORE = True
+
+		for database in (self.first, self.second):
+			database_manager.addTrends([('AAPL', 10000, '2024-01-02'), ('AAPL', 10100, '2024-01-03')], database)
+
+		self.assertNotEqual(database_manager.getTrendStore(self.first), database_manager.getTrendStore(self.second))
+
+		database_manager.removeSymbolTrend('AAPL', self.first)
+		database_manager.removeTrend('AAPL', '2024-01-02', self.second)
+
+		with self.assertRaises(IndexError):
+			database_manager.getSymbolTrends('AAPL', self.first)
+
+		self.assertEqual(database_manager.getSymbolTrends('AAPL', self.second), [('AAPL', 10100, '2024-01-03')])
+
+	def testStoreStaysInUse(self):
+		database_manager.addTrends([('AAPL', 10000, '2024-01-02')], self.first)
+
+		database_manager.USE_TREND_STORE = True
+		database_manager.getTrendStore(self.first)
+		database_manager.USE_TREND_STORE = False
+
+		#prices recorded with the setting off still go to the store the database uses
+		database_manager.addTrend('AAPL', 10100, '2024-01-03', self.first)
+		database_manager.executeTrade('AAPL', 'buy', 1, 10200, '2024-01-04', self.first)
+		database_manager.removeTrend('AAPL', '2024-01-02', self.first)
+
+		self.assertTrue(database_manager.usesTrendStore(self.first))
+		self.assertFalse(database_manager.usesTrendStore(self.second))
+		self.assertEqual(database_manager.getSymbolTrends('AAPL', self.first),
+						[('AAPL', 10100, '2024-01-03'), ('AAPL', 10200, '2024-01-04')])
+
+		days, cents = trend_store.readAll(database_manager.getTrendStorePath(self.first), 'AAPL')
+		self.assertEqual(cents.tolist(), [10100, 10200])
+
+	def testMigrationFindsExistingStore(self):
+		os.mkdir(database_manager.getTrendStorePath(self.second))
+		database_manager.closeConnections()
+
+		#databases made before the location was recorded
+		for database in (self.first, self.second):
+			conn = sqlite3.connect(database)
+			conn.execute('DROP TABLE trend_location')
+			conn.execute('PRAGMA user_version = 6')
+			conn.close()
+
+			database_manager.migrateDatabase(database)
+
+		self.assertFalse(database_manager.usesTrendStore(self.first))
+		self.assertTrue(database_manager.usesTrendStore(self.second))
+
+	def testProcessesShareStore(self):
+		directory = database_manager.getTrendStorePath(self.first)
+
+		#each process records every fourth day in reverse, so most writes rewrite the files
+		processes = [multiprocessing.Process(target=appendDays, args=(directory, first)) for first in range(0, 4)]
+		for process in processes:
+			process.start()
+		for process in processes:
+			process.join()
+			self.assertEqual(process.exitcode, 0)
+
+		days, cents = trend_store.readAll(directory, 'AAPL')
+
+		self.assertEqual(len(days), 200)
+		self.assertEqual(days.tolist(), list(range(19000, 19200)))
+		self.assertEqual(cents.tolist(), [day * 10 for day in range(19000, 19200)])
+
+'''
+	records prices in a store from another process
+
+	@param directory - the store directory
+	@param first - offset of the first day recorded
+'''
+def appendDays(directory, first):
+	for day in reversed(range(19000 + first, 19200, 4)):
+		trend_store.append(directory, 'AAPL', day * 10, trend_store.fromDay(day))
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,192 @@
+'''
+	Module imports trade history from a broker export into a users database.
+	Files are read one row at a time and written in chunks, so memory use stays
+	the same no matter how many rows are imported. Once all rows are in, the
+	portfolio quantities, cost basis and lots are rebuilt from the transaction history
+
+	Invalid rows and trades the ledger already holds are skipped and reported.
+	Everything else is imported in a single write, so an import that fails part
+	way, for example on an unreadable line, leaves the database as it was
+
+	Files can be CSV with a header row or JSONL with one object per line, both using
+	the fields symbol, type, quantity, market_price (in cents) and market_date (YYYY-MM-DD)
+
+	An import can be started by typing "python trade_import.py <username> <file>"
+
+	@author Johnathan McNutt
+'''
+import re
+import sys
+import csv
+import json
+import time
+from datetime import date
+
+import database_manager
+import user_control
+
+#number of rows written per transaction
+CHUNK_SIZE = 10000
+
+#number of invalid rows whose error messages are kept for the report
+MAX_ERRORS_REPORTED = 20
+
+'''
+	reads the rows of an import file one at a time, the format is picked
+	from the file extension
+
+	@param path - location of the .csv or .jsonl file
+
+	@return generator - yields (line number, row dictionary) pairs
+'''
+def readRows(path):
+	with open(path, newline='') as file:
+		if(path.lower().endswith('.csv')):
+			reader = csv.DictReader(file)
+
+			for row in reader:
+				yield reader.line_num, row
+		else:
+			lineNumber = 0
+			for line in file:
+				lineNumber += 1
+
+				#skips blank lines
+				if(not line.strip()):
+					continue
+
+				try:
+					yield lineNumber, json.loads(line)
+				except ValueError:
+					yield lineNumber, None
+
+'''
+	checks that a row describes a valid trade and converts it into the
+	transaction table layout
+
+	@param row - dictionary of the rows fields
+
+	@return tuple - (symbol, type, quantity, market_price, market_date)
+'''
+def validateRow(row):
+	if(not isinstance(row, dict)):
+		raise ValueError("row is not a record")
+
+	symbol = str(row.get('symbol') or '').strip().upper()
+	if(not re.match('^[A-Z0-9.\\-]+$', symbol)):
+		raise ValueError("invalid symbol " + repr(row.get('symbol')))
+
+	type = str(row.get('type') or '').strip().lower()
+	if(type != 'buy' and type != 'sell'):
+		raise ValueError("type must be buy or sell")
+
+	quantity = int(row.get('quantity'))
+	if(quantity <= 0):
+		raise ValueError("quantity must be a positive whole number")
+
+	price = int(row.get('market_price'))
+	if(price < 0):
+		raise ValueError("market price cannot be negative")
+
+	#normalizes the date so the ledger sorts correctly
+	marketDate = date.fromisoformat(str(row.get('market_date')).strip()).isoformat()
+
+	return (symbol, type, quantity, price, marketDate)
+
+'''
+	reads the valid rows of a file in chunks, counting and keeping the errors
+	of the rows that are skipped
+
+	@param path - location of the .csv or .jsonl file
+	@param chunkSize - number of rows in each chunk
+	@param report - dictionary whose skipped count and errors list are added to
+
+	@return generator - yields lists of (line number, symbol, type, quantity,
+		market_price, market_date) tuples
+'''
+def readChunks(path, chunkSize, report):
+	chunk = []
+
+	for lineNumber, row in readRows(path):
+		try:
+			chunk.append((lineNumber,) + validateRow(row))
+		except (ValueError, TypeError) as error:
+			report['skipped'] += 1
+
+			if(len(report['errors']) < MAX_ERRORS_REPORTED):
+				report['errors'].append("line " + str(lineNumber) + ": " + str(error))
+
+			continue
+
+		if(len(chunk) >= chunkSize):
+			yield chunk
+			chunk = []
+
+	if(chunk):
+		yield chunk
+
+'''
+	imports all valid rows of a file into a users database. Invalid rows and
+	trades the ledger already holds are skipped and reported, and nothing is
+	imported if the file can't be read to the end
+
+	@param path - location of the .csv or .jsonl file
+	@param chunkSize - number of rows written at a time
+	@param database - path of the user database, defaults to database_manager.DATABASE
+
+	@return dictionary - imported, skipped and duplicate row counts, error
+		messages, elapsed seconds and rows imported per second
+'''
+def importTrades(path, chunkSize=CHUNK_SIZE, database=None):
+	start = time.perf_counter()
+
+	report = {'skipped': 0, 'errors': []}
+
+	imported, duplicates, duplicateLines = database_manager.importTransactions(readChunks(path, chunkSize, report),
+																				MAX_ERRORS_REPORTED, database)
+
+	for lineNumber in duplicateLines[:MAX_ERRORS_REPORTED - len(report['errors'])]:
+		report['errors'].append("line " + str(lineNumber) + ": trade is already recorded")
+
+	elapsed = time.perf_counter() - start
+
+	rate = 0
+	if(elapsed > 0):
+		rate = imported / elapsed
+
+	return {'imported': imported, 'skipped': report['skipped'], 'duplicates': duplicates, 'errors': report['errors'],
+			'seconds': elapsed, 'rows_per_second': rate}
+
+'''
+	imports a file into a users database from the command line
+'''
+def main():
+	if(len(sys.argv) != 3):
+		print("usage: python trade_import.py <username> <file>")
+		sys.exit(1)
+
+	username = sys.argv[1]
+
+	#checks that the username only contains letters
+	if(not re.match('^[a-zA-Z]+$', username)):
+		print("username may only contain letters")
+		sys.exit(1)
+
+	database = user_control.openDatabase(username)
+
+	report = importTrades(sys.argv[2], database=database)
+
+	print("Imported " + str(report['imported']) + " rows in " + '{:.2f}'.format(report['seconds']) +
+			" seconds (" + '{:.0f}'.format(report['rows_per_second']) + " rows/second)")
+
+	if(report['skipped']):
+		print("Skipped " + str(report['skipped']) + " invalid rows")
+
+	if(report['duplicates']):
+		print("Skipped " + str(report['duplicates']) + " trades already recorded")
+
+	for error in report['errors']:
+		print("  " + error)
+
+if __name__ == '__main__':
+	main()
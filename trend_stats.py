@@ -0,0 +1,243 @@
+'''
+	Module calculates statistics over the prices recorded in the trends table.
+	Simple figures like the high, low and average are calculated by the database
+	itself, everything else works on NumPy arrays of a symbols prices so no
+	per price Python loops are needed even for many years of daily prices
+
+	@author Johnathan McNutt
+'''
+import math
+import numpy as np
+
+import database_manager
+import trend_store
+
+#number of trading days in a year, used to annualize volatility
+TRADING_DAYS_PER_YEAR = 252
+
+'''
+	retrieves the recorded prices for a symbol as arrays ordered by date
+
+	@param symbol - the NASDAQ stock symbol
+	@param startDate - optional first market date to include
+	@param endDate - optional last market date to include
+	@param database - path of the user database, defaults to database_manager.DATABASE
+
+	@return tuple - (array of datetime64 dates, array of integer prices in cents)
+'''
+def getPriceSeries(symbol, startDate=None, endDate=None, database=None):
+	#the columnar store already holds arrays, the prices are used without copying
+	if(database_manager.usesTrendStore(database)):
+		days, prices = trend_store.readRange(database_manager.getTrendStorePath(database), symbol, startDate, endDate)
+
+		if(len(days) == 0):
+			raise IndexError("no trends for symbol " + symbol.upper())
+
+		return days.astype('datetime64[D]'), prices
+
+	trendsList = database_manager.getSymbolTrendPrices(symbol, startDate, endDate, database)
+
+	dates = np.array([row[0] for row in trendsList], dtype='datetime64[D]')
+	prices = np.fromiter((row[1] for row in trendsList), dtype=np.int64, count=len(trendsList))
+
+	return dates, prices
+
+'''
+	converts comma separated YYYY-MM-DD dates into an array of dates without
+	parsing each one in Python. Dates are stored ten characters wide, so the
+	digits are read straight out of the text as bytes, text in any other
+	layout has each date brought to that width first
+
+	@param text - the dates separated by commas
+
+	@return array - datetime64 dates
+'''
+def parseDates(text):
+	characters = np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+
+	if((len(characters) + 1) % 11 == 0):
+		rows = np.append(characters, ord(',')).reshape(-1, 11)
+		digits = rows[:, [0, 1, 2, 3, 5, 6, 8, 9]].astype(np.int64) - ord('0')
+
+		if(np.all(rows[:, [4, 7]] == ord('-')) and np.all(rows[:, 10] == ord(',')) and np.all((digits >= 0) & (digits <= 9))):
+			years = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3] - 1970
+			months = digits[:, 4] * 10 + digits[:, 5] - 1
+			days = digits[:, 6] * 10 + digits[:, 7] - 1
+
+			if(np.all((months >= 0) & (months < 12) & (days >= 0))):
+				dates = (years.astype('datetime64[Y]').astype('datetime64[M]') + months).astype('datetime64[D]') + days
+
+				#days past the end of their month spill into the next one
+				if(np.all(dates.astype('datetime64[M]') == years.astype('datetime64[Y]').astype('datetime64[M]') + months)):
+					return dates
+
+	return np.array([normalizeDate(marketDate) for marketDate in text.split(',')], dtype='datetime64[D]')
+
+'''
+	brings a date written without zero padding, or followed by a time, to the
+	fixed width YYYY-MM-DD layout
+
+	@param marketDate - the date text
+
+	@return string - the date as YYYY-MM-DD
+'''
+def normalizeDate(marketDate):
+	try:
+		year, month, day = marketDate.strip().split(' ')[0].split('T')[0].split('-')
+
+		return '{:04d}-{:02d}-{:02d}'.format(int(year), int(month), int(day))
+	except ValueError:
+		raise ValueError(repr(marketDate) + " is not a YYYY-MM-DD date")
+
+'''
+	retrieves the recorded prices of many symbols as arrays ordered by date,
+	reading them all in one query rather than one query per symbol
+
+	@param symbols - list of NASDAQ stock symbols
+	@param startDate - optional first market date to include
+	@param endDate - optional last market date to include
+	@param database - path of the user database, defaults to database_manager.DATABASE
+
+	@return dictionary - maps each symbol with recorded prices to a (array of
+		datetime64 dates, array of integer prices in cents) tuple
+'''
+def getPriceSeriesMany(symbols, startDate=None, endDate=None, database=None):
+	symbols = [symbol.upper() for symbol in symbols]
+
+	series = {}
+
+	if(database_manager.usesTrendStore(database)):
+		directory = database_manager.getTrendStorePath(database)
+
+		for symbol in symbols:
+			days, prices = trend_store.readRange(directory, symbol, startDate, endDate)
+
+			if(len(days) > 0):
+				series[symbol] = (days.astype('datetime64[D]'), prices)
+
+		return series
+
+	for symbol, dateText, priceText in database_manager.getTrendPriceLists(symbols, startDate, endDate, database):
+		dates = parseDates(dateText)
+		prices = np.fromstring(priceText, dtype=np.int64, sep=',')
+
+		#rows come back in the order they were recorded
+		order = np.argsort(dates, kind='stable')
+
+		series[symbol] = (dates[order], prices[order])
+
+	return series
+
+'''
+	calculates the highest, lowest and average recorded price of a symbol
+	without reading the individual prices out of the database
+
+	@param symbol - the NASDAQ stock symbol
+	@param startDate - optional first market date to include
+	@param endDate - optional last market date to include
+	@param database - path of the user database, defaults to database_manager.DATABASE
+
+	@return dictionary - count, high, low and average price, prices in cents
+'''
+def getSummary(symbol, startDate=None, endDate=None, database=None):
+	count, lowest, highest, total = database_manager.getSymbolTrendSummary(symbol, startDate, endDate, database)
+
+	return {'count': count, 'high': highest, 'low': lowest, 'average': math.ceil(total/count)}
+
+'''
+	calculates the moving average of a price series
+
+	@param prices - array of prices
+	@param window - number of prices in each average
+
+	@return array - one average for each full window, ending at that windows last price
+'''
+def movingAverage(prices, window):
+	if(window <= 0):
+		raise ValueError("moving average window must be positive")
+
+	if(len(prices) < window):
+		return np.empty(0)
+
+	#the sum of any window is the difference of two running totals
+	sums = np.concatenate(([0.0], np.cumsum(prices, dtype=np.float64)))
+
+	return (sums[window:] - sums[:-window]) / window
+
+'''
+	calculates the annualized volatility of a price series, the standard
+	deviation of the log returns between consecutive prices
+
+	@param prices - array of prices, all above zero
+	@param periodsPerYear - number of prices in a year, daily prices by default
+
+	@return float - the annualized volatility, 0.25 being 25%
+'''
+def volatility(prices, periodsPerYear=TRADING_DAYS_PER_YEAR):
+	#at least two returns are needed for a standard deviation
+	if(len(prices) < 3):
+		return 0.0
+
+	returns = np.diff(np.log(np.asarray(prices, dtype=np.float64)))
+
+	return float(np.std(returns, ddof=1) * math.sqrt(periodsPerYear))
+
+'''
+	finds the largest drop from a peak price to a later low in a price series
+
+	@param prices - array of prices, all above zero
+
+	@return tuple - (drawdown as a fraction of the peak, index of the peak,
+		index of the low)
+'''
+def maxDrawdown(prices):
+	prices = np.asarray(prices, dtype=np.float64)
+
+	if(len(prices) == 0):
+		return 0.0, 0, 0
+
+	#highest price seen up to and including each point
+	peaks = np.maximum.accumulate(prices)
+
+	drawdowns = (peaks - prices) / peaks
+
+	trough = int(np.argmax(drawdowns))
+	peak = int(np.argmax(prices[:trough + 1]))
+
+	return float(drawdowns[trough]), peak, trough
+
+'''
+	calculates the full set of statistics for a symbol over a range of dates
+
+	@param symbol - the NASDAQ stock symbol
+	@param startDate - optional first market date to include
+	@param endDate - optional last market date to include
+	@param window - number of prices in the moving average
+	@param database - path of the user database, defaults to database_manager.DATABASE
+
+	@return dictionary - dates of the first and last price, count, high, low and
+		average price, the latest moving average, annualized volatility, and the
+		largest drawdown with the dates of its peak and low
+'''
+def getStatistics(symbol, startDate=None, endDate=None, window=20, database=None):
+	dates, prices = getPriceSeries(symbol, startDate, endDate, database)
+
+	averages = movingAverage(prices, window)
+
+	latestAverage = None
+	if(len(averages) > 0):
+		latestAverage = math.ceil(averages[-1])
+
+	drawdown, peak, trough = maxDrawdown(prices)
+
+	return {'start_date': str(dates[0]),
+			'end_date': str(dates[-1]),
+			'count': len(prices),
+			'high': int(prices.max()),
+			'low': int(prices.min()),
+			'average': math.ceil(int(prices.sum()) / len(prices)),
+			'moving_average': latestAverage,
+			'volatility': volatility(prices),
+			'max_drawdown': drawdown,
+			'drawdown_peak': str(dates[peak]),
+			'drawdown_trough': str(dates[trough])}
@@ -0,0 +1,354 @@
+'''
+	Module keeps recorded stock prices in a compact columnar store as an
+	alternative to the trends table. Each symbol has two files in the store
+	directory, one of market dates as days since 1970-01-01 and one of prices in
+	cents, both kept in date order. Files are memory mapped for reading, so a
+	range of prices is returned as NumPy views without copying
+
+	Changes to a store hold a lock on a file in its directory, so the price
+	daemon and the command line can write the same store from separate
+	processes
+
+	@author Johnathan McNutt
+'''
+import os
+import shutil
+import tempfile
+import threading
+import itertools
+import contextlib
+import numpy as np
+
+#file locks are taken with fcntl where it exists and msvcrt on Windows
+try:
+	import fcntl
+except ImportError:
+	fcntl = None
+	import msvcrt
+
+#layout of the two column files
+DAY_TYPE = np.dtype('<i4')
+CENTS_TYPE = np.dtype('<i8')
+
+#name of the file locked while a store is changed, symbols can't start with a dot
+LOCK_FILE = '.lock'
+
+#appends read and then extend the files, so only one may run at a time. The file
+#lock keeps out other processes, this lock other threads sharing the process
+_lock = threading.Lock()
+
+'''
+	holds the lock of a store while its files are changed, waiting for any
+	other thread or process changing it to finish
+
+	@param directory - the store directory, created if it doesn't exist
+'''
+@contextlib.contextmanager
+def lockStore(directory):
+	with _lock:
+		os.makedirs(directory, exist_ok=True)
+
+		with open(os.path.join(directory, LOCK_FILE), 'a+b') as lockFile:
+			if(fcntl is not None):
+				fcntl.flock(lockFile.fileno(), fcntl.LOCK_EX)
+			else:
+				#msvcrt locks a byte range from the current position
+				lockFile.seek(0)
+				msvcrt.locking(lockFile.fileno(), msvcrt.LK_LOCK, 1)
+
+			try:
+				yield
+			finally:
+				if(fcntl is not None):
+					fcntl.flock(lockFile.fileno(), fcntl.LOCK_UN)
+				else:
+					lockFile.seek(0)
+					msvcrt.locking(lockFile.fileno(), msvcrt.LK_UNLCK, 1)
+
+'''
+	converts a market date into a day number
+
+	@param marketDate - a date or YYYY-MM-DD string
+
+	@return integer - days since 1970-01-01
+'''
+def toDay(marketDate):
+	return int(np.datetime64(str(marketDate)[:10], 'D').astype(np.int64))
+
+'''
+	converts a day number back into a market date string
+
+	@param day - days since 1970-01-01
+
+	@return string - the date as YYYY-MM-DD
+'''
+def fromDay(day):
+	return str(np.datetime64(int(day), 'D'))
+
+'''
+	builds the paths of a symbols two column files
+
+	@param directory - the store directory
+	@param symbol - the NASDAQ stock symbol
+
+	@return tuple - (path of the day file, path of the cents file)
+'''
+def getPaths(directory, symbol):
+	symbol = symbol.upper()
+
+	#symbols become file names so path characters aren't allowed
+	if(not symbol or '/' in symbol or '\\' in symbol or symbol.startswith('.')):
+		raise ValueError("invalid stock symbol " + repr(symbol))
+
+	base = os.path.join(directory, symbol)
+
+	return base + '.days', base + '.cents'
+
+'''
+	memory maps one column file for reading
+
+	@param path - location of the column file
+	@param dtype - type of the values in the file
+
+	@return array - read only view of the file, empty if the file has no values
+'''
+def mapColumn(path, dtype):
+	if(not os.path.exists(path) or os.path.getsize(path) == 0):
+		return np.empty(0, dtype=dtype)
+
+	return np.memmap(path, dtype=dtype, mode='r')
+
+'''
+	reads a symbols full price history as views of the memory mapped files
+
+	@param directory - the store directory
+	@param symbol - the NASDAQ stock symbol
+
+	@return tuple - (array of day numbers, array of prices in cents)
+'''
+def readAll(directory, symbol):
+	dayPath, centsPath = getPaths(directory, symbol)
+
+	days = mapColumn(dayPath, DAY_TYPE)
+	cents = mapColumn(centsPath, CENTS_TYPE)
+
+	#a crash between the two file writes can leave one column a value longer
+	length = min(len(days), len(cents))
+
+	return days[:length], cents[:length]
+
+'''
+	reads a symbols prices between two dates without copying them
+
+	@param directory - the store directory
+	@param symbol - the NASDAQ stock symbol
+	@param startDate - optional first market date to include
+	@param endDate - optional last market date to include
+
+	@return tuple - (array of day numbers, array of prices in cents)
+'''
+def readRange(directory, symbol, startDate=None, endDate=None):
+	days, cents = readAll(directory, symbol)
+
+	#dates are in order so the range is found by binary search
+	start = 0
+	if(startDate is not None):
+		start = int(np.searchsorted(days, toDay(startDate), side='left'))
+
+	end = len(days)
+	if(endDate is not None):
+		end = int(np.searchsorted(days, toDay(endDate), side='right'))
+
+	return days[start:end], cents[start:end]
+
+'''
+	records the prices of many symbols. Like the trends table only the first
+	price recorded for a day is kept
+
+	@param directory - the store directory
+	@param trendList - list of (symbol, market_price, market_date) tuples
+'''
+def appendMany(directory, trendList):
+	#groups the new prices by symbol so each symbols files are opened once
+	bySymbol = {}
+
+	for symbol, price, marketDate in trendList:
+		bySymbol.setdefault(symbol.upper(), []).append((toDay(marketDate), price))
+
+	with lockStore(directory):
+		for symbol, points in bySymbol.items():
+			appendPoints(directory, symbol, points)
+
+'''
+	creates a new store holding prices recorded elsewhere, used to move a
+	trends table into a store. The store is filled in a temporary directory and
+	renamed into place, so it either holds every price or doesn't exist
+
+	@param directory - the store directory, must not exist yet
+	@param trendRows - iterable of (symbol, market_price, market_date) tuples
+		ordered by symbol, read one symbol at a time
+'''
+def create(directory, trendRows):
+	parent, name = os.path.split(os.path.abspath(directory))
+
+	temporary = tempfile.mkdtemp(prefix=name + '.', dir=parent)
+
+	try:
+		for symbol, rows in itertools.groupby(trendRows, key=lambda row: row[0].upper()):
+			symbols, prices, marketDates = zip(*rows)
+
+			#dates are converted together rather than one at a time
+			days = np.array([str(marketDate)[:10] for marketDate in marketDates], dtype='datetime64[D]').astype(np.int64)
+
+			#keeps the first price recorded for each day, in date order
+			days, first = np.unique(days, return_index=True)
+
+			dayPath, centsPath = getPaths(temporary, symbol)
+			days.astype(DAY_TYPE).tofile(dayPath)
+			np.array(prices, dtype=CENTS_TYPE)[first].tofile(centsPath)
+	except BaseException:
+		shutil.rmtree(temporary, ignore_errors=True)
+		raise
+
+	try:
+		os.rename(temporary, directory)
+	except OSError:
+		shutil.rmtree(temporary, ignore_errors=True)
+
+		#another process creating the same store first isn't an error
+		if(not os.path.isdir(directory)):
+			raise
+
+'''
+	records a single days price for a symbol
+
+	@param directory - the store directory
+	@param symbol - the NASDAQ stock symbol
+	@param price - market price in cents
+	@param marketDate - the date the price was checked
+'''
+def append(directory, symbol, price, marketDate):
+	appendMany(directory, [(symbol, price, marketDate)])
+
+'''
+	counts the values in a column file
+
+	@param path - location of the column file
+	@param dtype - type of the values in the file
+
+	@return integer - number of values, 0 if the file doesn't exist
+'''
+def countValues(path, dtype):
+	try:
+		return os.path.getsize(path) // dtype.itemsize
+	except FileNotFoundError:
+		return 0
+
+'''
+	reads the last recorded day of a symbol without mapping the whole file
+
+	@param dayPath - location of the day file
+
+	@return integer - the last day number, or None if nothing is recorded
+'''
+def readLastDay(dayPath):
+	try:
+		with open(dayPath, 'rb') as dayFile:
+			dayFile.seek(0, os.SEEK_END)
+
+			if(dayFile.tell() < DAY_TYPE.itemsize):
+				return None
+
+			dayFile.seek(-DAY_TYPE.itemsize, os.SEEK_END)
+
+			return int(np.frombuffer(dayFile.read(DAY_TYPE.itemsize), dtype=DAY_TYPE)[0])
+	except FileNotFoundError:
+		return None
+
+'''
+	adds new points to a symbols files, skipping days already recorded. Points
+	after the last recorded day are appended to the end of the files, older
+	ones are merged in by rewriting the files
+
+	@param directory - the store directory
+	@param symbol - the NASDAQ stock symbol, already upper case
+	@param points - list of (day number, price in cents) tuples
+'''
+def appendPoints(directory, symbol, points):
+	dayPath, centsPath = getPaths(directory, symbol)
+
+	#keeps the first price given for each day
+	newDays = {}
+	for day, price in points:
+		newDays.setdefault(day, price)
+
+	lastDay = readLastDay(dayPath)
+
+	#columns of different lengths were left by an interrupted write and are repaired by the rewrite below
+	aligned = countValues(dayPath, DAY_TYPE) == countValues(centsPath, CENTS_TYPE)
+
+	if(aligned and (lastDay is None or min(newDays) > lastDay)):
+		ordered = sorted(newDays.items())
+
+		with open(dayPath, 'ab') as dayFile, open(centsPath, 'ab') as centsFile:
+			dayFile.write(np.array([point[0] for point in ordered], dtype=DAY_TYPE).tobytes())
+			centsFile.write(np.array([point[1] for point in ordered], dtype=CENTS_TYPE).tobytes())
+
+		return
+
+	days, cents = readAll(directory, symbol)
+
+	#days that are already recorded keep their price
+	existing = set(days.tolist())
+	merged = dict(zip(days.tolist(), cents.tolist()))
+
+	for day, price in newDays.items():
+		if(day not in existing):
+			merged[day] = price
+
+	writeColumns(dayPath, centsPath, sorted(merged.items()))
+
+'''
+	replaces the contents of a symbols files
+
+	@param dayPath - location of the day file
+	@param centsPath - location of the cents file
+	@param points - ordered list of (day number, price in cents) tuples
+'''
+def writeColumns(dayPath, centsPath, points):
+	dayArray = np.array([point[0] for point in points], dtype=DAY_TYPE)
+	centsArray = np.array([point[1] for point in points], dtype=CENTS_TYPE)
+
+	#writes new files then swaps them in so readers never see half written files
+	dayArray.tofile(dayPath + '.tmp')
+	centsArray.tofile(centsPath + '.tmp')
+
+	os.replace(dayPath + '.tmp', dayPath)
+	os.replace(centsPath + '.tmp', centsPath)
+
+'''
+	removes recorded prices for a symbol
+
+	@param directory - the store directory
+	@param symbol - the NASDAQ stock symbol
+	@param marketDate - optional day to remove, every day is removed if not given
+'''
+def remove(directory, symbol, marketDate=None):
+	dayPath, centsPath = getPaths(directory, symbol)
+
+	with lockStore(directory):
+		if(marketDate is None):
+			for path in (dayPath, centsPath):
+				if(os.path.exists(path)):
+					os.remove(path)
+
+			return
+
+		days, cents = readAll(directory, symbol)
+
+		day = toDay(marketDate)
+
+		points = [point for point in zip(days.tolist(), cents.tolist()) if point[0] != day]
+
+		if(len(points) != len(days)):
+			writeColumns(dayPath, centsPath, points)
@@ -1,4 +1,5 @@
-'''	Module handles all user interactions with the program, primarily through logging
+'''
+	Module handles all user interactions with the program, primarily through logging
 	the user into their personal database and then allowing them to select options from
 	the programs main menu
 	
@@ -6,10 +7,8 @@
 '''
 import os
 import re
-import requests
 import database_manager
 import stock_model
-from datetime import date
 
 '''
 	Handles program startup
@@ -34,17 +33,31 @@ def login():
 		if(not valid):
 			print("username may only contain letters\n")
 	
-	#adds the path and database extension
-	database = "data/" + database + ".db"
-	
 	#sets the users database
-	database_manager.DATABASE = database
+	database_manager.DATABASE = openDatabase(database)
+		
+	print()
+
+'''
+	finds a users database, creating its tables if it doesn't exist yet and
+	bringing it up to date if it was made by an older version
+	
+	@param username - the users name
+	
+	@return string - path of the users database
+'''
+def openDatabase(username):
+	#adds the path and database extension
+	database = "data/" + username + ".db"
 	
 	#creates the database tables if they don't already exist
 	if(not os.path.exists(database)):
-		database_manager.createDatabase()
-		
-	print()
+		database_manager.createDatabase(database)
+	
+	#brings databases made by older versions up to date
+	database_manager.migrateDatabase(database)
+	
+	return database
 
 '''
 	Allows the user to select from menu options that handle different
@@ -124,7 +137,11 @@ def sellStock():
 '''
 def printLog():
 	try:
-		print(stock_model.getTransactionString())
+		#prints each page as soon as it is read
+		for message in stock_model.iterTransactionString():
+			print(message, end='')
+		
+		print()
 	except IndexError:
 		print("No transactions made")
 		